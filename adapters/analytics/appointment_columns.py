@@ -0,0 +1,352 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from datetime import date, time
+from itertools import compress, islice
+from operator import le
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from core.domain.appointment import Appointment
+
+# NumPy es opcional: si esta instalado las operaciones se vectorizan,
+# si no se usa un camino en Python puro sobre los mismos arrays tipados
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depende del entorno
+    np = None
+
+# Columnas paralelas de la instantanea (una posicion por cita)
+COLUMNS = ("dates", "seconds", "costs", "customer_ids", "car_ids")
+
+
+class AppointmentColumns:
+    """
+    Instantanea columnar (solo lectura) de las citas para analitica.
+    Cada cita es una posicion en arrays paralelos:
+      - dates:     fecha como ordinal (array('i'))
+      - seconds:   segundos desde medianoche (array('i'))
+      - costs:     coste en euros (array('d'))
+      - customers / cars: ids enteros codificados con diccionario (array('i'))
+
+    Las instantaneas que salen de from_rows, from_codes, from_appointments y concat
+    tienen las filas ordenadas por fecha. Asi un filtro por fechas es un corte de los
+    arrays (bisect) y agrupar por dia son sumas sobre cortes, en C aunque no haya
+    NumPy; solo agrupar por cliente o coche recorre las filas en Python.
+
+    Con 50000 citas (benchmarks/bench_analytics.py) el informe repetido tarda ~1.6 ms
+    con NumPy (~100x frente a recorrer objetos) y ~5 ms sin el (~30-40x). Los informes
+    por cliente o coche no bajan tanto sin NumPy: el orden de magnitud pide instalarlo.
+    """
+
+    def __init__(self) -> None:
+        self.dates = array('i')
+        self.seconds = array('i')
+        self.costs = array('d')
+        self.customer_ids = array('i')
+        self.car_ids = array('i')
+        # Diccionarios de codificacion id -> clave y clave -> id
+        self.dnis: List[str] = []
+        self.plates: List[str] = []
+        self._dni_ids: Dict[str, int] = {}
+        self._plate_ids: Dict[str, int] = {}
+        #Filas en orden de fecha (lo mantienen los constructores y los filtros)
+        self._by_date = True
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    # ==========================
+    # CONSTRUCCION
+    # ==========================
+    @staticmethod
+    def _encode(key: str, ids: Dict[str, int], values: List[str]) -> int:
+        code = ids.get(key)
+        if code is None:
+            code = ids[key] = len(values)
+            values.append(key)
+        return code
+
+    def append(self, date_: date, time_: time, cost: float, dni: str, plate: str) -> None:
+        """Añade una fila a la instantanea"""
+        ordinal = date_.toordinal()
+        if self.dates and ordinal < self.dates[-1]:
+            self._by_date = False
+        self.dates.append(ordinal)
+        self.seconds.append(time_.hour * 3600 + time_.minute * 60 + time_.second)
+        self.costs.append(cost)
+        self.customer_ids.append(self._encode(dni, self._dni_ids, self.dnis))
+        self.car_ids.append(self._encode(plate, self._plate_ids, self.plates))
+
+    @classmethod
+    def from_appointments(cls, appointments: Iterable[Appointment]) -> "AppointmentColumns":
+        """Construye la instantanea a partir de objetos de dominio"""
+        columns = cls()
+        for a in appointments:
+            columns.append(a.date, a.time, a.cost, a.customer.dni, a.car.plate)
+        return columns._sort_by_date()
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[date, time, float, str, str]]) -> "AppointmentColumns":
+        """Construye la instantanea en bloque desde filas compactas (fecha, hora, coste, dni, matricula)"""
+        columns = cls()
+        rows = rows if isinstance(rows, list) else list(rows)
+        if not rows:
+            return columns
+        dates, times, costs, dnis, plates = zip(*rows)
+        #Hay pocas fechas y horas distintas: cada una se convierte una sola vez
+        ordinals = {d: d.toordinal() for d in set(dates)}
+        seconds = {t: t.hour * 3600 + t.minute * 60 + t.second for t in set(times)}
+        columns.dates = array('i', map(ordinals.__getitem__, dates))
+        columns.seconds = array('i', map(seconds.__getitem__, times))
+        columns.costs = array('d', costs)
+        columns.customer_ids = cls._encode_all(dnis, columns._dni_ids, columns.dnis)
+        columns.car_ids = cls._encode_all(plates, columns._plate_ids, columns.plates)
+        return columns._sort_by_date()
+
+    @classmethod
+    def from_codes(cls, dates: Iterable[int], seconds: Iterable[int], cents: Iterable[int],
+                   customer_ids: Iterable[int], car_ids: Iterable[int],
+                   dnis: List[str], plates: List[str]) -> "AppointmentColumns":
+        """Construye la instantanea desde columnas ya codificadas (ids sobre las tablas dnis y plates)"""
+        columns = cls()
+        columns.dates = array('i', dates)
+        columns.seconds = array('i', seconds)
+        if np is not None:
+            columns.costs = cls._from_np('d', np.asarray(array('q', cents), dtype=np.float64) / 100)
+        else:
+            columns.costs = array('d', (c / 100 for c in cents))
+        columns.customer_ids = array('i', customer_ids)
+        columns.car_ids = array('i', car_ids)
+        columns.dnis, columns.plates = list(dnis), list(plates)
+        columns._dni_ids = {k: i for i, k in enumerate(columns.dnis)}
+        columns._plate_ids = {k: i for i, k in enumerate(columns.plates)}
+        return columns._sort_by_date()
+
+    @classmethod
+    def concat(cls, parts: Iterable["AppointmentColumns"]) -> "AppointmentColumns":
+        """Une varias instantaneas en una, recodificando clientes y coches sobre tablas comunes"""
+        result = cls()
+        for part in parts:
+            #Id de la parte -> id del resultado, para cada clave de sus tablas
+            customers = cls._encode_all(part.dnis, result._dni_ids, result.dnis)
+            cars = cls._encode_all(part.plates, result._plate_ids, result.plates)
+            result.dates.extend(part.dates)
+            result.seconds.extend(part.seconds)
+            result.costs.extend(part.costs)
+            result.customer_ids.extend(part._recode(part.customer_ids, customers))
+            result.car_ids.extend(part._recode(part.car_ids, cars))
+        return result._sort_by_date()
+
+    def _sort_by_date(self) -> "AppointmentColumns":
+        """Ordena las filas por fecha si no lo estan (estable: a igual fecha queda el orden de entrada)"""
+        dates = self.dates
+        if not all(map(le, dates, islice(dates, 1, None))):
+            if np is not None:
+                order = np.argsort(self._np(dates), kind="stable")
+                for name in COLUMNS:
+                    column = getattr(self, name)
+                    setattr(self, name, self._from_np(column.typecode, self._np(column)[order]))
+            else:
+                order = sorted(range(len(dates)), key=dates.__getitem__)
+                for name in COLUMNS:
+                    column = getattr(self, name)
+                    setattr(self, name, array(column.typecode, map(column.__getitem__, order)))
+        self._by_date = True
+        return self
+
+    @classmethod
+    def _encode_all(cls, keys: Iterable[str], ids: Dict[str, int], values: List[str]) -> array:
+        encode = cls._encode
+        return array('i', [encode(key, ids, values) for key in keys])
+
+    @classmethod
+    def _recode(cls, codes: array, mapping: array) -> array:
+        if np is not None:
+            return cls._from_np('i', cls._np(mapping)[cls._np(codes)])
+        return array('i', map(mapping.__getitem__, codes))
+
+    @staticmethod
+    def _from_np(typecode: str, values) -> array:
+        """Copia un array de NumPy en un array tipado"""
+        result = array(typecode)
+        result.frombytes(values.astype(np.intc if typecode == 'i' else np.float64, copy=False).tobytes())
+        return result
+
+    def _shared(self) -> "AppointmentColumns":
+        """Instantanea vacia que comparte los diccionarios de codificacion"""
+        result = AppointmentColumns()
+        result.dnis, result._dni_ids = self.dnis, self._dni_ids
+        result.plates, result._plate_ids = self.plates, self._plate_ids
+        #Quitar filas no cambia el orden de las que quedan
+        result._by_date = self._by_date
+        return result
+
+    def _slice(self, i: int, j: int) -> "AppointmentColumns":
+        """Nueva instantanea con las filas [i, j) (un corte de cada array)"""
+        result = self._shared()
+        for name in COLUMNS:
+            setattr(result, name, getattr(self, name)[i:j])
+        return result
+
+    def _day_runs(self) -> Iterator[Tuple[int, int, int]]:
+        """(dia, inicio, fin) de las filas de cada dia; solo con las filas ordenadas por fecha"""
+        dates, start = self.dates, 0
+        for day in sorted(set(dates)):
+            end = bisect_right(dates, day, start)
+            yield day, start, end
+            start = end
+
+    def _take(self, mask) -> "AppointmentColumns":
+        """Nueva instantanea con las filas marcadas en la mascara booleana de NumPy"""
+        result = self._shared()
+        for name in COLUMNS:
+            column = getattr(self, name)
+            setattr(result, name, self._from_np(column.typecode, self._np(column)[mask]))
+        return result
+
+    def _compress(self, keep: List[bool]) -> "AppointmentColumns":
+        """Nueva instantanea con las filas marcadas en keep (camino sin NumPy)"""
+        result = self._shared()
+        for name in COLUMNS:
+            column = getattr(self, name)
+            setattr(result, name, array(column.typecode, compress(column, keep)))
+        return result
+
+    def keys(self) -> Set[Tuple[str, date, time]]:
+        """(matricula, fecha, hora) de cada fila: la misma clave que identifica una cita"""
+        plates = self.plates
+        return {
+            (plates[car], date.fromordinal(day), time(s // 3600, s // 60 % 60, s % 60))
+            for day, s, car in zip(self.dates, self.seconds, self.car_ids)
+        }
+
+    def without(self, keys: Set[Tuple[str, date, time]]) -> "AppointmentColumns":
+        """Nueva instantanea sin las filas cuya clave (matricula, fecha, hora) esta en keys"""
+        if not keys:
+            return self
+        plates = self.plates
+        keep = [
+            (plates[car], date.fromordinal(day), time(s // 3600, s // 60 % 60, s % 60)) not in keys
+            for day, s, car in zip(self.dates, self.seconds, self.car_ids)
+        ]
+        return self._compress(keep)
+
+    # ==========================
+    # FILTROS
+    # ==========================
+    def filter(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        dni: Optional[str] = None,
+        plate: Optional[str] = None,
+    ) -> "AppointmentColumns":
+        """Filtra por rango de fechas [start, end] y/o cliente y/o coche"""
+        lo = start.toordinal() if start else None
+        hi = end.toordinal() if end else None
+        cust = self._dni_ids.get(dni.upper(), -1) if dni else None
+        car = self._plate_ids.get(plate.upper(), -1) if plate else None
+
+        if self._by_date and (lo is not None or hi is not None):
+            #El rango de fechas es un corte: solo quedan por filtrar cliente y coche
+            i = 0 if lo is None else bisect_left(self.dates, lo)
+            j = len(self) if hi is None else bisect_right(self.dates, hi)
+            return self._slice(i, j).filter(dni=dni, plate=plate)
+        if cust is None and car is None and lo is None and hi is None:
+            return self
+
+        if np is not None:
+            mask = np.ones(len(self), dtype=bool)
+            dates = self._np(self.dates)
+            if lo is not None:
+                mask &= dates >= lo
+            if hi is not None:
+                mask &= dates <= hi
+            if cust is not None:
+                mask &= self._np(self.customer_ids) == cust
+            if car is not None:
+                mask &= self._np(self.car_ids) == car
+            return self._take(mask)
+
+        keep = [
+            (lo is None or d >= lo) and (hi is None or d <= hi)
+            and (cust is None or c == cust) and (car is None or k == car)
+            for d, c, k in zip(self.dates, self.customer_ids, self.car_ids)
+        ]
+        return self._compress(keep)
+
+    # ==========================
+    # AGRUPACIONES
+    # ==========================
+    @staticmethod
+    def _np(column: array):
+        """Vista NumPy sin copia de un array tipado"""
+        return np.frombuffer(column, dtype=np.intc if column.typecode == 'i' else np.float64)
+
+    def _group(self, keys: array, weights: Optional[array]) -> Dict[int, float]:
+        """Suma weights (o cuenta filas si es None) agrupando por keys"""
+        if len(keys) == 0:
+            return {}
+        if np is not None:
+            uniq, inverse = np.unique(self._np(keys), return_inverse=True)
+            sums = np.bincount(inverse, weights=None if weights is None else self._np(weights))
+            return dict(zip(uniq.tolist(), sums.tolist()))
+
+        acc: Dict[int, float] = defaultdict(float)
+        if weights is None:
+            for k in keys:
+                acc[k] += 1
+        else:
+            for k, w in zip(keys, weights):
+                acc[k] += w
+        return dict(acc)
+
+    def total_revenue(self) -> float:
+        if np is not None:
+            return float(self._np(self.costs).sum())
+        return sum(self.costs)
+
+    def revenue_by_day(self) -> Dict[date, float]:
+        if np is None and self._by_date:
+            costs = self.costs
+            return {date.fromordinal(day): sum(costs[i:j]) for day, i, j in self._day_runs()}
+        return {date.fromordinal(k): v for k, v in self._group(self.dates, self.costs).items()}
+
+    def revenue_by_month(self) -> Dict[Tuple[int, int], float]:
+        result: Dict[Tuple[int, int], float] = defaultdict(float)
+        #Agrupamos primero por dia (pocas claves) y despues plegamos los dias en meses
+        for day, total in self.revenue_by_day().items():
+            result[(day.year, day.month)] += total
+        return dict(result)
+
+    def revenue_by_customer(self) -> Dict[str, float]:
+        return self._decode(self._group(self.customer_ids, self.costs), self.dnis.__getitem__)
+
+    def revenue_by_car(self) -> Dict[str, float]:
+        return self._decode(self._group(self.car_ids, self.costs), self.plates.__getitem__)
+
+    def count_by_hour(self) -> Dict[int, int]:
+        """Numero de citas por hora del dia (ocupacion por franja)"""
+        if np is not None:
+            uniq, counts = np.unique(self._np(self.seconds) // 3600, return_counts=True)
+            return dict(zip(uniq.tolist(), counts.tolist()))
+        #Hay pocas horas distintas: se cuentan los segundos en C y se pliegan en horas
+        hours: Dict[int, int] = defaultdict(int)
+        for seconds, count in Counter(self.seconds).items():
+            hours[seconds // 3600] += count
+        return dict(hours)
+
+    def utilisation_by_day(self, slots_per_day: int) -> Dict[date, float]:
+        """Fraccion de huecos ocupados cada dia sobre la capacidad diaria del taller"""
+        if slots_per_day <= 0:
+            raise ValueError("La capacidad diaria tiene que ser mayor que 0")
+        if np is None and self._by_date:
+            return {date.fromordinal(day): (j - i) / slots_per_day for day, i, j in self._day_runs()}
+        return {
+            date.fromordinal(k): v / slots_per_day
+            for k, v in self._group(self.dates, None).items()
+        }
+
+    @staticmethod
+    def _decode(groups: Dict[int, float], lookup: Callable[[int], str]) -> Dict[str, float]:
+        return {lookup(k): v for k, v in groups.items()}
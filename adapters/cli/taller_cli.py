@@ -0,0 +1,332 @@
+"""
+Linea de comandos sin interfaz grafica: python -m adapters.cli <comando>
+
+Reutiliza el mismo cableado de servicios que main.py (bootstrap.build_services)
+pero sin tkinter. Los modulos pesados se importan dentro de cada comando para
+que una consulta sencilla arranque rapido. Con --jsonl la salida es un objeto
+JSON por linea, pensado para encadenar con otras herramientas.
+
+Ejemplos:
+    python -m adapters.cli list appointments --date 2025-12-10 --jsonl
+    python -m adapters.cli schedule 56789879B 0859GPZ 2026-11-02 10:00 80
+    python -m adapters.cli report month --month 2025-12
+    python -m adapters.cli analytics revenue --by month --from 2025-01-01 --to 2025-12-31
+    python -m adapters.cli export appointments --out citas.jsonl
+    python -m adapters.cli export appointments --format ics --from 2026-11-01 --to 2026-11-30 --out noviembre.ics
+    python -m adapters.cli import customers clientes.csv --errors rechazados.csv
+    python -m adapters.cli archive --older-than 365
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, Iterable, TextIO
+
+
+# ==========================
+# SALIDA
+# ==========================
+def customer_to_record(c) -> Dict[str, Any]:
+    return {"dni": c.dni, "name": c.name, "surname": c.surname, "birth_date": c.birth_date.isoformat(),
+            "email": c.email, "phone": c.phone}
+
+
+def car_to_record(c) -> Dict[str, Any]:
+    return {"plate": c.plate, "brand": c.brand, "model": c.model, "year": c.year,
+            "last_revision": c.last_revision.isoformat() if c.last_revision else None}
+
+
+def appointment_to_record(a) -> Dict[str, Any]:
+    return {"date": a.date.isoformat(), "time": a.time.isoformat(), "cost": a.cost,
+            "customer_dni": a.customer.dni, "car_plate": a.car.plate}
+
+
+def summary_to_record(s, **keys: Any) -> Dict[str, Any]:
+    return {**keys, "count": s.count, "total": s.total, "average": round(s.average(), 2)}
+
+
+def emit(records: Iterable[Dict[str, Any]], jsonl: bool, out: TextIO = sys.stdout) -> int:
+    """Escribe los registros (JSON-lines o texto tabulado) y devuelve cuantos ha escrito"""
+    count = 0
+    for record in records:
+        if jsonl:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        else:
+            out.write(" | ".join("-" if v is None else str(v) for v in record.values()) + "\n")
+        count += 1
+    return count
+
+
+# ==========================
+# ENTRADA
+# ==========================
+def customer_from_record(row: dict):
+    from datetime import date
+    from core.domain.customer import Customer
+    return Customer(**{**row, "birth_date": date.fromisoformat(row["birth_date"])})
+
+
+def car_from_record(row: dict):
+    from datetime import date
+    from core.domain.car import Car
+    revision = row.get("last_revision")
+    return Car(**{**row, "last_revision": date.fromisoformat(revision) if revision else None})
+
+
+# ==========================
+# COMANDOS
+# ==========================
+def _services(args):
+    #Import perezoso: el cableado arrastra repositorios y dominio
+    from bootstrap import build_services
+    return build_services(args.data, getattr(args, "_metrics", None))
+
+
+def _parse_date(raw: str):
+    from datetime import date
+    return date.fromisoformat(raw)
+
+
+def cmd_list(args) -> int:
+    services = _services(args)
+    if args.entity == "customers":
+        records = map(customer_to_record, services.list_customers.execute())
+    elif args.entity == "cars":
+        source = services.list_cars_due_revision if args.due_revision else services.list_cars
+        records = map(car_to_record, source.execute())
+    else:
+        if args.customer:
+            appointments = services.list_appointments_by_customer.execute(args.customer)
+        elif args.car:
+            appointments = services.list_appointments_by_car.execute(args.car)
+        else:
+            appointments = services.list_appointments.execute(_parse_date(args.date) if args.date else None)
+        records = map(appointment_to_record, sorted(appointments, key=lambda a: (a.date, a.time)))
+    emit(records, args.jsonl)
+    return 0
+
+
+def cmd_import(args) -> int:
+    #Validacion en paralelo y un add_many por trozo (ver adapters/importing/bulk_import.py)
+    from adapters.importing.bulk_import import BulkImporter
+    services = _services(args)
+    repo = services.customer_repo if args.entity == "customers" else services.car_repo
+    report = BulkImporter(repo, args.entity, chunk_size=args.chunk_size, workers=args.workers).run(args.file)
+    if args.errors:
+        report.write_csv(args.errors)
+    else:
+        for row in report.rejected:
+            print(f"⚠️ fila {row.line}: {row.reason}", file=sys.stderr)
+    emit([{"imported": report.imported, "rejected": len(report.rejected)}], args.jsonl)
+    return 1 if report.rejected else 0
+
+
+def cmd_export(args) -> int:
+    services = _services(args)
+    if args.entity == "appointments":
+        return _export_appointments(services, args)
+    if args.entity == "customers":
+        records = map(customer_to_record, services.list_customers.execute())
+    else:
+        records = map(car_to_record, services.list_cars.execute())
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            count = emit(records, True, f)
+        print(f"✅ {count} filas exportadas a {args.out}", file=sys.stderr)
+    else:
+        emit(records, True)
+    return 0
+
+
+def _export_appointments(services, args) -> int:
+    #En streaming desde el repositorio: la memoria no crece con el numero de citas
+    from adapters.exporting.appointment_export import FORMATS, export_to_file
+    appointments = services.export_appointments.execute(
+        _parse_date(args.date_from) if args.date_from else None,
+        _parse_date(args.date_to) if args.date_to else None,
+        args.customer,
+    )
+    if args.out:
+        count = export_to_file(appointments, args.format, args.out)
+        print(f"✅ {count} citas exportadas a {args.out}", file=sys.stderr)
+    else:
+        FORMATS[args.format](appointments, sys.stdout)
+    return 0
+
+
+def cmd_schedule(args) -> int:
+    from datetime import time
+    services = _services(args)
+    appointment = services.schedule_appointment.execute(
+        args.dni, args.plate, _parse_date(args.date), time.fromisoformat(args.time), args.cost
+    )
+    emit([appointment_to_record(appointment)], args.jsonl)
+    return 0
+
+
+def cmd_report(args) -> int:
+    from datetime import date
+    services = _services(args)
+    today = date.today()
+    if args.kind == "day":
+        day = _parse_date(args.date) if args.date else today
+        records = [summary_to_record(services.get_daily_revenue.execute(day), date=day.isoformat())]
+    elif args.kind == "month":
+        year, month = map(int, args.month.split("-")) if args.month else (today.year, today.month)
+        records = [summary_to_record(services.get_monthly_revenue.execute(year, month), month=f"{year:04d}-{month:02d}")]
+    elif args.kind == "customer":
+        records = [summary_to_record(services.get_customer_value.execute(args.key), dni=args.key.upper())]
+    elif args.kind == "car":
+        records = [summary_to_record(services.get_car_spend.execute(args.key), plate=args.key.upper())]
+    elif args.kind == "top":
+        records = [summary_to_record(s, dni=dni) for dni, s in services.get_top_customers.execute(args.limit)]
+    elif args.kind == "workload":
+        records = [summary_to_record(s, date=d.isoformat()) for d, s in services.get_workload.execute(today, args.days)]
+    else:
+        day = _parse_date(args.date) if args.date else today
+        records = [
+            {"time": e.time.isoformat(), "customer_dni": e.customer_dni, "car_plate": e.car_plate, "cost": e.cost}
+            for e in services.get_agenda.execute(day)
+        ]
+    emit(records, args.jsonl)
+    return 0
+
+
+def cmd_analytics(args) -> int:
+    services = _services(args)
+    start = _parse_date(args.date_from) if args.date_from else None
+    end = _parse_date(args.date_to) if args.date_to else None
+    if args.kind == "revenue":
+        records = [{args.by: key, "total": total}
+                   for key, total in services.get_revenue_breakdown.execute(start, end, args.by)]
+    elif args.kind == "utilisation":
+        records = [{"date": d.isoformat(), "utilisation": round(u, 3)}
+                   for d, u in services.get_utilisation.execute(start, end, args.slots)]
+    else:
+        records = [{"hour": hour, "count": count} for hour, count in services.get_busy_hours.execute(start, end)]
+    emit(records, args.jsonl)
+    return 0
+
+
+def cmd_rebuild_stats(args) -> int:
+    services = _services(args)
+    services.rebuild_stats.execute()
+    print("✅ Agregados reconstruidos", file=sys.stderr)
+    return 0
+
+
+def cmd_archive(args) -> int:
+    services = _services(args)
+    moved = services.archive_appointments.execute(args.older_than)
+    print(f"✅ {moved} citas archivadas", file=sys.stderr)
+    return 0
+
+
+# ==========================
+# ARGUMENTOS
+# ==========================
+def _add_global_options(parser: argparse.ArgumentParser, suppress: bool) -> None:
+    """
+    --data, --jsonl y --metrics. En los subcomandos (suppress) no tienen valor por
+    defecto, para no pisar las que se dieron antes del comando.
+    """
+    def default(value: Any) -> Any:
+        return argparse.SUPPRESS if suppress else value
+
+    parser.add_argument("--data", default=default("data"), help="Carpeta de datos (por defecto: data)")
+    parser.add_argument("--jsonl", action="store_true", default=default(False), help="Salida en JSON-lines")
+    parser.add_argument("--metrics", metavar="PREFIJO", default=default(None),
+                        help="Exporta metricas en PREFIJO.json y PREFIJO.prom")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m adapters.cli", description="Sistema Taller sin interfaz grafica")
+    _add_global_options(parser, suppress=False)
+    #Las opciones globales valen tambien despues del comando
+    common = argparse.ArgumentParser(add_help=False)
+    _add_global_options(common, suppress=True)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("list", parents=[common], help="Lista clientes, coches o citas")
+    p.add_argument("entity", choices=["customers", "cars", "appointments"])
+    p.add_argument("--date", help="Citas de un dia (YYYY-MM-DD)")
+    p.add_argument("--customer", help="Citas de un cliente (DNI)")
+    p.add_argument("--car", help="Citas de un coche (matricula)")
+    p.add_argument("--due-revision", action="store_true", help="Solo coches pendientes de revision")
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser("import", parents=[common], help="Importa clientes o coches desde CSV, JSON o JSON-lines")
+    p.add_argument("entity", choices=["customers", "cars"])
+    p.add_argument("file", help="Fichero .csv (con cabecera), .jsonl o array JSON")
+    p.add_argument("--chunk-size", type=int, default=5000, help="Filas por trozo (una escritura por trozo)")
+    p.add_argument("--workers", type=int, help="Procesos de validacion (por defecto, uno por CPU)")
+    p.add_argument("--errors", help="Guarda las filas rechazadas en este CSV")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("export", parents=[common], help="Exporta en JSON-lines (citas tambien en CSV o iCalendar)")
+    p.add_argument("entity", choices=["customers", "cars", "appointments"])
+    p.add_argument("--out", help="Fichero de salida (por defecto stdout)")
+    p.add_argument("--format", choices=["jsonl", "csv", "ics"], default="jsonl", help="Formato de las citas")
+    p.add_argument("--from", dest="date_from", help="Citas desde este dia (YYYY-MM-DD)")
+    p.add_argument("--to", dest="date_to", help="Citas hasta este dia, incluido (YYYY-MM-DD)")
+    p.add_argument("--customer", help="Solo las citas de este cliente (DNI)")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("schedule", parents=[common], help="Programa una cita")
+    p.add_argument("dni")
+    p.add_argument("plate")
+    p.add_argument("date", help="YYYY-MM-DD")
+    p.add_argument("time", help="HH:MM")
+    p.add_argument("cost", type=float)
+    p.set_defaults(func=cmd_schedule)
+
+    p = sub.add_parser("report", parents=[common], help="Informes a partir de los agregados")
+    p.add_argument("kind", choices=["day", "month", "customer", "car", "top", "workload", "agenda"])
+    p.add_argument("key", nargs="?", help="DNI o matricula (report customer/car)")
+    p.add_argument("--date", help="Dia (YYYY-MM-DD) para day/agenda")
+    p.add_argument("--month", help="Mes (YYYY-MM) para month")
+    p.add_argument("--limit", type=int, default=5, help="Numero de clientes para top")
+    p.add_argument("--days", type=int, default=7, help="Dias para workload")
+    p.set_defaults(func=cmd_report)
+
+    p = sub.add_parser("analytics", parents=[common], help="Informes de un periodo sobre todas las citas (columnar)")
+    p.add_argument("kind", choices=["revenue", "utilisation", "hours"])
+    p.add_argument("--from", dest="date_from", help="Desde este dia (YYYY-MM-DD)")
+    p.add_argument("--to", dest="date_to", help="Hasta este dia, incluido (YYYY-MM-DD)")
+    p.add_argument("--by", choices=["day", "month", "customer", "car"], default="day",
+                   help="Agrupacion de revenue (por defecto: day)")
+    p.add_argument("--slots", type=int, default=8, help="Huecos por dia para utilisation (por defecto 8)")
+    p.set_defaults(func=cmd_analytics)
+
+    p = sub.add_parser("rebuild-stats", parents=[common], help="Recalcula los agregados desde cero")
+    p.set_defaults(func=cmd_rebuild_stats)
+
+    p = sub.add_parser("archive", parents=[common], help="Lleva las citas pasadas antiguas al archivo comprimido")
+    p.add_argument("--older-than", type=int, default=365, metavar="DIAS",
+                   help="Archiva las citas de hace mas de DIAS dias (por defecto 365)")
+    p.set_defaults(func=cmd_archive)
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "report" and args.kind in ("customer", "car") and not args.key:
+        parser.error(f"report {args.kind} necesita un DNI o matricula")
+    if args.command == "export" and args.entity != "appointments" and (
+            args.format != "jsonl" or args.date_from or args.date_to or args.customer):
+        parser.error("--format, --from, --to y --customer solo valen para export appointments")
+
+    metrics = None
+    if args.metrics:
+        from adapters.instrumentation.metrics import MetricsRegistry
+        metrics = args._metrics = MetricsRegistry()
+        metrics.attach_io()
+    try:
+        return args.func(args)
+    except ValueError as ex:
+        print(f"❌ {ex}", file=sys.stderr)
+        return 1
+    finally:
+        if metrics:
+            metrics.export(args.metrics)
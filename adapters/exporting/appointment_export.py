@@ -0,0 +1,117 @@
+"""
+Exportacion de citas en streaming a CSV, JSON-lines e iCalendar (.ics).
+
+Los escritores reciben un iterable de citas (ExportAppointmentsService, que lee
+del repositorio dia a dia) y escriben cada una en cuanto llega: ni la lista de
+citas ni el fichero de salida se construyen en memoria.
+
+  - csv:   para contabilidad, una fila por cita con cabecera.
+  - jsonl: un objeto JSON por linea, los mismos campos que la linea de comandos.
+  - ics:   un VEVENT por cita para importarlo en el calendario de los mecanicos.
+"""
+import csv
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, TextIO
+
+from core.domain.appointment import Appointment
+
+CSV_FIELDS = ("date", "time", "cost", "customer_dni", "car_plate")
+# Duracion con la que se apunta cada cita en el calendario
+DEFAULT_DURATION = timedelta(hours=1)
+# RFC 5545: las lineas de mas de 75 octetos se pliegan
+ICS_LINE_OCTETS = 75
+
+
+def _record(a: Appointment) -> Dict[str, object]:
+    return {"date": a.date.isoformat(), "time": a.time.isoformat(), "cost": a.cost,
+            "customer_dni": a.customer.dni, "car_plate": a.car.plate}
+
+
+def write_csv(appointments: Iterable[Appointment], out: TextIO) -> int:
+    writer = csv.writer(out)
+    writer.writerow(CSV_FIELDS)
+    count = 0
+    for a in appointments:
+        writer.writerow((a.date.isoformat(), a.time.isoformat(), a.cost, a.customer.dni, a.car.plate))
+        count += 1
+    return count
+
+
+def write_jsonl(appointments: Iterable[Appointment], out: TextIO) -> int:
+    count = 0
+    for a in appointments:
+        out.write(json.dumps(_record(a), ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+
+# ==========================
+# ICALENDAR
+# ==========================
+def _ics_text(value: str) -> str:
+    return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _ics_line(line: str) -> str:
+    """Pliega la linea en trozos de como mucho 75 octetos (sin partir caracteres UTF-8)"""
+    if len(line.encode("utf-8")) <= ICS_LINE_OCTETS:
+        return line + "\r\n"
+    parts = []
+    current, size = [], 0
+    for char in line:
+        octets = len(char.encode("utf-8"))
+        #Las lineas de continuacion empiezan con un espacio, que tambien cuenta
+        if size + octets > ICS_LINE_OCTETS - (1 if parts else 0):
+            parts.append("".join(current))
+            current, size = [], 0
+        current.append(char)
+        size += octets
+    parts.append("".join(current))
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _ics_stamp(moment: datetime) -> str:
+    return moment.strftime("%Y%m%dT%H%M%S")
+
+
+def write_ics(appointments: Iterable[Appointment], out: TextIO, duration: timedelta = DEFAULT_DURATION) -> int:
+    """Calendario con un evento por cita, en hora local del taller (sin zona horaria)"""
+    stamp = _ics_stamp(datetime.now(timezone.utc)) + "Z"
+    out.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Sistema Taller//Citas//ES\r\nCALSCALE:GREGORIAN\r\n")
+    count = 0
+    for a in appointments:
+        start = datetime.combine(a.date, a.time)
+        summary = f"{a.car.plate} - {a.car.brand} {a.car.model}"
+        description = f"Cliente: {a.customer.name} {a.customer.surname} ({a.customer.dni})\nCoste: {a.cost:.2f} €"
+        out.write("BEGIN:VEVENT\r\n")
+        for line in (
+            f"UID:{a.car.plate}-{_ics_stamp(start)}@taller",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{_ics_stamp(start)}",
+            f"DTEND:{_ics_stamp(start + duration)}",
+            f"SUMMARY:{_ics_text(summary)}",
+            f"DESCRIPTION:{_ics_text(description)}",
+        ):
+            out.write(_ics_line(line))
+        out.write("END:VEVENT\r\n")
+        count += 1
+    out.write("END:VCALENDAR\r\n")
+    return count
+
+
+# formato -> escritor
+FORMATS: Dict[str, Callable[[Iterable[Appointment], TextIO], int]] = {
+    "csv": write_csv,
+    "jsonl": write_jsonl,
+    "ics": write_ics,
+}
+
+
+def export_to_file(appointments: Iterable[Appointment], fmt: str, path: str) -> int:
+    """Escribe las citas en path con el formato dado y devuelve cuantas ha escrito"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato de exportacion desconocido: {fmt}")
+    #newline="": csv e ics escriben sus propios \r\n
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        return FORMATS[fmt](appointments, f)
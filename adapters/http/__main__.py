@@ -0,0 +1,41 @@
+import argparse
+import sys
+
+from adapters.http.api_server import make_server
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m adapters.http", description="API HTTP local del Sistema Taller")
+    parser.add_argument("--data", default="data", help="Carpeta de datos (por defecto: data)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080, help="Puerto (0 = uno libre)")
+    parser.add_argument("--metrics", metavar="PREFIJO", help="Exporta metricas al parar en PREFIJO.json y PREFIJO.prom")
+    parser.add_argument("--quiet", action="store_true", help="No registra cada peticion")
+    args = parser.parse_args(argv)
+
+    from bootstrap import build_services
+    metrics = None
+    if args.metrics:
+        from adapters.instrumentation.metrics import MetricsRegistry
+        metrics = MetricsRegistry()
+        metrics.attach_io()
+
+    #Servidor de larga duracion: cargamos todo al arrancar (instantanea si sigue valida)
+    services = build_services(args.data, metrics, warm_start=True)
+    server = make_server(services, args.host, args.port, quiet=args.quiet)
+    host, port = server.server_address[:2]
+    print(f"🌐 Escuchando en http://{host}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if services.snapshot:
+            services.snapshot.save()
+        if metrics:
+            metrics.export(args.metrics)
+    return 0
+
+
+sys.exit(main())
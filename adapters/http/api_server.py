@@ -0,0 +1,485 @@
+"""
+API HTTP local (JSON) sobre los casos de uso: python -m adapters.http
+
+Adaptador de entrada como la UI de tkinter o la linea de comandos, pensado para
+varios puestos de recepcion o un kiosco de reservas en la red del taller.
+Solo usa la libreria estandar (http.server.ThreadingHTTPServer).
+
+    GET    /customers?offset=0&limit=50        GET    /cars?due_revision=1
+    POST   /customers                           POST   /cars
+    GET    /customers/{dni}                     GET    /cars/{plate}
+    PUT    /customers/{dni}                     PUT    /cars/{plate}
+    DELETE /customers/{dni}                     DELETE /cars/{plate}
+    GET    /customers/{dni}/appointments        GET    /cars/{plate}/appointments
+
+    GET    /appointments?date=YYYY-MM-DD
+    POST   /appointments                        {customer_dni, car_plate, date, time, cost}
+    PUT    /appointments/{plate}/{date}/{time}  {cost}
+    DELETE /appointments/{plate}/{date}/{time}
+
+    GET    /reports/day?date=   /reports/month?month=YYYY-MM   /reports/top?limit=
+    GET    /reports/agenda?date=   /reports/workload?days=
+    GET    /reports/customers/{dni}   /reports/cars/{plate}
+
+Los GET devuelven ETag (hash del cuerpo) y responden 304 a If-None-Match.
+Los listados se paginan con offset/limit y devuelven el total.
+"""
+import hashlib
+import json
+import re
+import threading
+import traceback
+from contextlib import nullcontext
+from datetime import date, time
+from itertools import islice
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Optional, Pattern, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from adapters.cli.taller_cli import (
+    appointment_to_record,
+    car_from_record,
+    car_to_record,
+    customer_from_record,
+    customer_to_record,
+    summary_to_record,
+)
+from core.domain.appointment import Appointment
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+Query = Dict[str, str]
+Response = Tuple[int, Any]
+#Campo del cuerpo -> (comprobacion del valor JSON, lo que se esperaba para el mensaje)
+Fields = Dict[str, Tuple[Callable[[Any], bool], str]]
+
+
+class ApiError(Exception):
+    """Error que se devuelve al cliente con su codigo HTTP"""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _parse(parser: Callable[[str], Any], raw: Optional[str], field: str) -> Any:
+    try:
+        return parser(raw)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"Valor no valido para {field}: {raw}")
+
+
+def _is_text(value: Any) -> bool:
+    return isinstance(value, str)
+
+
+def _is_int(value: Any) -> bool:
+    #En Python True es un int, en JSON no
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_iso(parser: Callable[[str], Any]) -> Callable[[Any], bool]:
+    def check(value: Any) -> bool:
+        if not isinstance(value, str):
+            return False
+        try:
+            parser(value)
+        except ValueError:
+            return False
+        return True
+    return check
+
+
+DATE = (_is_iso(date.fromisoformat), "una fecha YYYY-MM-DD")
+TIME = (_is_iso(time.fromisoformat), "una hora HH:MM")
+TEXT = (_is_text, "un texto")
+
+CUSTOMER_FIELDS: Fields = {
+    "dni": TEXT, "name": TEXT, "surname": TEXT, "birth_date": DATE, "email": TEXT, "phone": TEXT,
+}
+CAR_FIELDS: Fields = {
+    "plate": TEXT, "brand": TEXT, "model": TEXT, "year": (_is_int, "un entero"),
+    "last_revision": (lambda value: value is None or DATE[0](value), "una fecha YYYY-MM-DD o null"),
+}
+APPOINTMENT_FIELDS: Fields = {
+    "customer_dni": TEXT, "car_plate": TEXT, "date": DATE, "time": TIME, "cost": (_is_number, "un numero"),
+}
+COST_FIELDS: Fields = {"cost": APPOINTMENT_FIELDS["cost"]}
+
+
+def _check_fields(body: dict, fields: Fields, optional: Iterable[str] = ()) -> dict:
+    """Comprueba los campos del cuerpo antes de llegar al dominio; cualquier fallo es un 400"""
+    unknown = sorted(set(body) - set(fields))
+    if unknown:
+        raise ApiError(400, f"Campos desconocidos: {', '.join(unknown)}")
+    for field, (check, expected) in fields.items():
+        if field not in body:
+            if field in optional:
+                continue
+            raise ApiError(400, f"Falta el campo {field}")
+        if not check(body[field]):
+            raise ApiError(400, f"Valor no valido para {field}: se esperaba {expected}")
+    return body
+
+
+class TallerApi:
+    """Enrutado de peticiones a los servicios; no depende de http.server"""
+
+    def __init__(self, services: Any, default_limit: int = DEFAULT_LIMIT, max_limit: int = MAX_LIMIT) -> None:
+        self.services = services
+        self.default_limit = default_limit
+        self.max_limit = max_limit
+        #Las lecturas van en paralelo (los repositorios son seguros entre hilos); las
+        #escrituras se serializan porque comprueban y luego escriben (409/404 fiables)
+        self._write_lock = threading.Lock()
+        self._routes: List[Tuple[str, Pattern[str], Callable[..., Response]]] = []
+        for method, pattern, handler in (
+            ("GET", r"/customers", self.list_customers),
+            ("POST", r"/customers", self.create_customer),
+            ("GET", r"/customers/([^/]+)", self.get_customer),
+            ("PUT", r"/customers/([^/]+)", self.update_customer),
+            ("DELETE", r"/customers/([^/]+)", self.delete_customer),
+            ("GET", r"/customers/([^/]+)/appointments", self.customer_appointments),
+            ("GET", r"/cars", self.list_cars),
+            ("POST", r"/cars", self.create_car),
+            ("GET", r"/cars/([^/]+)", self.get_car),
+            ("PUT", r"/cars/([^/]+)", self.update_car),
+            ("DELETE", r"/cars/([^/]+)", self.delete_car),
+            ("GET", r"/cars/([^/]+)/appointments", self.car_appointments),
+            ("GET", r"/appointments", self.list_appointments),
+            ("POST", r"/appointments", self.create_appointment),
+            ("PUT", r"/appointments/([^/]+)/([^/]+)/([^/]+)", self.update_appointment),
+            ("DELETE", r"/appointments/([^/]+)/([^/]+)/([^/]+)", self.delete_appointment),
+            ("GET", r"/reports/(day|month|top|agenda|workload)", self.report),
+            ("GET", r"/reports/(customers|cars)/([^/]+)", self.report_for),
+        ):
+            self._routes.append((method, re.compile(pattern + r"/?"), handler))
+
+    def handle(self, method: str, path: str, query: Query, body: Optional[dict]) -> Response:
+        """Devuelve (codigo, payload) para la peticion; los errores se convierten en ApiError"""
+        allowed = False
+        for route_method, pattern, handler in self._routes:
+            match = pattern.fullmatch(path)
+            if not match:
+                continue
+            if route_method != method:
+                allowed = True
+                continue
+            args = [unquote(g) for g in match.groups()]
+            with nullcontext() if method == "GET" else self._write_lock:
+                try:
+                    return handler(*args, query=query, body=body)
+                except ApiError:
+                    raise
+                except ValueError as ex:
+                    #Los cuerpos ya vienen comprobados: son reglas del dominio
+                    raise ApiError(400, str(ex))
+        if allowed:
+            raise ApiError(405, f"Metodo {method} no permitido en {path}")
+        raise ApiError(404, f"Ruta no encontrada: {path}")
+
+    # ==========================
+    # AUXILIARES
+    # ==========================
+    def _bounds(self, query: Query) -> Tuple[int, int]:
+        offset = _parse(int, query.get("offset", "0"), "offset")
+        limit = _parse(int, query.get("limit", str(self.default_limit)), "limit")
+        if offset < 0 or not 0 < limit <= self.max_limit:
+            raise ApiError(400, f"offset >= 0 y 0 < limit <= {self.max_limit}")
+        return offset, limit
+
+    def _page(self, items: List[Any], query: Query, to_record: Callable[[Any], dict]) -> dict:
+        """Pagina con offset/limit y solo convierte a JSON la pagina pedida"""
+        offset, limit = self._bounds(query)
+        return {
+            "items": [to_record(item) for item in items[offset:offset + limit]],
+            "total": len(items),
+            "offset": offset,
+            "limit": limit,
+        }
+
+    def _stream_page(self, items: Iterable[Any], query: Query, to_record: Callable[[Any], dict]) -> dict:
+        """Como _page sobre un recorrido ya ordenado: no se guarda ni se convierte nada fuera de la pagina"""
+        offset, limit = self._bounds(query)
+        items = iter(items)
+        skipped = sum(1 for _ in islice(items, offset))
+        page = [to_record(item) for item in islice(items, limit)]
+        return {
+            "items": page,
+            "total": skipped + len(page) + sum(1 for _ in items),
+            "offset": offset,
+            "limit": limit,
+        }
+
+    @staticmethod
+    def _require_body(body: Optional[dict], fields: Fields, optional: Iterable[str] = (), **from_path: str) -> dict:
+        """Cuerpo JSON ya comprobado; los campos de la ruta (dni, plate) mandan sobre los del cuerpo"""
+        if not isinstance(body, dict):
+            raise ApiError(400, "Se esperaba un objeto JSON en el cuerpo")
+        return _check_fields({**body, **from_path}, fields, optional)
+
+    def _appointments_page(self, appointments: List[Appointment], query: Query) -> Response:
+        appointments = sorted(appointments, key=lambda a: (a.date, a.time))
+        return 200, self._page(appointments, query, appointment_to_record)
+
+    def _find_appointment(self, plate: str, raw_date: str, raw_time: str) -> Appointment:
+        date_ = _parse(date.fromisoformat, raw_date, "date")
+        time_ = _parse(time.fromisoformat, raw_time, "time")
+        for appointment in self.services.list_appointments.execute(date_):
+            if appointment.car.plate == plate.upper() and appointment.time == time_:
+                return appointment
+        raise ApiError(404, f"No existe ninguna cita de {plate} el {raw_date} a las {raw_time}")
+
+    # ==========================
+    # CLIENTES
+    # ==========================
+    def list_customers(self, query: Query, body: Optional[dict]) -> Response:
+        return 200, self._page(self.services.list_customers.execute(), query, customer_to_record)
+
+    def create_customer(self, query: Query, body: Optional[dict]) -> Response:
+        customer = customer_from_record(self._require_body(body, CUSTOMER_FIELDS))
+        try:
+            self.services.register_customer.execute(customer)
+        except ValueError as ex:
+            raise ApiError(409, str(ex))
+        return 201, customer_to_record(customer)
+
+    def get_customer(self, dni: str, query: Query, body: Optional[dict]) -> Response:
+        customer = self.services.get_customer.execute(dni)
+        if customer is None:
+            raise ApiError(404, f"No existe ningún cliente con el DNI {dni}")
+        return 200, customer_to_record(customer)
+
+    def update_customer(self, dni: str, query: Query, body: Optional[dict]) -> Response:
+        customer = customer_from_record(self._require_body(body, CUSTOMER_FIELDS, dni=dni))
+        try:
+            self.services.update_customer.execute(customer)
+        except ValueError as ex:
+            raise ApiError(404, str(ex))
+        return 200, customer_to_record(customer)
+
+    def delete_customer(self, dni: str, query: Query, body: Optional[dict]) -> Response:
+        if self.services.get_customer.execute(dni) is None:
+            raise ApiError(404, f"No existe ningún cliente con el DNI {dni}")
+        self.services.delete_customer.execute(dni)
+        return 204, None
+
+    def customer_appointments(self, dni: str, query: Query, body: Optional[dict]) -> Response:
+        return self._appointments_page(self.services.list_appointments_by_customer.execute(dni), query)
+
+    # ==========================
+    # COCHES
+    # ==========================
+    def list_cars(self, query: Query, body: Optional[dict]) -> Response:
+        due = query.get("due_revision") in ("1", "true")
+        source = self.services.list_cars_due_revision if due else self.services.list_cars
+        return 200, self._page(source.execute(), query, car_to_record)
+
+    def create_car(self, query: Query, body: Optional[dict]) -> Response:
+        car = car_from_record(self._require_body(body, CAR_FIELDS, ("last_revision",)))
+        try:
+            self.services.register_car.execute(car)
+        except ValueError as ex:
+            raise ApiError(409, str(ex))
+        return 201, car_to_record(car)
+
+    def get_car(self, plate: str, query: Query, body: Optional[dict]) -> Response:
+        car = self.services.get_car.execute(plate)
+        if car is None:
+            raise ApiError(404, f"No existe ningún coche con la matricula {plate}")
+        return 200, car_to_record(car)
+
+    def update_car(self, plate: str, query: Query, body: Optional[dict]) -> Response:
+        car = car_from_record(self._require_body(body, CAR_FIELDS, ("last_revision",), plate=plate))
+        try:
+            self.services.update_car.execute(car)
+        except ValueError as ex:
+            raise ApiError(404, str(ex))
+        return 200, car_to_record(car)
+
+    def delete_car(self, plate: str, query: Query, body: Optional[dict]) -> Response:
+        if self.services.get_car.execute(plate) is None:
+            raise ApiError(404, f"No existe ningún coche con la matricula {plate}")
+        self.services.delete_car.execute(plate)
+        return 204, None
+
+    def car_appointments(self, plate: str, query: Query, body: Optional[dict]) -> Response:
+        return self._appointments_page(self.services.list_appointments_by_car.execute(plate), query)
+
+    # ==========================
+    # CITAS
+    # ==========================
+    def list_appointments(self, query: Query, body: Optional[dict]) -> Response:
+        if "date" in query:
+            date_ = _parse(date.fromisoformat, query["date"], "date")
+            return self._appointments_page(self.services.list_appointments.execute(date_), query)
+        #Sin fecha el recorrido ya sale en orden: ni se carga ni se ordena todo el almacen
+        return 200, self._stream_page(self.services.export_appointments.execute(), query, appointment_to_record)
+
+    def create_appointment(self, query: Query, body: Optional[dict]) -> Response:
+        body = self._require_body(body, APPOINTMENT_FIELDS)
+        appointment = self.services.schedule_appointment.execute(
+            body["customer_dni"],
+            body["car_plate"],
+            date.fromisoformat(body["date"]),
+            time.fromisoformat(body["time"]),
+            float(body["cost"]),
+        )
+        return 201, appointment_to_record(appointment)
+
+    def update_appointment(self, plate: str, raw_date: str, raw_time: str, query: Query, body: Optional[dict]) -> Response:
+        stored = self._find_appointment(plate, raw_date, raw_time)
+        cost = float(self._require_body(body, COST_FIELDS)["cost"])
+        appointment = Appointment(customer=stored.customer, car=stored.car, date=stored.date, time=stored.time, cost=cost)
+        self.services.update_appointment.execute(appointment)
+        return 200, appointment_to_record(appointment)
+
+    def delete_appointment(self, plate: str, raw_date: str, raw_time: str, query: Query, body: Optional[dict]) -> Response:
+        self.services.delete_appointment.execute(self._find_appointment(plate, raw_date, raw_time))
+        return 204, None
+
+    # ==========================
+    # INFORMES
+    # ==========================
+    def report(self, kind: str, query: Query, body: Optional[dict]) -> Response:
+        today = date.today()
+        day = _parse(date.fromisoformat, query["date"], "date") if "date" in query else today
+        if kind == "day":
+            return 200, summary_to_record(self.services.get_daily_revenue.execute(day), date=day.isoformat())
+        if kind == "month":
+            raw = query.get("month", f"{today.year:04d}-{today.month:02d}")
+            year, month = _parse(lambda r: tuple(map(int, r.split("-"))), raw, "month")
+            return 200, summary_to_record(self.services.get_monthly_revenue.execute(year, month), month=raw)
+        if kind == "top":
+            limit = _parse(int, query.get("limit", "5"), "limit")
+            return 200, [summary_to_record(s, dni=dni) for dni, s in self.services.get_top_customers.execute(limit)]
+        if kind == "workload":
+            days = _parse(int, query.get("days", "7"), "days")
+            return 200, [summary_to_record(s, date=d.isoformat()) for d, s in self.services.get_workload.execute(day, days)]
+        return 200, [
+            {"time": e.time.isoformat(), "customer_dni": e.customer_dni, "car_plate": e.car_plate, "cost": e.cost}
+            for e in self.services.get_agenda.execute(day)
+        ]
+
+    def report_for(self, kind: str, key: str, query: Query, body: Optional[dict]) -> Response:
+        if kind == "customers":
+            return 200, summary_to_record(self.services.get_customer_value.execute(key), dni=key.upper())
+        return 200, summary_to_record(self.services.get_car_spend.execute(key), plate=key.upper())
+
+
+# ==========================
+# SERVIDOR
+# ==========================
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Comparacion debil de If-None-Match (admite lista, W/ y *)"""
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in ("*", etag):
+            return True
+    return False
+
+
+class TallerRequestHandler(BaseHTTPRequestHandler):
+    """Traduce HTTP <-> TallerApi: cuerpo JSON, ETag y GET condicional"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "TallerHTTP/1.0"
+    #Cabeceras y cuerpo salen en dos escrituras: sin esto Nagle + ACK retardado suman ~40 ms
+    disable_nagle_algorithm = True
+    api: TallerApi
+    quiet = False
+
+    def _dispatch(self, method: str) -> None:
+        url = urlsplit(self.path)
+        query = dict(parse_qsl(url.query))
+        try:
+            body = self._read_body()
+            status, payload = self.api.handle(method, url.path, query, body)
+        except ApiError as ex:
+            status, payload = ex.status, {"error": str(ex)}
+        except Exception:
+            #Un fallo inesperado no tira la conexion: el cliente recibe un 500 y el detalle va al log
+            self.log_error("Error interno en %s %s", method, self.path)
+            traceback.print_exc()
+            status, payload = 500, {"error": "Error interno del servidor"}
+
+        data = b"" if status == 204 else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        headers = {}
+        if method == "GET" and status == 200:
+            etag = headers["ETag"] = etag_for(data)
+            #El cliente revalida siempre; si nada ha cambiado solo viaja la cabecera
+            headers["Cache-Control"] = "no-cache"
+            if etag_matches(self.headers.get("If-None-Match"), etag):
+                status, data = 304, b""
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status not in (204, 304):
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if data:
+            self.wfile.write(data)
+
+    def _read_body(self) -> Optional[dict]:
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            #Sin saber donde acaba el cuerpo no se puede seguir leyendo la conexion
+            self.close_connection = True
+            raise ApiError(400, "Content-Length no valido")
+        if not length:
+            return None
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            raise ApiError(400, "El cuerpo no es JSON valido")
+
+    def do_GET(self) -> None:
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:
+        self._dispatch("POST")
+
+    def do_PUT(self) -> None:
+        self._dispatch("PUT")
+
+    def do_DELETE(self) -> None:
+        self._dispatch("DELETE")
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def log_error(self, format: str, *args: Any) -> None:
+        #Los errores se registran aunque se haya pedido --quiet
+        super().log_message(format, *args)
+
+
+class TallerHTTPServer(ThreadingHTTPServer):
+    """Un hilo por conexion; cola de escucha amplia para muchos puestos a la vez"""
+
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def make_server(services: Any, host: str = "127.0.0.1", port: int = 8080, quiet: bool = False) -> TallerHTTPServer:
+    """Crea el servidor ya enlazado a host:port"""
+    handler = type("BoundTallerRequestHandler", (TallerRequestHandler,), {"api": TallerApi(services), "quiet": quiet})
+    return TallerHTTPServer((host, port), handler)
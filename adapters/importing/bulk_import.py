@@ -0,0 +1,213 @@
+"""
+Importacion masiva de clientes y coches desde CSV, JSON-lines o un array JSON.
+
+Pensada para dar de alta un taller con decenas de miles de fichas. Registrar fila
+a fila cuesta una lectura y una reescritura completa del fichero por fila (O(N²));
+aqui el coste es una escritura por trozo:
+
+  1. Lectura en trozos de chunk_size filas (CSV y JSON-lines en streaming).
+  2. Validacion de cada trozo en un pool de procesos con las mismas reglas de
+     Customer/Car (__post_init__), mientras se escriben los trozos anteriores.
+  3. Deduplicado contra un indice hash de claves (DNI o matricula): las ya
+     guardadas y las que aparecen antes en el mismo fichero.
+  4. Un solo add_many por trozo.
+  5. Informe de filas rechazadas con su numero de fila y el motivo.
+"""
+import csv
+import json
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from itertools import chain, islice
+from operator import attrgetter
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.domain.car import Car
+from core.domain.customer import Customer
+
+DEFAULT_CHUNK_SIZE = 5000
+# Trozos en vuelo por proceso: los procesos no esperan a que se escriba el anterior
+IN_FLIGHT_PER_WORKER = 2
+
+# (numero de fila en el fichero, registro crudo)
+Row = Tuple[int, Any]
+
+
+@dataclass
+class RejectedRow:
+    """Fila descartada: numero de fila, clave (si se pudo leer) y motivo"""
+
+    line: int
+    key: str
+    reason: str
+
+
+@dataclass
+class ImportReport:
+    """Resultado de una importacion"""
+
+    imported: int = 0
+    chunks: int = 0
+    rejected: List[RejectedRow] = field(default_factory=list)
+
+    def write_csv(self, path: str) -> None:
+        """Guarda las filas rechazadas como CSV (line, key, reason)"""
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["line", "key", "reason"])
+            for row in self.rejected:
+                writer.writerow([row.line, row.key, row.reason])
+
+
+# ==========================
+# LECTURA
+# ==========================
+def iter_rows(path: str) -> Iterator[Row]:
+    """Filas de un CSV con cabecera, un JSON-lines o un array JSON (este ultimo se carga entero)"""
+    if path.lower().endswith(".csv"):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == "[":
+            yield from enumerate(json.load(f), start=1)
+            return
+        for line_no, line in enumerate(f, start=1):
+            if line.strip():
+                try:
+                    yield line_no, json.loads(line)
+                except json.JSONDecodeError as ex:
+                    #La fila mala se rechaza en la validacion, el resto del fichero sigue
+                    yield line_no, ex
+
+
+def _optional_date(raw: Any) -> Optional[date]:
+    return date.fromisoformat(raw) if raw else None
+
+
+def customer_from_row(row: dict) -> Customer:
+    return Customer(dni=row["dni"], name=row["name"], surname=row["surname"],
+                    birth_date=date.fromisoformat(row["birth_date"]), email=row["email"], phone=str(row["phone"]))
+
+
+def car_from_row(row: dict) -> Car:
+    #En CSV todo llega como texto: el año se convierte aqui y no en el dominio
+    return Car(plate=row["plate"], brand=row["brand"], model=row["model"], year=int(row["year"]),
+               last_revision=_optional_date(row.get("last_revision")))
+
+
+# entidad -> (conversor, campo clave)
+ENTITIES: Dict[str, Tuple[Callable[[dict], Any], str]] = {
+    "customers": (customer_from_row, "dni"),
+    "cars": (car_from_row, "plate"),
+}
+
+
+# ==========================
+# VALIDACION (en los procesos del pool)
+# ==========================
+def validate_chunk(entity: str, rows: List[Row]) -> Tuple[List[Tuple[int, Any]], List[RejectedRow]]:
+    """Convierte y valida un trozo; devuelve (validas, rechazadas) en el orden del fichero"""
+    convert, key_field = ENTITIES[entity]
+    valid: List[Tuple[int, Any]] = []
+    rejected: List[RejectedRow] = []
+    for line, row in rows:
+        if isinstance(row, json.JSONDecodeError):
+            rejected.append(RejectedRow(line, "", f"JSON no valido: {row.msg}"))
+            continue
+        if not isinstance(row, dict):
+            rejected.append(RejectedRow(line, "", "La fila no es un objeto"))
+            continue
+        key = str(row.get(key_field) or "").strip().upper()
+        try:
+            valid.append((line, convert(row)))
+        except KeyError as ex:
+            rejected.append(RejectedRow(line, key, f"Falta el campo {ex}"))
+        except (TypeError, ValueError, AttributeError) as ex:
+            rejected.append(RejectedRow(line, key, str(ex)))
+    return valid, rejected
+
+
+def _chunks(rows: Iterable[Row], size: int) -> Iterator[List[Row]]:
+    it = iter(rows)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ==========================
+# IMPORTADOR
+# ==========================
+class BulkImporter:
+    """
+    Importa clientes o coches en el repositorio dado (CustomerRepository o
+    CarRepository: usa list_all y add_many). workers=1 valida en este proceso.
+    """
+
+    def __init__(self, repo: Any, entity: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 workers: Optional[int] = None) -> None:
+        if entity not in ENTITIES:
+            raise ValueError(f"Entidad desconocida: {entity}")
+        if chunk_size <= 0:
+            raise ValueError("El tamaño de trozo tiene que ser positivo")
+        self._repo = repo
+        self._entity = entity
+        self._chunk_size = chunk_size
+        self._workers = workers or os.cpu_count() or 1
+
+    def run(self, path: str) -> ImportReport:
+        report = ImportReport()
+        key_of = attrgetter(ENTITIES[self._entity][1])
+        #Indice hash clave -> fila donde aparecio (0: ya estaba guardada)
+        seen: Dict[str, int] = {key_of(item): 0 for item in self._repo.list_all()}
+
+        for valid, rejected in self._validated(_chunks(iter_rows(path), self._chunk_size)):
+            report.rejected.extend(rejected)
+            fresh = []
+            for line, item in valid:
+                key = key_of(item)
+                first = seen.setdefault(key, line)
+                if first == line:
+                    fresh.append(item)
+                elif first == 0:
+                    report.rejected.append(RejectedRow(line, key, "Ya existe en el almacen"))
+                else:
+                    report.rejected.append(RejectedRow(line, key, f"Repetido: ya aparece en la fila {first}"))
+            if fresh:
+                self._repo.add_many(fresh)
+                report.imported += len(fresh)
+            report.chunks += 1
+
+        report.rejected.sort(key=attrgetter("line"))
+        return report
+
+    def _validated(self, chunks: Iterator[List[Row]]) -> Iterator[Tuple[List[Tuple[int, Any]], List[RejectedRow]]]:
+        """Resultados de validar cada trozo, en orden; el pool solo se arranca si hay mas de uno"""
+        first = next(chunks, None)
+        second = next(chunks, None)
+        ordered = chain([first] if first else [], [second] if second else [], chunks)
+        if second is None or self._workers <= 1:
+            for chunk in ordered:
+                yield validate_chunk(self._entity, chunk)
+            return
+
+        with ProcessPoolExecutor(max_workers=self._workers) as pool:
+            pending: Deque[Future] = deque()
+            limit = self._workers * IN_FLIGHT_PER_WORKER
+            for chunk in ordered:
+                #Lectura acotada: no hay mas de limit trozos validandose a la vez
+                if len(pending) >= limit:
+                    yield pending.popleft().result()
+                pending.append(pool.submit(validate_chunk, self._entity, chunk))
+            while pending:
+                yield pending.popleft().result()
@@ -0,0 +1,183 @@
+"""
+Instrumentacion opcional de servicios y repositorios.
+
+instrument() envuelve cualquier objeto (servicio o repositorio) en un proxy que
+expone los mismos metodos publicos, asi que sigue cumpliendo el mismo Protocol.
+Cada llamada registra numero de llamadas, errores e histograma de latencia, y
+las lecturas/escrituras de fichero que ocurren durante la llamada se atribuyen
+a todas las operaciones activas (un servicio acumula la E/S de sus repositorios).
+"""
+import json
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Tuple
+
+from adapters.persistence.json_base import add_io_observer, remove_io_observer
+
+# Limites superiores (segundos) de los buckets del histograma de latencia
+LATENCY_BUCKETS: Tuple[float, ...] = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class OperationStats:
+    """Contadores de una operacion (p.ej. CustomerRepository.get_by_dni)"""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.latency_sum = 0.0
+        # Un bucket por limite mas el de +Inf
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.file_opens = 0
+
+    def observe(self, seconds: float, failed: bool) -> None:
+        self.calls += 1
+        self.errors += int(failed)
+        self.latency_sum += seconds
+        self.latency_buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "latency_sum_seconds": self.latency_sum,
+            "latency_buckets": dict(zip([str(b) for b in LATENCY_BUCKETS] + ["+Inf"], self.latency_buckets)),
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "file_opens": self.file_opens,
+        }
+
+
+class MetricsRegistry:
+    """Registro de metricas por operacion, seguro entre hilos"""
+
+    def __init__(self) -> None:
+        self._ops: Dict[str, OperationStats] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    # ==========================
+    # REGISTRO
+    # ==========================
+    def _active(self) -> List[str]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _stats(self, operation: str) -> OperationStats:
+        stats = self._ops.get(operation)
+        if stats is None:
+            stats = self._ops[operation] = OperationStats()
+        return stats
+
+    def timed(self, operation: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Ejecuta fn midiendo su latencia y atribuyendole la E/S que provoque"""
+        stack = self._active()
+        stack.append(operation)
+        failed = False
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            with self._lock:
+                self._stats(operation).observe(elapsed, failed)
+
+    def record_io(self, kind: str, path: str, nbytes: int) -> None:
+        """Observador de E/S de JsonRepositoryBase"""
+        with self._lock:
+            for operation in set(self._active()):
+                stats = self._stats(operation)
+                stats.file_opens += 1
+                if kind == "read":
+                    stats.bytes_read += nbytes
+                else:
+                    stats.bytes_written += nbytes
+
+    def attach_io(self) -> None:
+        """Empieza a recibir la E/S de los repositorios JSON"""
+        add_io_observer(self.record_io)
+
+    def detach_io(self) -> None:
+        remove_io_observer(self.record_io)
+
+    # ==========================
+    # EXPORTACION
+    # ==========================
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in sorted(self._ops.items())}
+
+    def to_prometheus(self) -> str:
+        """Metricas en formato de texto de Prometheus"""
+        snap = self.snapshot()
+        lines: List[str] = []
+
+        def counter(metric: str, help_text: str, field: str) -> None:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for op, data in snap.items():
+                lines.append(f'{metric}{{operation="{op}"}} {data[field]}')
+
+        counter("taller_operation_calls_total", "Llamadas por operacion", "calls")
+        counter("taller_operation_errors_total", "Llamadas que lanzaron excepcion", "errors")
+        counter("taller_operation_bytes_read_total", "Bytes leidos de disco", "bytes_read")
+        counter("taller_operation_bytes_written_total", "Bytes escritos en disco", "bytes_written")
+        counter("taller_operation_file_opens_total", "Ficheros abiertos (lecturas y escrituras completas)", "file_opens")
+
+        metric = "taller_operation_latency_seconds"
+        lines.append(f"# HELP {metric} Latencia por operacion")
+        lines.append(f"# TYPE {metric} histogram")
+        for op, data in snap.items():
+            cumulative = 0
+            for le, count in data["latency_buckets"].items():
+                cumulative += count
+                lines.append(f'{metric}_bucket{{operation="{op}",le="{le}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{operation="{op}"}} {data["latency_sum_seconds"]}')
+            lines.append(f'{metric}_count{{operation="{op}"}} {data["calls"]}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path_prefix: str) -> None:
+        """Escribe <prefijo>.json (snapshot) y <prefijo>.prom (Prometheus)"""
+        with open(path_prefix + ".json", "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=4)
+        with open(path_prefix + ".prom", "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+
+
+class InstrumentedProxy:
+    """Proxy transparente: mismos metodos publicos que el objeto envuelto, pero medidos"""
+
+    def __init__(self, target: Any, name: str, registry: MetricsRegistry) -> None:
+        self._target = target
+        self._name = name
+        self._registry = registry
+
+    def __getattr__(self, attr: str) -> Any:
+        value = getattr(self._target, attr)
+        if attr.startswith("_") or not callable(value):
+            return value
+        operation = f"{self._name}.{attr}"
+        registry = self._registry
+
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            return registry.timed(operation, value, *args, **kwargs)
+
+        wrapper.__name__ = attr
+        wrapper.__doc__ = getattr(value, "__doc__", None)
+        return wrapper
+
+    def __repr__(self) -> str:
+        return f"InstrumentedProxy({self._name}, {self._target!r})"
+
+
+def instrument(target: Any, name: str, registry: MetricsRegistry) -> Any:
+    """Envuelve un servicio o repositorio; el resultado cumple el mismo Protocol"""
+    return InstrumentedProxy(target, name, registry)
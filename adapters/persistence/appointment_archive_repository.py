@@ -0,0 +1,323 @@
+"""
+Archivo historico de citas en segmentos comprimidos de solo lectura.
+
+<archivo>/appointments-AAAA-MM.<n>.jsonl.gz
+    segmento: las citas de un mes (mismas filas que appointments.json, una por linea)
+    ordenadas por fecha y hora, en bloques de BLOCK_ROWS filas comprimidos cada uno
+    por separado. Los bloques seguidos siguen siendo un .jsonl.gz valido (zcat lo
+    lee entero). Cada ejecucion del archivado escribe segmentos nuevos (n = 1, 2, ...)
+    y nunca modifica los que ya existen.
+<archivo>/appointments-AAAA-MM.<n>.idx.json
+    indice del segmento: posicion, tamaño y dias de cada bloque, y DNI/matricula ->
+    posiciones de sus filas. Se escribe despues del segmento, asi que un segmento sin
+    indice (archivado cortado a medias) no existe para las lecturas.
+
+Las consultas solo miran los indices (pequeños y siempre en memoria) y descomprimen
+unicamente los bloques con el cliente, el coche o los dias buscados. Los ultimos
+bloques leidos se guardan ya convertidos en una cache LRU.
+"""
+import heapq
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from itertools import groupby
+from typing import IO, TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from adapters.persistence.appointment_json_repository import AppointmentRow, hydrate_rows, rows_from_dicts
+from adapters.persistence.file_compression import make_compression
+from adapters.persistence.file_lock import FileLock
+from adapters.persistence.json_base import _notify_io
+from adapters.persistence.json_codec import JsonCodec, default_codec_name, make_codec
+
+from core.domain.appointment import Appointment
+from core.domain.car import Car
+from core.domain.customer import Customer
+from core.ports.car_repository import CarRepository
+from core.ports.customer_repository import CustomerRepository
+
+if TYPE_CHECKING:
+    from adapters.analytics.appointment_columns import AppointmentColumns
+
+SEGMENT_PREFIX = "appointments-"
+INDEX_SUFFIX = ".idx.json"
+# Filas por bloque comprimido: lo minimo que se descomprime para leer una cita
+BLOCK_ROWS = 64
+# Bloques ya descomprimidos que se guardan en memoria
+DEFAULT_CACHED_BLOCKS = 512
+# Columnas de una fila compacta
+DATE, TIME = 0, 1
+
+
+class SegmentIndex:
+    """Indice de un segmento: su fichero, bloques y clave -> posiciones de fila"""
+
+    __slots__ = ("path", "rows", "block_rows", "first", "last", "blocks", "customers", "cars")
+
+    def __init__(self, path: str, raw: dict) -> None:
+        self.path = path
+        self.rows: int = raw["rows"]
+        self.block_rows: int = raw["block_rows"]
+        self.first = date.fromisoformat(raw["first"])
+        self.last = date.fromisoformat(raw["last"])
+        # (offset, bytes, primer dia, ultimo dia) de cada bloque
+        self.blocks: List[Tuple[int, int, date, date]] = [
+            (offset, size, date.fromisoformat(first), date.fromisoformat(last))
+            for offset, size, first, last in raw["blocks"]
+        ]
+        self.customers: Dict[str, List[int]] = raw["customers"]
+        self.cars: Dict[str, List[int]] = raw["cars"]
+
+    def covers(self, start: Optional[date], end: Optional[date]) -> bool:
+        return (start is None or self.last >= start) and (end is None or self.first <= end)
+
+    def blocks_between(self, start: Optional[date], end: Optional[date]) -> List[int]:
+        return [
+            b for b, (_, _, first, last) in enumerate(self.blocks)
+            if (start is None or last >= start) and (end is None or first <= end)
+        ]
+
+
+def _by_moment(row: AppointmentRow) -> Tuple[date, object]:
+    return (row[DATE], row[TIME])
+
+
+def _day(row: AppointmentRow) -> date:
+    return row[DATE]
+
+
+class AppointmentArchiveJsonRepository:
+    """AppointmentArchiveRepository sobre segmentos JSON-lines comprimidos (ver el docstring del modulo)"""
+
+    def __init__(self, archive_dir: str, customer_repo: CustomerRepository, car_repo: CarRepository,
+                 codec: Optional[JsonCodec] = None, compression: str = "gzip",
+                 cached_blocks: int = DEFAULT_CACHED_BLOCKS) -> None:
+        self._dir = archive_dir
+        self._customer_repo = customer_repo
+        self._car_repo = car_repo
+        #Una fila por linea: el archivo se escribe siempre sin indentar (y "auto" elige el mas rapido)
+        self._codec = make_codec(codec.name if codec else default_codec_name(), compact=True)
+        self._compression = make_compression(compression)
+        self._cached_blocks = cached_blocks
+        #Los segmentos no cambian nunca: sus indices se leen una vez y se guardan por nombre
+        self._indexes: Dict[str, SegmentIndex] = {}
+        self._listing: List[SegmentIndex] = []
+        self._listing_key: Optional[Tuple[int, int]] = None
+        self._blocks: "OrderedDict[Tuple[str, int], List[AppointmentRow]]" = OrderedDict()
+        self._mutex = threading.Lock()
+        #Instantanea columnar del ultimo listado de segmentos (el archivo solo crece)
+        self._columns: Optional[Tuple[List[SegmentIndex], "AppointmentColumns"]] = None
+
+    # ==========================
+    # SEGMENTOS Y BLOQUES
+    # ==========================
+    def _segments(self) -> List[SegmentIndex]:
+        """Indices de todos los segmentos, por primer dia; se relistan solo si cambia la carpeta"""
+        try:
+            st = os.stat(self._dir)
+        except FileNotFoundError:
+            return []
+        key = (st.st_mtime_ns, st.st_ino)
+        with self._mutex:
+            if key == self._listing_key:
+                return self._listing
+            for name in os.listdir(self._dir):
+                if name.startswith(SEGMENT_PREFIX) and name.endswith(INDEX_SUFFIX) and name not in self._indexes:
+                    with open(os.path.join(self._dir, name), "rb") as f:
+                        raw = self._codec.loads(f.read())
+                    self._indexes[name] = SegmentIndex(os.path.join(self._dir, raw["segment"]), raw)
+            self._listing = sorted(self._indexes.values(), key=lambda s: (s.first, s.path))
+            self._listing_key = key
+            return self._listing
+
+    def _block(self, segment: SegmentIndex, block: int, cache: bool = True) -> List[AppointmentRow]:
+        """Filas compactas de un bloque; los recorridos completos (cache=False) no desplazan la cache"""
+        with self._mutex:
+            rows = self._blocks.get((segment.path, block))
+            if rows is not None:
+                self._blocks.move_to_end((segment.path, block))
+                return rows
+        offset, size, _, _ = segment.blocks[block]
+        with open(segment.path, "rb") as f:
+            f.seek(offset)
+            compressed = f.read(size)
+        _notify_io("read", segment.path, size)
+        lines = self._compression.decompress(compressed).rstrip(b"\n")
+        rows = rows_from_dicts(self._codec.loads(b"[" + lines.replace(b"\n", b",") + b"]"))
+        if cache:
+            with self._mutex:
+                self._blocks[(segment.path, block)] = rows
+                while len(self._blocks) > self._cached_blocks:
+                    self._blocks.popitem(last=False)
+        return rows
+
+    def _rows_at(self, segment: SegmentIndex, positions: Iterable[int]) -> List[AppointmentRow]:
+        """Filas en esas posiciones del segmento, leyendo cada bloque implicado una sola vez"""
+        found: List[AppointmentRow] = []
+        for block, in_block in groupby(positions, key=lambda p: p // segment.block_rows):
+            rows = self._block(segment, block)
+            found.extend(rows[p % segment.block_rows] for p in in_block)
+        return found
+
+    def _scan(self, segment: SegmentIndex, start: Optional[date] = None, end: Optional[date] = None,
+              cache: bool = False) -> Iterator[AppointmentRow]:
+        """Filas del segmento entre start y end, bloque a bloque y en orden"""
+        for block in segment.blocks_between(start, end):
+            for row in self._block(segment, block, cache):
+                if (start is None or row[DATE] >= start) and (end is None or row[DATE] <= end):
+                    yield row
+
+    def _hydrate(self, rows: Iterable[AppointmentRow], customers: Optional[Dict[str, Customer]] = None,
+                 cars: Optional[Dict[str, Car]] = None) -> List[Appointment]:
+        return hydrate_rows(rows, self._customer_repo, self._car_repo, customers, cars)
+
+    # ==========================
+    # LECTURA
+    # ==========================
+    def newest_date(self) -> Optional[date]:
+        segments = self._segments()
+        return max(s.last for s in segments) if segments else None
+
+    def contains(self, appointment: Appointment) -> bool:
+        for segment in self._segments():
+            positions = segment.cars.get(appointment.car.plate)
+            if positions and segment.first <= appointment.date <= segment.last:
+                if any(row[DATE] == appointment.date and row[TIME] == appointment.time
+                       for row in self._rows_at(segment, positions)):
+                    return True
+        return False
+
+    def list_all(self) -> List[Appointment]:
+        customers: Dict[str, Customer] = {}
+        cars: Dict[str, Car] = {}
+        result: List[Appointment] = []
+        for segment in self._segments():
+            result.extend(self._hydrate(self._scan(segment), customers, cars))
+        return result
+
+    def export_columns(self) -> "AppointmentColumns":
+        """Instantanea columnar de todo el archivo; se reutiliza mientras no haya segmentos nuevos"""
+        from adapters.analytics.appointment_columns import AppointmentColumns
+        segments = self._segments()
+        cached = self._columns
+        if cached is not None and cached[0] is segments:
+            return cached[1]
+        columns = AppointmentColumns.from_rows([row for segment in segments for row in self._scan(segment)])
+        self._columns = (segments, columns)
+        return columns
+
+    def find_by_date(self, date_: date) -> List[Appointment]:
+        found: List[AppointmentRow] = []
+        for segment in self._segments():
+            if segment.first <= date_ <= segment.last:
+                found.extend(self._scan(segment, date_, date_, cache=True))
+        return self._hydrate(found)
+
+    def find_by_customer(self, dni: str) -> List[Appointment]:
+        found: List[AppointmentRow] = []
+        for segment in self._segments():
+            positions = segment.customers.get(dni)
+            if positions:
+                found.extend(self._rows_at(segment, positions))
+        return self._hydrate(found)
+
+    def find_by_car(self, plate: str) -> List[Appointment]:
+        found: List[AppointmentRow] = []
+        for segment in self._segments():
+            positions = segment.cars.get(plate)
+            if positions:
+                found.extend(self._rows_at(segment, positions))
+        return self._hydrate(found)
+
+    def iter_range(self, start: Optional[date] = None, end: Optional[date] = None, dni: Optional[str] = None) -> Iterator[Appointment]:
+        """Recorre en orden de fecha y hora, bloque a bloque (los segmentos que se solapan se mezclan)"""
+        def segment_rows(segment: SegmentIndex) -> Iterable[AppointmentRow]:
+            if dni is None:
+                return self._scan(segment, start, end)
+            return [
+                row for row in self._rows_at(segment, segment.customers[dni])
+                if (start is None or row[DATE] >= start) and (end is None or row[DATE] <= end)
+            ]
+
+        customers: Dict[str, Customer] = {}
+        cars: Dict[str, Car] = {}
+        pending = [s for s in self._segments() if s.covers(start, end) and (dni is None or dni in s.customers)]
+        while pending:
+            #Segmentos que se solapan con el primero (mismos dias): se recorren juntos
+            group = [pending.pop(0)]
+            last = group[0].last
+            while pending and pending[0].first <= last:
+                group.append(pending.pop(0))
+                last = max(last, group[-1].last)
+            merged = heapq.merge(*(segment_rows(s) for s in group), key=_by_moment)
+            #Se hidrata dia a dia para no tener el grupo entero en memoria
+            for _, day_rows in groupby(merged, key=_day):
+                yield from self._hydrate(day_rows, customers, cars)
+
+    # ==========================
+    # ESCRITURA
+    # ==========================
+    def _write_atomic(self, path: str, write: Callable[[IO[bytes]], None]) -> None:
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                write(f)
+                f.flush()
+                os.fsync(f.fileno())
+                size = f.tell()
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        _notify_io("write", path, size)
+
+    def _next_name(self, month: str) -> str:
+        """Nombre libre para un segmento nuevo del mes (AAAA-MM), sin extensiones"""
+        taken = [name for name in os.listdir(self._dir) if name.startswith(f"{SEGMENT_PREFIX}{month}.")]
+        n = 1
+        while any(name.startswith(f"{SEGMENT_PREFIX}{month}.{n}.") for name in taken):
+            n += 1
+        return f"{SEGMENT_PREFIX}{month}.{n}"
+
+    def append(self, appointments: List[Appointment]) -> int:
+        """Un segmento nuevo por mes con las citas dadas; los segmentos existentes no se tocan"""
+        if not appointments:
+            return 0
+        os.makedirs(self._dir, exist_ok=True)
+        ordered = sorted(appointments, key=lambda a: (a.date, a.time))
+        lock = FileLock(os.path.join(self._dir, ".lock"))
+        try:
+            with lock:
+                for month, group in groupby(ordered, key=lambda a: a.date.strftime("%Y-%m")):
+                    self._write_segment(self._next_name(month), list(group))
+        finally:
+            lock.close()
+        return len(ordered)
+
+    def _write_segment(self, name: str, appointments: List[Appointment]) -> None:
+        segment = name + ".jsonl" + self._compression.extension
+        customers: Dict[str, List[int]] = {}
+        cars: Dict[str, List[int]] = {}
+        for position, a in enumerate(appointments):
+            customers.setdefault(a.customer.dni, []).append(position)
+            cars.setdefault(a.car.plate, []).append(position)
+        blocks: List[list] = []
+
+        def write(f: IO[bytes]) -> None:
+            for start in range(0, len(appointments), BLOCK_ROWS):
+                chunk = appointments[start:start + BLOCK_ROWS]
+                payload = b"".join(
+                    self._codec.dumps({"date": a.date.isoformat(), "time": a.time.isoformat(), "cost": a.cost,
+                                       "customer_dni": a.customer.dni, "car_plate": a.car.plate}) + b"\n"
+                    for a in chunk
+                )
+                offset = f.tell()
+                self._compression.write(f, payload)
+                blocks.append([offset, f.tell() - offset, chunk[0].date.isoformat(), chunk[-1].date.isoformat()])
+
+        self._write_atomic(os.path.join(self._dir, segment), write)
+        #El indice va despues: hasta que existe, el segmento no se lee
+        index = {"segment": segment, "rows": len(appointments), "block_rows": BLOCK_ROWS,
+                 "first": appointments[0].date.isoformat(), "last": appointments[-1].date.isoformat(),
+                 "blocks": blocks, "customers": customers, "cars": cars}
+        self._write_atomic(os.path.join(self._dir, name + INDEX_SUFFIX), lambda f: f.write(self._codec.dumps(index)))
@@ -0,0 +1,685 @@
+"""
+Almacen binario de citas: registros de ancho fijo empaquetados con struct.
+
+<fichero>.bin
+    cabecera   MAGIC (8 bytes) | version (u16) | tamaño de registro (u16) | cambios (u32)
+    registros  fecha (ordinal, i32) | hora (segundos del dia, u32) | coste (centimos, i32)
+               | id de cliente (u32) | id de coche (u32) | flags (u8) | relleno (3)
+               | crc32 de los 24 bytes anteriores (u32)
+
+<fichero>.bin.keys
+    diccionario de claves, una por linea: "c\\t<dni>" o "p\\t<matricula>". El id de
+    cada clave es su posicion entre las de su tipo. Solo se añaden lineas, y siempre
+    antes que los registros que las usan.
+
+Los lectores mapean el fichero con mmap y desempaquetan directamente del mapa: el
+registro i empieza en HEADER.size + i * RECORD.size (O(1)) y un recorrido completo
+es un solo struct.iter_unpack sobre el mapa. Cada registro se comprueba con su crc.
+Los indices por fecha, cliente y coche guardan posiciones de registro, y el indice
+primario (coche, fecha, hora) -> posicion da el desplazamiento de cada cita.
+
+Las escrituras solo tocan los registros afectados: update y reschedule sobrescriben
+el registro en su sitio, delete marca el registro como borrado (DELETED) y las altas
+ocupan los huecos de los borrados antes de crecer por el final. El coste de una
+escritura no depende del numero de citas guardadas. Cada escritura en su sitio sube
+el contador de cambios de la cabecera, que es lo que miran los lectores (propios y
+de otros procesos) para saber que su vista ha cambiado. Un registro es atomico
+(crc); un lote de varios registros no.
+
+Los huecos que no se reutilizan (las citas archivadas no vuelven) se siguen
+recorriendo en cada lectura completa. Cuando un borrado deja al menos
+COMPACT_FREE_RATIO de los registros como huecos, el almacen se reescribe solo con
+las citas vivas en un fichero nuevo que sustituye al anterior (os.replace): los
+lectores lo ven por el cambio de inodo y reindexan. El diccionario de claves no
+cambia, asi que los ids de los registros siguen valiendo.
+"""
+import mmap
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left, insort
+from datetime import date, time
+from operator import itemgetter
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from zlib import crc32
+
+from adapters.persistence.appointment_json_repository import AppointmentRow, hydrate_rows
+from adapters.persistence.file_lock import FileLock
+from adapters.persistence.json_base import _notify_io
+from adapters.persistence.rwlock import ReadWriteLock
+
+from core.domain.appointment import Appointment
+from core.domain.car import Car
+from core.domain.customer import Customer
+from core.ports.car_repository import CarRepository
+from core.ports.customer_repository import CustomerRepository
+
+if TYPE_CHECKING:
+    from adapters.analytics.appointment_columns import AppointmentColumns
+
+MAGIC = b"TALLERCT"
+VERSION = 2
+HEADER = struct.Struct("<8sHHI")
+# Contador de cambios en su sitio, dentro de la cabecera
+CHANGES = struct.Struct("<I")
+CHANGES_OFFSET = 12
+BODY = struct.Struct("<iIiIIB3x")
+RECORD = struct.Struct("<iIiIIB3xI")
+KEYS_SUFFIX = ".keys"
+# Columnas de un registro
+DATE, SECONDS, CENTS, CUSTOMER, CAR, FLAGS, CRC = range(7)
+# Bits de FLAGS
+DELETED = 0x01
+# Tipos de clave del diccionario
+CUSTOMER_KEY, CAR_KEY = "c", "p"
+# Relecturas de un registro con el crc mal antes de darlo por corrupto (una escritura a medias)
+READ_RETRIES = 3
+# delete_many compacta el almacen si los huecos llegan a esta proporcion de los registros
+# (y son al menos COMPACT_MIN_FREE: en un almacen pequeño no compensa reescribirlo)
+COMPACT_FREE_RATIO = 0.25
+COMPACT_MIN_FREE = 64
+
+# Registro leido (con crc) o por escribir (sin el, se calcula al empaquetar)
+Record = Tuple[int, ...]
+
+
+def _seconds(t: time) -> int:
+    return t.hour * 3600 + t.minute * 60 + t.second
+
+
+def _cents(cost: float) -> int:
+    return round(cost * 100)
+
+
+def _key(car: int, day: int, seconds: int) -> int:
+    """Clave primaria de una cita en el almacen, (coche, fecha, hora), como un solo entero"""
+    return (car << 40) | (day << 17) | seconds
+
+
+def _identity(record: Record) -> int:
+    return _key(record[CAR], record[DATE], record[SECONDS])
+
+
+def _pack(record: Record) -> bytes:
+    body = BODY.pack(*record[:CRC])
+    return body + CHANGES.pack(crc32(body))
+
+
+def _tombstone(record: Record) -> Record:
+    return record[:FLAGS] + (record[FLAGS] | DELETED,)
+
+
+class KeyTable:
+    """
+    Diccionario DNI/matricula <-> id entero, guardado junto al almacen. Solo crece:
+    una clave nunca cambia de id, asi que los registros que la usan no se tocan.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._offset = 0
+        self._keys: Dict[str, List[str]] = {CUSTOMER_KEY: [], CAR_KEY: []}
+        self._ids: Dict[str, Dict[str, int]] = {CUSTOMER_KEY: {}, CAR_KEY: {}}
+        #Lo refrescan tanto los lectores (al ver el almacen cambiado) como los escritores
+        self._refresh_lock = threading.Lock()
+        if not os.path.exists(path):
+            open(path, "ab").close()
+
+    def refresh(self) -> None:
+        """Carga las claves que otros procesos hayan añadido desde la ultima vez"""
+        with self._refresh_lock:
+            if os.path.getsize(self._path) == self._offset:
+                return
+            with open(self._path, "rb") as f:
+                f.seek(self._offset)
+                tail = f.read()
+            #Una linea a medio escribir se leera entera la proxima vez
+            end = tail.rfind(b"\n") + 1
+            for line in tail[:end].decode("utf-8").splitlines():
+                kind, key = line.split("\t", 1)
+                self._ids[kind][key] = len(self._keys[kind])
+                self._keys[kind].append(key)
+            self._offset += end
+
+    def id_of(self, kind: str, key: str) -> Optional[int]:
+        return self._ids[kind].get(key)
+
+    def keys(self, kind: str) -> List[str]:
+        """Claves de un tipo por id; la lista solo crece, asi que se puede leer sin copiarla"""
+        return self._keys[kind]
+
+    def ensure(self, keys: Iterable[Tuple[str, str]]) -> None:
+        """Añade al fichero las claves (tipo, clave) que falten. Solo con el cerrojo del almacen"""
+        self.refresh()
+        missing: Dict[Tuple[str, str], None] = {}
+        for kind, key in keys:
+            if key not in self._ids[kind]:
+                missing[(kind, key)] = None
+        if not missing:
+            return
+        payload = "".join(f"{kind}\t{key}\n" for kind, key in missing).encode("utf-8")
+        with open(self._path, "r+b") as f:
+            #Restos de una linea cortada por una caida: se descartan antes de añadir
+            f.truncate(self._offset)
+            f.seek(self._offset)
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        self.refresh()
+
+
+class StoreIndex:
+    """
+    Indices del almacen, compartidos por las vistas sucesivas del mismo fichero:
+    columna -> valor -> posiciones (ordenadas), clave primaria -> posicion (o
+    posiciones, si alguien ha guardado la misma cita dos veces) y huecos libres.
+    """
+
+    __slots__ = ("columns", "primary", "free")
+
+    def __init__(self) -> None:
+        self.columns: Dict[int, Dict[int, array]] = {DATE: {}, CUSTOMER: {}, CAR: {}}
+        self.primary: Dict[int, Union[int, array]] = {}
+        self.free: List[int] = []
+
+    def find(self, key: int) -> List[int]:
+        """Posiciones de las citas vivas con esa clave primaria"""
+        found = self.primary.get(key)
+        if found is None:
+            return []
+        return [found] if isinstance(found, int) else list(found)
+
+    def add(self, position: int, record: Record) -> None:
+        if record[FLAGS] & DELETED:
+            self.free.append(position)
+            return
+        for column in (DATE, CUSTOMER, CAR):
+            index = self.columns[column]
+            found = index.get(record[column])
+            if found is None:
+                index[record[column]] = array("I", (position,))
+            elif found[-1] < position:
+                found.append(position)
+            else:
+                insort(found, position)
+        key = _identity(record)
+        found = self.primary.get(key)
+        if found is None:
+            self.primary[key] = position
+        else:
+            duplicates = array("I", (found,) if isinstance(found, int) else found)
+            insort(duplicates, position)
+            self.primary[key] = duplicates
+
+    def discard(self, position: int, record: Record) -> None:
+        """Quita del indice un registro vivo que se va a sobrescribir"""
+        if record[FLAGS] & DELETED:
+            return
+        for column in (DATE, CUSTOMER, CAR):
+            index = self.columns[column]
+            found = index[record[column]]
+            found.remove(position)
+            if not found:
+                del index[record[column]]
+        key = _identity(record)
+        found = self.primary[key]
+        if isinstance(found, int):
+            del self.primary[key]
+            return
+        found.remove(position)
+        if len(found) == 1:
+            self.primary[key] = found[0]
+
+
+class StoreView:
+    """
+    Version publicada del almacen: el mapa del fichero, cuantos registros valen, los
+    indices y el contador de cambios que tenia la cabecera al indexar. Mientras el
+    fichero solo crece las vistas sucesivas comparten los indices y cada una ignora
+    las posiciones que no tiene. El mapa es del fichero vivo: un registro que se
+    sobrescribe en su sitio cambia tambien para quien ya tenga la vista.
+    """
+
+    __slots__ = ("buffer", "count", "index", "changes")
+
+    def __init__(self, buffer: mmap.mmap, count: int, index: StoreIndex, changes: int) -> None:
+        self.buffer = buffer
+        self.count = count
+        self.index = index
+        self.changes = changes
+
+    def stored_changes(self) -> int:
+        """Contador de cambios que tiene ahora la cabecera del fichero"""
+        return CHANGES.unpack_from(self.buffer, CHANGES_OFFSET)[0]
+
+    def record(self, position: int) -> Record:
+        """Registro de la posicion dada (vivo o borrado), comprobado con su crc"""
+        offset = HEADER.size + position * RECORD.size
+        for _ in range(READ_RETRIES):
+            record = RECORD.unpack_from(self.buffer, offset)
+            if crc32(self.buffer[offset:offset + BODY.size]) == record[CRC]:
+                return record
+        raise ValueError(f"Registro {position} corrupto en el almacen de citas: no coincide su crc")
+
+    def entries(self, start: int = 0) -> Iterator[Tuple[int, Record]]:
+        """(posicion, registro) desde start, borrados incluidos, desempaquetando del mapa sin copiarlo"""
+        view = memoryview(self.buffer)
+        offset = HEADER.size + start * RECORD.size
+        body, size = BODY.size, RECORD.size
+        for position, record in enumerate(RECORD.iter_unpack(view[offset:HEADER.size + self.count * size]), start):
+            if crc32(view[offset:offset + body]) != record[CRC]:
+                #Puede estar escribiendose ahora mismo: se relee
+                record = self.record(position)
+            offset += size
+            yield position, record
+
+    def records(self, start: int = 0) -> Iterator[Record]:
+        """Registros vivos en orden de fichero"""
+        for _, record in self.entries(start):
+            if not record[FLAGS] & DELETED:
+                yield record
+
+    def positions(self, column: int, value: int) -> array:
+        found = self.index.columns[column].get(value)
+        if not found:
+            return array("I")
+        return found[:bisect_left(found, self.count)]
+
+    def lookup(self, column: int, value: int) -> List[Record]:
+        #Una posicion indexada puede haberse borrado despues de leer el indice
+        records = [self.record(position) for position in self.positions(column, value)]
+        return [record for record in records if not record[FLAGS] & DELETED]
+
+    def days(self) -> List[int]:
+        return sorted(self.index.columns[DATE])
+
+
+def _check_header(raw: bytes, path: str) -> int:
+    """Comprueba la cabecera y devuelve el contador de cambios"""
+    if len(raw) < HEADER.size:
+        raise ValueError(f"{path} no es un almacen de citas: falta la cabecera")
+    magic, version, record_size, changes = HEADER.unpack_from(raw)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"{path} no es un almacen de citas version {VERSION} ({magic!r}, v{version}, {record_size} bytes)")
+    return changes
+
+
+def write_store(rows: Iterable[dict], path: str) -> int:
+    """
+    Crea un almacen nuevo en path con filas como las de appointments.json (date, time,
+    cost, customer_dni, car_plate) y devuelve cuantas ha escrito. Escribe en streaming.
+    """
+    ids: Dict[str, Dict[str, int]] = {CUSTOMER_KEY: {}, CAR_KEY: {}}
+    dates: Dict[str, int] = {}
+    times: Dict[str, int] = {}
+    written = 0
+    with open(path, "wb", buffering=1024 * 1024) as f:
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, 0))
+        for row in rows:
+            day = dates.get(row["date"])
+            if day is None:
+                day = dates[row["date"]] = date.fromisoformat(row["date"]).toordinal()
+            seconds = times.get(row["time"])
+            if seconds is None:
+                seconds = times[row["time"]] = _seconds(time.fromisoformat(row["time"]))
+            customer = ids[CUSTOMER_KEY].setdefault(row["customer_dni"], len(ids[CUSTOMER_KEY]))
+            car = ids[CAR_KEY].setdefault(row["car_plate"], len(ids[CAR_KEY]))
+            f.write(_pack((day, seconds, _cents(row["cost"]), customer, car, 0)))
+            written += 1
+    with open(path + KEYS_SUFFIX, "w", encoding="utf-8") as f:
+        for kind, keys in ids.items():
+            f.writelines(f"{kind}\t{key}\n" for key in keys)
+    return written
+
+
+class AppointmentBinaryRepository:
+    """AppointmetRepository sobre el almacen binario de ancho fijo (ver el docstring del modulo)"""
+
+    def __init__(self, file_path: str, customer_repo: CustomerRepository, car_repo: CarRepository) -> None:
+        self._file_path = file_path
+        self._customer_repo = customer_repo
+        self._car_repo = car_repo
+        self._ensure_file_exists()
+        self._keys = KeyTable(file_path + KEYS_SUFFIX)
+        #Mismo esquema de cerrojos que los repositorios JSON: entre procesos y lector/escritor
+        self._lock = FileLock(file_path + ".lock")
+        self._rw = ReadWriteLock()
+        self._view: Optional[StoreView] = None
+        self._view_key: Optional[Tuple[int, int]] = None
+        #Hay pocas fechas y horas distintas: cada una se crea una sola vez
+        self._dates: Dict[int, date] = {}
+        self._times: Dict[int, time] = {}
+        #Ultima instantanea columnar y la vista de la que sale
+        self._columns: Optional[Tuple[StoreView, "AppointmentColumns"]] = None
+
+    def _ensure_file_exists(self) -> None:
+        """Crea un almacen vacio (solo la cabecera) de forma atomica si no existe"""
+        if os.path.exists(self._file_path):
+            return
+        tmp_path = f"{self._file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, 0))
+        #Si otro proceso lo ha creado entretanto, el suyo y el nuestro son iguales
+        os.replace(tmp_path, self._file_path)
+
+    def _file_key(self) -> Optional[Tuple[int, int]]:
+        """(tamaño, inodo): cambia con las altas al final y si se sustituye el fichero"""
+        try:
+            st = os.stat(self._file_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_size, st.st_ino)
+
+    def _is_fresh(self, view: Optional[StoreView], key: Optional[Tuple[int, int]]) -> bool:
+        #Los cambios en su sitio no mueven el tamaño: se ven en el contador de la cabecera
+        return view is not None and key == self._view_key and view.stored_changes() == view.changes
+
+    # ==========================
+    # LECTURA
+    # ==========================
+    def _current(self) -> StoreView:
+        """
+        Vista del fichero actual (con _rw de escritura). Si desde la vista anterior solo
+        se ha añadido al final, indexa solo los registros nuevos; si algo ha cambiado en
+        su sitio (otro proceso), reindexa todo.
+        """
+        with open(self._file_path, "rb") as f:
+            st = os.fstat(f.fileno())
+            key = (st.st_size, st.st_ino)
+            if self._is_fresh(self._view, key):
+                return self._view
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        changes = _check_header(buffer[:HEADER.size], self._file_path)
+        self._keys.refresh()
+        count = (len(buffer) - HEADER.size) // RECORD.size
+
+        previous = self._view
+        if (previous is not None and self._view_key[1] == key[1]
+                and previous.changes == changes and count >= previous.count):
+            view = StoreView(buffer, count, previous.index, changes)
+            start = previous.count
+        else:
+            view = StoreView(buffer, count, StoreIndex(), changes)
+            start = 0
+        index = view.index
+        for position, record in view.entries(start):
+            index.add(position, record)
+        self._view = view
+        self._view_key = key
+        return view
+
+    def _snapshot(self) -> StoreView:
+        """Vista publicada, comprobando antes si el fichero ha cambiado"""
+        with self._rw.read_locked():
+            view = self._view
+            if self._is_fresh(view, self._file_key()):
+                return view
+        with self._rw.write_locked():
+            return self._current()
+
+    def _rows(self, records: Iterable[Record]) -> Iterator[AppointmentRow]:
+        """Registros -> filas compactas (fecha, hora, coste, dni, matricula)"""
+        dates, times = self._dates, self._times
+        dnis, plates = self._keys.keys(CUSTOMER_KEY), self._keys.keys(CAR_KEY)
+        for day, seconds, cents, customer, car, _, _ in records:
+            d = dates.get(day)
+            if d is None:
+                d = dates[day] = date.fromordinal(day)
+            t = times.get(seconds)
+            if t is None:
+                t = times[seconds] = time(seconds // 3600, seconds // 60 % 60, seconds % 60)
+            yield (d, t, cents / 100, dnis[customer], plates[car])
+    
+    def _hydrate(self, records: Iterable[Record], customers: Optional[Dict[str, Customer]] = None,
+                 cars: Optional[Dict[str, Car]] = None) -> List[Appointment]:
+        return hydrate_rows(self._rows(records), self._customer_repo, self._car_repo, customers, cars)
+
+    def list_all(self) -> List[Appointment]:
+        return self._hydrate(self._snapshot().records())
+
+    def export_columns(self) -> "AppointmentColumns":
+        """
+        Instantanea columnar para analitica leida directamente de los registros: los
+        ids de cliente y coche ya son los de la tabla de claves. Es de solo lectura y
+        se reutiliza mientras la vista publicada sea la misma.
+        """
+        from adapters.analytics.appointment_columns import AppointmentColumns
+        view = self._snapshot()
+        cached = self._columns
+        if cached is not None and cached[0] is view:
+            return cached[1]
+        records = list(view.records())
+        if records:
+            days, seconds, cents, customers, cars, _, _ = zip(*records)
+        else:
+            days = seconds = cents = customers = cars = ()
+        columns = AppointmentColumns.from_codes(
+            days, seconds, cents, customers, cars, self._keys.keys(CUSTOMER_KEY), self._keys.keys(CAR_KEY)
+        )
+        self._columns = (view, columns)
+        return columns
+
+    def find_by_date(self, date_: date) -> List[Appointment]:
+        """Busca y devuelve todas las citas de un dia concreto"""
+        return self._hydrate(self._snapshot().lookup(DATE, date_.toordinal()))
+
+    def find_by_customer(self, dni: str) -> List[Appointment]:
+        """Devuelve todas las citas pertenecientes a un cliente por su DNI"""
+        view = self._snapshot()
+        customer = self._keys.id_of(CUSTOMER_KEY, dni)
+        return [] if customer is None else self._hydrate(view.lookup(CUSTOMER, customer))
+
+    def find_by_car(self, plate: str) -> List[Appointment]:
+        """Devuelve todas las citas asociadas a una matricula concreta"""
+        view = self._snapshot()
+        car = self._keys.id_of(CAR_KEY, plate)
+        return [] if car is None else self._hydrate(view.lookup(CAR, car))
+
+    def iter_range(self, start: Optional[date] = None, end: Optional[date] = None, dni: Optional[str] = None) -> Iterator[Appointment]:
+        """Recorre en orden de fecha y hora las citas entre start y end (incluidos), dia a dia"""
+        view = self._snapshot()
+        first = start.toordinal() if start else None
+        last = end.toordinal() if end else None
+        by_moment = itemgetter(DATE, SECONDS)
+        customers: Dict[str, Customer] = {}
+        cars: Dict[str, Car] = {}
+        if dni is not None:
+            customer = self._keys.id_of(CUSTOMER_KEY, dni)
+            found = [] if customer is None else [
+                r for r in view.lookup(CUSTOMER, customer)
+                if (first is None or r[DATE] >= first) and (last is None or r[DATE] <= last)
+            ]
+            yield from self._hydrate(sorted(found, key=by_moment), customers, cars)
+            return
+        days = [day for day in view.days() if (first is None or day >= first) and (last is None or day <= last)]
+        for day in days:
+            yield from self._hydrate(sorted(view.lookup(DATE, day), key=by_moment), customers, cars)
+
+    # ==========================
+    # ESCRITURA
+    # ==========================
+    @staticmethod
+    def _key_pairs(appointments: Iterable[Appointment]) -> Iterator[Tuple[str, str]]:
+        for a in appointments:
+            yield CUSTOMER_KEY, a.customer.dni
+            yield CAR_KEY, a.car.plate
+
+    def _record(self, a: Appointment) -> Record:
+        """Registro de la cita; sus claves tienen que estar ya en el diccionario"""
+        return (a.date.toordinal(), _seconds(a.time), _cents(a.cost),
+                self._keys.id_of(CUSTOMER_KEY, a.customer.dni), self._keys.id_of(CAR_KEY, a.car.plate), 0)
+
+    def _target(self, a: Appointment) -> Optional[int]:
+        """Clave primaria de una cita a buscar; None si su coche no aparece en el almacen"""
+        car = self._keys.id_of(CAR_KEY, a.car.plate)
+        return None if car is None else _key(car, a.date.toordinal(), _seconds(a.time))
+
+    def _write(self, plan: Callable[[StoreView], List[Tuple[Optional[int], Record]]],
+               appointments: Iterable[Appointment] = ()) -> bool:
+        """
+        Escribe los registros que decida plan con la vista actual: (posicion, registro)
+        sobrescribe esa posicion y (None, registro) ocupa un hueco libre o va al final.
+        Devuelve False sin escribir si plan no devuelve nada. Las claves de appointments
+        se registran antes en el diccionario.
+        """
+        with self._lock:
+            self._keys.ensure(self._key_pairs(appointments))
+            with open(self._file_path, "r+b") as f:
+                with self._rw.write_locked():
+                    view = self._current()
+                    writes = plan(view)
+                    if not writes:
+                        return False
+                    try:
+                        written = self._store(f.fileno(), view, writes)
+                    except BaseException:
+                        #Los indices pueden haber quedado a medias: se rehacen con la proxima lectura
+                        self._view = None
+                        raise
+                os.fsync(f.fileno())
+            self._lock.stats.commits += 1
+        _notify_io("write", self._file_path, written)
+        return True
+
+    def _store(self, fd: int, view: StoreView, writes: List[Tuple[Optional[int], Record]]) -> int:
+        """Escribe y actualiza los indices de la vista; devuelve los bytes escritos (con _rw de escritura)"""
+        index = view.index
+        in_place: List[Tuple[int, Record, Record]] = []
+        appended: List[Record] = []
+        for position, record in writes:
+            if position is None and index.free:
+                position = index.free.pop()
+                in_place.append((position, view.record(position), record))
+            elif position is None:
+                appended.append(record)
+            else:
+                in_place.append((position, view.record(position), record))
+
+        written = 0
+        for position, _, record in in_place:
+            written += os.pwrite(fd, _pack(record), HEADER.size + position * RECORD.size)
+        if appended:
+            #Encima de un registro a medias (caida durante una escritura), si lo hay
+            written += os.pwrite(fd, b"".join(map(_pack, appended)), HEADER.size + view.count * RECORD.size)
+        changes = view.changes
+        if in_place:
+            changes = (changes + 1) & 0xFFFFFFFF
+            written += os.pwrite(fd, CHANGES.pack(changes), CHANGES_OFFSET)
+            for position, old, record in in_place:
+                index.discard(position, old)
+                index.add(position, record)
+        #Los registros añadidos al final los indexa _current, como los de otro proceso
+        self._view = StoreView(view.buffer, view.count, index, changes)
+        self._current()
+        return written
+
+    def add(self, appointment: Appointment) -> None:
+        self.add_many([appointment])
+
+    def add_many(self, appointments: List[Appointment]) -> None:
+        """Añade todo el lote con una sola escritura: huecos de borrados primero y el resto al final"""
+        if appointments:
+            self._write(lambda view: [(None, self._record(a)) for a in appointments], appointments)
+
+    def _overwritten(self, view: StoreView, writes: List[Tuple[Optional[int], Record]],
+                     replaced: List[Record]) -> List[Tuple[Optional[int], Record]]:
+        """Deja en replaced los registros que van a sobrescribir las escrituras en su sitio (dentro del cerrojo)"""
+        replaced[:] = [view.record(position) for position, _ in writes if position is not None]
+        return writes
+
+    def update(self, appointment: Appointment) -> List[Appointment]:
+        """Actualiza una cita en su sitio y devuelve la sustituida. Usamos (coche + fecha + hora) como identificador unico"""
+        replaced: List[Record] = []
+        def plan(view: StoreView) -> List[Tuple[Optional[int], Record]]:
+            new = self._record(appointment)
+            found = view.index.find(_identity(new))
+            return self._overwritten(view, [(found[0], new)] if found else [], replaced)
+        return self._hydrate(replaced) if self._write(plan, [appointment]) else []
+
+    def delete(self, appointment: Appointment) -> List[Appointment]:
+        """Elimina la cita exacta y devuelve las filas borradas"""
+        return self.delete_many([appointment])
+
+    def reschedule(self, original: Appointment, moved: Appointment) -> Optional[Appointment]:
+        """Sustituye la cita original por moved y devuelve la sustituida; None si no existe o el destino esta ocupado"""
+        replaced: List[Record] = []
+        def plan(view: StoreView) -> List[Tuple[Optional[int], Record]]:
+            source = self._target(original)
+            found = [] if source is None else view.index.find(source)
+            if not found:
+                return []
+            new = self._record(moved)
+            if any(position != found[0] for position in view.index.find(_identity(new))):
+                return []
+            return self._overwritten(view, [(found[0], new)], replaced)
+        return self._hydrate(replaced)[0] if self._write(plan, [moved]) else None
+
+    def upsert_many(self, appointments: List[Appointment]) -> List[Appointment]:
+        """Actualiza en su sitio las citas que ya existen (coche + fecha + hora) y añade las demas; devuelve las sustituidas"""
+        if not appointments:
+            return []
+        replaced: List[Record] = []
+        def plan(view: StoreView) -> List[Tuple[Optional[int], Record]]:
+            existing: Dict[int, Record] = {}
+            fresh: Dict[int, Record] = {}
+            for a in appointments:
+                new = self._record(a)
+                found = view.index.find(_identity(new))
+                if found:
+                    existing[found[0]] = new
+                else:
+                    fresh[_identity(new)] = new
+            writes: List[Tuple[Optional[int], Record]] = list(existing.items())
+            return self._overwritten(view, writes + [(None, record) for record in fresh.values()], replaced)
+        return self._hydrate(replaced) if self._write(plan, appointments) else []
+
+    def delete_many(self, appointments: List[Appointment]) -> List[Appointment]:
+        """
+        Marca como borradas todas las citas del lote con una sola escritura y devuelve las
+        borradas. Compacta el almacen si con ellas los huecos pasan de COMPACT_FREE_RATIO
+        (p. ej. al archivar).
+        """
+        removed: List[Record] = []
+        def plan(view: StoreView) -> List[Tuple[Optional[int], Record]]:
+            targets = {self._target(a) for a in appointments} - {None}
+            positions = sorted({position for key in targets for position in view.index.find(key)})
+            removed[:] = [view.record(position) for position in positions]
+            return [(position, _tombstone(record)) for position, record in zip(positions, removed)]
+        if not self._write(plan):
+            return []
+        self.compact(COMPACT_FREE_RATIO, COMPACT_MIN_FREE)
+        return self._hydrate(removed)
+
+    def compact(self, min_ratio: float = 0.0, min_free: int = 1) -> int:
+        """
+        Reescribe el almacen sin los registros borrados si hay al menos min_free huecos y
+        son al menos min_ratio de los registros; devuelve cuantos ha quitado (0 si ninguno)
+        """
+        with self._lock:
+            with self._rw.write_locked():
+                view = self._current()
+                free = len(view.index.free)
+                if not free or free < min_free or free < min_ratio * view.count:
+                    return 0
+                tmp_path = f"{self._file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                try:
+                    with open(tmp_path, "wb", buffering=1024 * 1024) as f:
+                        #Contador nuevo: aunque el sistema reutilice el inodo, la vista anterior no vale
+                        f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, (view.changes + 1) & 0xFFFFFFFF))
+                        for record in view.records():
+                            f.write(_pack(record))
+                        written = f.tell()
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_path, self._file_path)
+                except BaseException:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise
+                #Las vistas ya publicadas siguen leyendo el fichero anterior desde su mapa
+                self._view = None
+                self._current()
+            self._lock.stats.commits += 1
+        _notify_io("write", self._file_path, written)
+        return free
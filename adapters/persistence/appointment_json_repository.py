@@ -1,8 +1,13 @@
-from typing import List
+from bisect import bisect
+from itertools import chain
+from operator import itemgetter
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
 from dataclasses import asdict
 from datetime import date, time  
 
 from adapters.persistence.json_base import JsonRepositoryBase
+from adapters.persistence.json_codec import JsonCodec, decode_column
+from adapters.persistence.persistent import ChunkedVector, PersistentMap
 
 from core.domain.appointment import Appointment
 from core.domain.car import Car
@@ -10,11 +15,200 @@ from core.domain.customer import Customer
 from core.ports.car_repository import CarRepository
 from core.ports.customer_repository import CustomerRepository
 
+if TYPE_CHECKING:
+    from adapters.analytics.appointment_columns import AppointmentColumns
+
+#Fila compacta en memoria: (fecha, hora, coste, dni, matricula)
+AppointmentRow = Tuple[date, time, float, str, str]
+DATE, TIME, COST, DNI, PLATE = range(5)
+
+
+class AppointmentRows:
+    """
+    Version inmutable de las filas compactas de citas, con indices por columna que se
+    construyen al primer uso. add/replace/remove devuelven la version siguiente, que
+    comparte con esta todo salvo los trozos e indices tocados.
+    """
+    
+    def __init__(self, rows: Iterable[AppointmentRow] = ()) -> None:
+        #El id de cada fila es su posicion: crece con el orden del fichero y no se reutiliza
+        self.rows: ChunkedVector[AppointmentRow] = ChunkedVector(rows)
+        self._indexes: Dict[int, PersistentMap[object, Tuple[int, ...]]] = {}
+        self.version = 0
+    
+    def _derive(self, rows: ChunkedVector[AppointmentRow], indexes: Dict[int, PersistentMap]) -> "AppointmentRows":
+        new = AppointmentRows.__new__(AppointmentRows)
+        new.rows = rows
+        new._indexes = indexes
+        new.version = self.version + 1
+        return new
+    
+    def _index(self, column: int) -> PersistentMap[object, Tuple[int, ...]]:
+        #Dos lectores pueden construir el mismo indice a la vez: ambos son iguales y gana uno
+        index = self._indexes.get(column)
+        if index is None:
+            ids: Dict[object, List[int]] = {}
+            for row_id, row in self.rows.items():
+                ids.setdefault(row[column], []).append(row_id)
+            index = self._indexes[column] = PersistentMap((value, tuple(found)) for value, found in ids.items())
+        return index
+    
+    def __iter__(self) -> Iterator[AppointmentRow]:
+        return iter(self.rows)
+    
+    def lookup(self, column: int, value: object) -> List[AppointmentRow]:
+        return [self.rows[row_id] for row_id in self._index(column).get(value, ())]
+    
+    def days(self, start: Optional[date] = None, end: Optional[date] = None) -> List[date]:
+        """Dias con alguna cita entre start y end (ambos incluidos), en orden"""
+        return sorted(
+            day for day, _ in self._index(DATE).items()
+            if (start is None or day >= start) and (end is None or day <= end)
+        )
+    
+    def ids_of(self, plate: str, date_: date, time_: time) -> List[int]:
+        """Ids de las filas con esa identidad (coche + fecha + hora)"""
+        return [
+            row_id for row_id in self._index(PLATE).get(plate, ())
+            if self.rows[row_id][DATE] == date_ and self.rows[row_id][TIME] == time_
+        ]
+    
+    def add(self, row: AppointmentRow) -> "AppointmentRows":
+        row_id = self.rows.size
+        #Solo se arrastran los indices que ya existen; el resto se construira en la version nueva
+        indexes = {
+            column: index.set(row[column], index.get(row[column], ()) + (row_id,))
+            for column, index in list(self._indexes.items())
+        }
+        return self._derive(self.rows.append(row), indexes)
+    
+    def replace(self, row_id: int, row: AppointmentRow) -> "AppointmentRows":
+        old = self.rows[row_id]
+        indexes = {}
+        for column, index in list(self._indexes.items()):
+            if old[column] != row[column]:
+                index = self._unindex(index, old[column], row_id)
+                #Los ids crecen con el orden del fichero: insertar en orden lo conserva
+                ids = index.get(row[column], ())
+                at = bisect(ids, row_id)
+                index = index.set(row[column], ids[:at] + (row_id,) + ids[at:])
+            indexes[column] = index
+        return self._derive(self.rows.set(row_id, row), indexes)
+    
+    def remove(self, row_id: int) -> "AppointmentRows":
+        row = self.rows[row_id]
+        indexes = {
+            column: self._unindex(index, row[column], row_id)
+            for column, index in list(self._indexes.items())
+        }
+        return self._derive(self.rows.delete(row_id), indexes)
+    
+    def _rebuilt(self, rows: Iterable[AppointmentRow]) -> "AppointmentRows":
+        #Lote grande: sale mas barato reconstruir; los indices se rehacen al primer uso
+        new = AppointmentRows(rows)
+        new.version = self.version + 1
+        return new
+    
+    def add_many(self, rows: List[AppointmentRow]) -> "AppointmentRows":
+        if not rows:
+            return self
+        if len(rows) * 8 >= len(self.rows):
+            return self._rebuilt(chain(self.rows, rows))
+        new = self
+        for row in rows:
+            new = new.add(row)
+        new.version = self.version + 1
+        return new
+    
+    def upsert_many(self, rows: List[AppointmentRow]) -> "AppointmentRows":
+        """Sustituye la primera fila con la misma identidad (coche + fecha + hora) o la añade"""
+        if not rows:
+            return self
+        if len(rows) * 8 >= len(self.rows):
+            merged = list(self.rows)
+            positions: Dict[Tuple[str, date, time], int] = {}
+            for i, row in enumerate(merged):
+                positions.setdefault((row[PLATE], row[DATE], row[TIME]), i)
+            for row in rows:
+                i = positions.setdefault((row[PLATE], row[DATE], row[TIME]), len(merged))
+                if i == len(merged):
+                    merged.append(row)
+                else:
+                    merged[i] = row
+            return self._rebuilt(merged)
+        new = self
+        for row in rows:
+            ids = new.ids_of(row[PLATE], row[DATE], row[TIME])
+            new = new.replace(ids[0], row) if ids else new.add(row)
+        new.version = self.version + 1
+        return new
+    
+    def remove_many(self, keys: Iterable[Tuple[str, date, time]]) -> "AppointmentRows":
+        """Quita todas las filas con alguna de esas identidades (coche, fecha, hora)"""
+        ids = [row_id for plate, date_, time_ in keys for row_id in self.ids_of(plate, date_, time_)]
+        if not ids:
+            return self
+        if len(ids) * 8 >= len(self.rows):
+            dropped = set(ids)
+            return self._rebuilt(row for row_id, row in self.rows.items() if row_id not in dropped)
+        new = self
+        for row_id in ids:
+            new = new.remove(row_id)
+        new.version = self.version + 1
+        return new
+    
+    @staticmethod
+    def _unindex(index: PersistentMap, value: object, row_id: int) -> PersistentMap:
+        ids = tuple(i for i in index.get(value, ()) if i != row_id)
+        return index.set(value, ids) if ids else index.delete(value)
+
+
+def rows_from_dicts(data: List[dict]) -> List[AppointmentRow]:
+    """Filas crudas del JSON (date, time, cost, customer_dni, car_plate) -> filas compactas"""
+    # Columna a columna: hay pocas fechas y horas distintas y cada una se parsea una sola vez
+    dates = decode_column(map(itemgetter('date'), data), date.fromisoformat)
+    # --- CORRECCIÓN IMPORTANTE ---
+    # Usamos time.fromisoformat (NO date.fromisoformat)
+    times = decode_column(map(itemgetter('time'), data), time.fromisoformat)
+    costs = map(itemgetter('cost'), data)
+    dnis = map(itemgetter('customer_dni'), data)
+    plates = map(itemgetter('car_plate'), data)
+    return list(zip(dates, times, costs, dnis, plates))
+
+
+def hydrate_rows(rows: Iterable[AppointmentRow], customer_repo: CustomerRepository, car_repo: CarRepository,
+                 customers: Optional[Dict[str, Customer]] = None, cars: Optional[Dict[str, Car]] = None) -> List[Appointment]:
+    """
+    Convierte filas compactas en citas buscando cada cliente y coche una sola vez.
+    Quien hidrata por tandas puede pasar los mismos customers/cars a todas.
+    """
+    customers = {} if customers is None else customers
+    cars = {} if cars is None else cars
+    result = []
+    for d, t, cost, dni, plate in rows:
+        customer = customers.get(dni)
+        if customer is None:
+            # Objetos dummy por seguridad si no existen
+            customer = customers[dni] = customer_repo.get_by_dni(dni) or Customer(
+                dni="ERR", name="Unknown", surname="Unknown", birth_date=date.today(), email="e@e.com", phone="0"
+            )
+        car = cars.get(plate)
+        if car is None:
+            car = cars[plate] = car_repo.get_by_plate(plate) or Car(
+                plate="ERR", brand="Unknown", model="Unknown", year=2000, last_revision=None
+            )
+        result.append(Appointment(customer=customer, car=car, date=d, time=t, cost=cost))
+    return result
+
+
 class AppointmentJsonRepository(JsonRepositoryBase):
-    def __init__(self, file_path: str, customer_repo: CustomerRepository, car_repo: CarRepository) -> None:
-        super().__init__(file_path)
+    def __init__(self, file_path: str, customer_repo: CustomerRepository, car_repo: CarRepository,
+                 codec: Optional[JsonCodec] = None) -> None:
+        super().__init__(file_path, codec)
         self._customer_repo = customer_repo
         self._car_repo = car_repo
+        #Ultima instantanea columnar y la version de las filas de la que sale
+        self._columns: Optional[Tuple[AppointmentRows, "AppointmentColumns"]] = None
     
     def _appointment_to_dict(self, app: Appointment) -> dict:
         """Guarda los IDs en lugar de los objetos completos"""
@@ -35,91 +229,243 @@ class AppointmentJsonRepository(JsonRepositoryBase):
         
         return data
     
-    def _dict_to_appointment(self, data: dict) -> Appointment:
-        data['date'] = date.fromisoformat(data['date'])
-        # --- CORRECCIÓN IMPORTANTE ---
-        # Usamos time.fromisoformat (NO date.fromisoformat)
-        data['time'] = time.fromisoformat(data['time'])
-        
-        customer = self._customer_repo.get_by_dni(data['customer_dni'])
-        car = self._car_repo.get_by_plate(data['car_plate'])
-        
-        # Objetos dummy por seguridad si no existen
-        data['customer'] = customer if customer else Customer(dni="ERR", name="Unknown", surname="Unknown", birth_date=date.today(), email="e@e.com", phone="0")
-        data['car'] = car if car else Car(plate="ERR", brand="Unknown", model="Unknown", year=2000, last_revision=None)
-        
-        del data['customer_dni']
-        del data['car_plate']
-        
-        return Appointment(**data)
+    @staticmethod
+    def _appointment_to_row(app: Appointment) -> AppointmentRow:
+        return (app.date, app.time, app.cost, app.customer.dni, app.car.plate)
+    
+    def _build_cache(self, data: List[dict]) -> AppointmentRows:
+        """Convierte las filas crudas a tuplas compactas sin hidratar clientes ni coches"""
+        return AppointmentRows(rows_from_dicts(data))
+    
+    def _hydrate(self, rows: Iterable[AppointmentRow], customers: Optional[Dict[str, Customer]] = None,
+                 cars: Optional[Dict[str, Car]] = None) -> List[Appointment]:
+        return hydrate_rows(rows, self._customer_repo, self._car_repo, customers, cars)
+    
+    #Instantanea de arranque (ver adapters/persistence/startup_snapshot.py)
+    def dump_rows(self) -> dict:
+        """Columnas (ordinales, segundos, costes) y dni/matricula como indices a una tabla de valores unicos"""
+        rows = list(self._snapshot())
+        dni_ids: Dict[str, int] = {}
+        plate_ids: Dict[str, int] = {}
+        return {
+            "dates": [r[DATE].toordinal() for r in rows],
+            "seconds": [r[TIME].hour * 3600 + r[TIME].minute * 60 + r[TIME].second for r in rows],
+            "costs": [r[COST] for r in rows],
+            "customers": [dni_ids.setdefault(r[DNI], len(dni_ids)) for r in rows],
+            "cars": [plate_ids.setdefault(r[PLATE], len(plate_ids)) for r in rows],
+            "dni_table": list(dni_ids),
+            "plate_table": list(plate_ids),
+        }
+    
+    def load_rows(self, columns: dict) -> None:
+        # Cada fecha, hora, dni y matricula distinta se crea una sola vez y se comparte
+        dates = {o: date.fromordinal(o) for o in set(columns["dates"])}
+        times = {s: time(s // 3600, s // 60 % 60, s % 60) for s in set(columns["seconds"])}
+        self._install_cache(AppointmentRows(zip(
+            map(dates.__getitem__, columns["dates"]),
+            map(times.__getitem__, columns["seconds"]),
+            columns["costs"],
+            map(columns["dni_table"].__getitem__, columns["customers"]),
+            map(columns["plate_table"].__getitem__, columns["cars"]),
+        )))
     
     def add(self, appointment: Appointment) -> None:
-        data = self._read_json()
-        data.append(self._appointment_to_dict(appointment))
-        self._write_json(data)
+        def change(data: List[dict]) -> bool:
+            data.append(self._appointment_to_dict(appointment))
+            return True
+        self._mutate(change, lambda cache: cache.add(self._appointment_to_row(appointment)))
     
     def list_all(self) -> List[Appointment]:
-        data = self._read_json()
-        return [self._dict_to_appointment(item) for item in data]
+        #La version fijada no cambia aunque otro hilo escriba mientras se hidrata
+        return self._hydrate(self._snapshot())
+    
+    def export_columns(self) -> "AppointmentColumns":
+        """
+        Instantanea columnar para analitica leida de las filas compactas (sin hidratar).
+        Es de solo lectura: se reutiliza mientras no cambien las filas.
+        """
+        #Import perezoso: la analitica puede cargar NumPy y no queremos pagarlo al arrancar
+        from adapters.analytics.appointment_columns import AppointmentColumns
+        rows = self._snapshot()
+        cached = self._columns
+        if cached is not None and cached[0] is rows:
+            return cached[1]
+        columns = AppointmentColumns.from_rows(list(rows))
+        self._columns = (rows, columns)
+        return columns
     
     def find_by_date(self, date_: date) -> List[Appointment]:
         """Busca y devuelve todas las citas de un dia concreto"""
-        data = self._read_json()
-        resultado = []
-        target_date_str = date_.isoformat()
-        
-        for item in data:
-            if item.get('date') == target_date_str:
-                resultado.append(self._dict_to_appointment(item))
-        return resultado
+        return self._hydrate(self._snapshot().lookup(DATE, date_))
     
     def find_by_customer(self, dni: str) -> List[Appointment]:
         """Devuelve todas las citas pertenecientes a un cliente por su DNI"""
-        data = self._read_json()
-        resultado = []
-        for item in data:
-            if item.get('customer_dni') == dni:
-                resultado.append(self._dict_to_appointment(item))
-        return resultado
+        return self._hydrate(self._snapshot().lookup(DNI, dni))
     
     def find_by_car(self, plate: str) -> List[Appointment]:
         """Devuelve todas las citas asociadas a una matricula concreta"""
-        data = self._read_json()
-        resultado = []
-        for item in data:
-            if item.get('car_plate') == plate:
-                resultado.append(self._dict_to_appointment(item))
-        return resultado
-    
-    def update(self, appointment: Appointment) -> None:
+        return self._hydrate(self._snapshot().lookup(PLATE, plate))
+    
+    def iter_range(self, start: Optional[date] = None, end: Optional[date] = None, dni: Optional[str] = None) -> Iterator[Appointment]:
+        """
+        Recorre en orden de fecha y hora las citas entre start y end (incluidos), solo
+        las del cliente dni si se indica. Los filtros van a los indices y las citas se
+        hidratan dia a dia, asi que la memoria no crece con el total de citas.
+        """
+        #Toda la exportacion lee la misma version aunque se escriba mientras tanto
+        rows = self._snapshot()
+        by_moment = itemgetter(DATE, TIME)
+        #Clientes y coches ya resueltos, compartidos entre dias (acotados por el numero de fichas)
+        customers: Dict[str, Customer] = {}
+        cars: Dict[str, Car] = {}
+        if dni is not None:
+            found = [
+                row for row in rows.lookup(DNI, dni)
+                if (start is None or row[DATE] >= start) and (end is None or row[DATE] <= end)
+            ]
+            yield from self._hydrate(sorted(found, key=by_moment), customers, cars)
+            return
+        for day in rows.days(start, end):
+            yield from self._hydrate(sorted(rows.lookup(DATE, day), key=by_moment), customers, cars)
+    
+    def _replaced(self, items: List[dict]) -> List[Appointment]:
+        """Citas de las filas crudas que ha sustituido o borrado la escritura confirmada"""
+        return self._hydrate(rows_from_dicts(items)) if items else []
+    
+    def update(self, appointment: Appointment) -> List[Appointment]:
         """Actualiza una cita. Usamos (coche + fecha + hora) como identificador unico"""
-        data = self._read_json()
-        updated = False
-        
         target_plate = appointment.car.plate
         target_date = appointment.date.isoformat()
         target_time = appointment.time.isoformat()
+        #Lo que habia en disco en el intento que se confirma (change se repite si otro proceso escribe antes)
+        replaced: List[dict] = []
         
-        for i, item in enumerate(data):
-            if (item.get('car_plate') == target_plate and item.get('date') == target_date and item.get('time') == target_time):
-                data[i] = self._appointment_to_dict(appointment)
-                updated = True
-                break
+        def change(data: List[dict]) -> bool:
+            replaced.clear()
+            for i, item in enumerate(data):
+                if (item.get('car_plate') == target_plate and item.get('date') == target_date and item.get('time') == target_time):
+                    replaced.append(item)
+                    data[i] = self._appointment_to_dict(appointment)
+                    return True
+            return False
         
-        if updated:
-            self._write_json(data)
-    
-    def delete(self, appointment: Appointment) -> None:
-        """Elimina la cita exacta"""
-        data = self._read_json()
+        def sync(cache: AppointmentRows) -> AppointmentRows:
+            ids = cache.ids_of(target_plate, appointment.date, appointment.time)
+            return cache.replace(ids[0], self._appointment_to_row(appointment))
         
+        return self._replaced(replaced) if self._mutate(change, sync) else []
+    
+    def delete(self, appointment: Appointment) -> List[Appointment]:
+        """Elimina la cita exacta y devuelve las filas borradas"""
         target_plate = appointment.car.plate
         target_date = appointment.date.isoformat()
         target_time = appointment.time.isoformat()
+        removed: List[dict] = []
         
-        new_data = [
-            item for item in data
-            if not (item.get('car_plate') == target_plate and item.get('date') == target_date and item.get('time') == target_time)
-        ]
+        def change(data: List[dict]) -> bool:
+            removed.clear()
+            kept = []
+            for item in data:
+                if item.get('car_plate') == target_plate and item.get('date') == target_date and item.get('time') == target_time:
+                    removed.append(item)
+                else:
+                    kept.append(item)
+            data[:] = kept
+            return True
+        
+        def sync(cache: AppointmentRows) -> AppointmentRows:
+            for row_id in cache.ids_of(target_plate, appointment.date, appointment.time):
+                cache = cache.remove(row_id)
+            return cache
+        
+        self._mutate(change, sync)
+        return self._replaced(removed)
+    
+    def reschedule(self, original: Appointment, moved: Appointment) -> Optional[Appointment]:
+        """
+        Sustituye la cita original por moved (otra fecha, hora, coche o coste) en una sola
+        escritura y devuelve la fila sustituida tal y como estaba en disco. Devuelve None
+        sin escribir si la original ya no existe o si el hueco de destino (coche + fecha +
+        hora) lo ocupa otra cita.
+        """
+        source = self._identity(original)
+        target = self._identity(moved)
+        replaced: List[dict] = []
+        
+        def change(data: List[dict]) -> bool:
+            #Ambas comprobaciones se hacen sobre los datos del disco, en la misma confirmacion
+            replaced.clear()
+            position = next((i for i, item in enumerate(data) if self._raw_key(item) == source), None)
+            if position is None:
+                return False
+            if any(self._raw_key(item) == target for i, item in enumerate(data) if i != position):
+                return False
+            replaced.append(data[position])
+            data[position] = self._appointment_to_dict(moved)
+            return True
         
-        self._write_json(new_data)
\ No newline at end of file
+        def sync(cache: AppointmentRows) -> AppointmentRows:
+            ids = cache.ids_of(original.car.plate, original.date, original.time)
+            return cache.replace(ids[0], self._appointment_to_row(moved))
+        
+        return self._replaced(replaced)[0] if self._mutate(change, sync) else None
+    
+    @staticmethod
+    def _raw_key(item: dict) -> Tuple[str, str, str]:
+        return (item.get('car_plate'), item.get('date'), item.get('time'))
+    
+    @staticmethod
+    def _identity(app: Appointment) -> Tuple[str, str, str]:
+        """Identidad de la cita tal y como se guarda (matricula, fecha, hora en texto)"""
+        return (app.car.plate, app.date.isoformat(), app.time.isoformat())
+    
+    def add_many(self, appointments: List[Appointment]) -> None:
+        """Añade todo el lote con una sola lectura y una sola escritura del fichero"""
+        if not appointments:
+            return
+        def change(data: List[dict]) -> bool:
+            data.extend(self._appointment_to_dict(app) for app in appointments)
+            return True
+        self._mutate(change, lambda cache: cache.add_many([self._appointment_to_row(app) for app in appointments]))
+    
+    def upsert_many(self, appointments: List[Appointment]) -> List[Appointment]:
+        """
+        Actualiza las citas que ya existen (coche + fecha + hora) y añade las demas con una
+        sola escritura; devuelve las filas que habia en disco y se han sustituido
+        """
+        if not appointments:
+            return []
+        replaced: Dict[int, dict] = {}
+        def change(data: List[dict]) -> bool:
+            replaced.clear()
+            stored = len(data)
+            positions: Dict[Tuple[str, str, str], int] = {}
+            for i, item in enumerate(data):
+                positions.setdefault(self._raw_key(item), i)
+            for app in appointments:
+                i = positions.setdefault(self._identity(app), len(data))
+                if i == len(data):
+                    data.append(self._appointment_to_dict(app))
+                else:
+                    #Si el lote repite una cita, solo cuenta la fila que habia en disco
+                    if i < stored:
+                        replaced.setdefault(i, data[i])
+                    data[i] = self._appointment_to_dict(app)
+            return True
+        self._mutate(change, lambda cache: cache.upsert_many([self._appointment_to_row(app) for app in appointments]))
+        return self._replaced(list(replaced.values()))
+    
+    def delete_many(self, appointments: List[Appointment]) -> List[Appointment]:
+        """Elimina todas las citas del lote con una sola escritura y devuelve las filas borradas"""
+        targets = {self._identity(app) for app in appointments}
+        removed: List[dict] = []
+        def change(data: List[dict]) -> bool:
+            removed.clear()
+            kept = []
+            for item in data:
+                (removed if self._raw_key(item) in targets else kept).append(item)
+            data[:] = kept
+            return bool(removed)
+        if not self._mutate(change, lambda cache: cache.remove_many({(app.car.plate, app.date, app.time) for app in appointments})):
+            return []
+        return self._replaced(removed)
@@ -0,0 +1,233 @@
+import heapq
+import os
+import threading
+from datetime import date, time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+from adapters.persistence.json_base import JsonRepositoryBase
+from adapters.persistence.json_codec import JsonCodec
+
+from core.domain.appointment import Appointment
+from core.domain.revenue import AgendaEntry, RevenueSummary
+
+# Secciones del fichero de agregados: cada una mapea clave -> [numero_citas, total_centimos]
+SECTIONS = ("daily", "monthly", "customers", "cars")
+# Agenda materializada de hoy en adelante: fecha -> [[hora, dni, matricula, centimos], ...]
+AGENDA = "agenda"
+# Version de los ficheros de citas que reflejan los agregados (ver source_files_version)
+SOURCE = "source"
+
+T = TypeVar('T')
+
+
+def source_files_version(*paths: str) -> List[Optional[List[int]]]:
+    """Version de los ficheros o carpetas de citas: [mtime_ns, tamaño] de cada uno, o None si no existe"""
+    version: List[Optional[List[int]]] = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            version.append(None)
+            continue
+        version.append([st.st_mtime_ns, st.st_size])
+    return version
+
+
+class AppointmentStatsJsonRepository(JsonRepositoryBase):
+    """
+    Agregados de citas materializados en un JSON junto al resto de repositorios.
+
+    Con source_version (version actual de los ficheros de citas) cada escritura guarda
+    la version que reflejan los agregados. Si ademas se da source (todas las citas), la
+    primera vez que se usan en el proceso se rehacen si no coinciden: una caida entre
+    la escritura de la cita y la de los agregados, o un fichero editado a mano.
+    """
+
+    def __init__(self, file_path: str, codec: Optional[JsonCodec] = None,
+                 source_version: Optional[Callable[[], Any]] = None,
+                 source: Optional[Callable[[], Iterable[Appointment]]] = None) -> None:
+        super().__init__(file_path, codec)
+        self._source_version = source_version
+        self._source = source
+        self._verified = source is None or source_version is None
+        self._verify_mutex = threading.Lock()
+
+    def _ensure_file_exists(self) -> None:
+        """
+        No se crea al abrir: una consulta de solo lectura no escribe en la carpeta de datos.
+        Hasta la primera escritura se lee como agregados vacios (y desfasados si hay citas).
+        """
+
+    def _read_json(self) -> Any:
+        #Los agregados se rehacen desde las citas: un fichero dañado se lee como vacio (sin SOURCE, desfasado)
+        try:
+            return super()._read_json()
+        except ValueError:
+            return {}
+
+    def _build_cache(self, raw) -> Dict[str, Any]:
+        #El fichero nace como una lista vacia: lo tratamos como agregados vacios
+        if not isinstance(raw, dict):
+            raw = {}
+        data: Dict[str, Any] = {section: raw.get(section, {}) for section in SECTIONS + (AGENDA,)}
+        data[SOURCE] = raw.get(SOURCE)
+        return data
+
+    def _verify(self) -> bool:
+        """Rehace los agregados si estan desfasados, solo la primera vez; True si los ha rehecho"""
+        if self._verified:
+            return False
+        with self._verify_mutex:
+            if self._verified:
+                return False
+            stale = self.is_stale()
+            if stale:
+                self.rebuild(self._source())
+            self._verified = True
+            return stale
+
+    def _query(self, read: Callable[[Any], T]) -> T:
+        self._verify()
+        return super()._query(read)
+
+    def _save(self, data: Dict[str, Any]) -> None:
+        """Escribe los agregados; solo con _rw de escritura y el cerrojo entre procesos"""
+        #Los dias pasados ya no forman parte de la agenda
+        today = date.today().isoformat()
+        for day in [d for d in data[AGENDA] if d < today]:
+            del data[AGENDA][day]
+        if self._source_version is not None:
+            data[SOURCE] = self._source_version()
+        self._write_json(data)
+        self._lock.bump(self._lock.generation())
+        self._cache = data
+        self._cache_key = self._file_key()
+
+    def _record(self, changes: Iterable[Tuple[Appointment, int]]) -> None:
+        #Las citas ya estan escritas: si hay que rehacer los agregados, el cambio ya va incluido
+        if self._verify():
+            return
+        #Los deltas se aplican sobre lo ultimo que haya en disco y con el cerrojo
+        #tomado, para no pisar los de otro proceso que comparta la carpeta de datos
+        with self._rw.write_locked(), self._lock:
+            data = self._cached()
+            #Sin SOURCE el fichero se ha perdido o dañado despues de comprobarlo: un delta no basta
+            lost = self._source is not None and self._source_version is not None and data[SOURCE] is None
+            if not lost:
+                try:
+                    for appointment, sign in changes:
+                        self._apply(data, appointment, sign)
+                    self._save(data)
+                except BaseException:
+                    #Los deltas ya tocaron la cache: que la proxima lectura vuelva al disco
+                    self._cache = None
+                    raise
+                return
+        #Las citas ya incluyen el cambio
+        self.rebuild(self._source())
+
+    @staticmethod
+    def _keys(appointment: Appointment) -> Iterable[Tuple[str, str]]:
+        """Claves de cada seccion a las que contribuye una cita"""
+        yield "daily", appointment.date.isoformat()
+        yield "monthly", f"{appointment.date.year:04d}-{appointment.date.month:02d}"
+        yield "customers", appointment.customer.dni
+        yield "cars", appointment.car.plate
+
+    def _apply(self, data: Dict[str, Dict[str, List[int]]], appointment: Appointment, sign: int) -> None:
+        cents = round(appointment.cost * 100)
+        for section, key in self._keys(appointment):
+            bucket = data[section].setdefault(key, [0, 0])
+            bucket[0] += sign
+            bucket[1] += sign * cents
+            #No guardamos claves sin citas para que el fichero no crezca con basura
+            if bucket[0] <= 0:
+                del data[section][key]
+        self._apply_agenda(data, appointment, sign)
+
+    @staticmethod
+    def _apply_agenda(data: Dict[str, dict], appointment: Appointment, sign: int) -> None:
+        if appointment.date < date.today():
+            return
+        day = appointment.date.isoformat()
+        entry = [appointment.time.isoformat(), appointment.customer.dni, appointment.car.plate, round(appointment.cost * 100)]
+        if sign > 0:
+            data[AGENDA].setdefault(day, []).append(entry)
+            data[AGENDA][day].sort()
+            return
+        entries = data[AGENDA].get(day, [])
+        for i, stored in enumerate(entries):
+            if stored[0] == entry[0] and stored[2] == entry[2]:
+                del entries[i]
+                break
+        if not entries:
+            data[AGENDA].pop(day, None)
+
+    @staticmethod
+    def _summary(bucket: Optional[List[int]]) -> RevenueSummary:
+        if not bucket:
+            return RevenueSummary()
+        return RevenueSummary(count=bucket[0], total_cents=bucket[1])
+
+    def _bucket(self, section: str, key: str) -> RevenueSummary:
+        #El resumen se construye dentro: los contadores se modifican en su sitio al escribir
+        return self._query(lambda data: self._summary(data[section].get(key)))
+
+    #Implementacion del Protocolo AppointmentStatsRepository
+    def record_added(self, appointment: Appointment) -> None:
+        self._record([(appointment, 1)])
+
+    def record_removed(self, appointment: Appointment) -> None:
+        self._record([(appointment, -1)])
+
+    def record_changes(self, added: Iterable[Appointment], removed: Iterable[Appointment]) -> None:
+        changes = [(appointment, -1) for appointment in removed] + [(appointment, 1) for appointment in added]
+        if changes:
+            self._record(changes)
+
+    def rebuild(self, appointments: Iterable[Appointment]) -> None:
+        data = self._build_cache({})
+        for appointment in appointments:
+            self._apply(data, appointment, 1)
+        with self._rw.write_locked(), self._lock:
+            self._save(data)
+        self._verified = True
+
+    def is_empty(self) -> bool:
+        return self._query(lambda data: not any(data[section] for section in SECTIONS))
+
+    def is_stale(self) -> bool:
+        if self._source_version is None:
+            return self.is_empty()
+        #Sin pasar por _verify: es justo lo que decide si hay que rehacerlos
+        return super()._query(lambda data: data[SOURCE]) != self._source_version()
+
+    def mark_in_sync(self) -> None:
+        with self._rw.write_locked(), self._lock:
+            self._save(self._cached())
+        self._verified = True
+
+    def daily(self, date_: date) -> RevenueSummary:
+        return self._bucket("daily", date_.isoformat())
+
+    def monthly(self, year: int, month: int) -> RevenueSummary:
+        return self._bucket("monthly", f"{year:04d}-{month:02d}")
+
+    def by_customer(self, dni: str) -> RevenueSummary:
+        return self._bucket("customers", dni)
+
+    def by_car(self, plate: str) -> RevenueSummary:
+        return self._bucket("cars", plate)
+
+    def top_customers(self, limit: int) -> List[Tuple[str, RevenueSummary]]:
+        def read(data: Dict[str, Dict[str, List[int]]]) -> List[Tuple[str, RevenueSummary]]:
+            best = heapq.nlargest(limit, data["customers"].items(), key=lambda kv: kv[1][1])
+            return [(dni, self._summary(bucket)) for dni, bucket in best]
+        return self._query(read)
+
+    def agenda(self, date_: date) -> List[AgendaEntry]:
+        entries = self._query(lambda data: [list(e) for e in data[AGENDA].get(date_.isoformat(), [])])
+        return [
+            AgendaEntry(time=time.fromisoformat(t), customer_dni=dni, car_plate=plate, cost=cents / 100)
+            for t, dni, plate, cents in entries
+        ]
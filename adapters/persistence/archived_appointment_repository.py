@@ -0,0 +1,150 @@
+import heapq
+from itertools import groupby
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Set, Tuple
+from datetime import date, time
+
+from core.domain.appointment import Appointment
+from core.ports.appointment_archive_repository import AppointmentArchiveRepository
+from core.ports.appointment_repository import AppointmetRepository
+
+if TYPE_CHECKING:
+    from adapters.analytics.appointment_columns import AppointmentColumns
+
+# Orden de las fuentes al mezclar: a igual fecha y hora, la cita viva va primero
+HOT, ARCHIVED = 0, 1
+
+
+def _key(appointment: Appointment) -> Tuple[str, date, time]:
+    return (appointment.car.plate, appointment.date, appointment.time)
+
+
+class ArchivedAppointmentRepository:
+    """
+    Decorador de AppointmetRepository que une el almacen vivo (citas recientes y
+    futuras) con el archivo historico de solo lectura.
+
+    Las lecturas devuelven las citas de los dos; si una cita esta en ambos (un
+    archivado cortado entre copiar y borrar) vale la del almacen vivo. Las
+    escrituras van solo al almacen vivo, y las que tocan una cita archivada
+    fallan con ValueError antes de cambiar nada.
+    """
+
+    def __init__(self, hot: AppointmetRepository, archive: AppointmentArchiveRepository) -> None:
+        self._hot = hot
+        self._archive = archive
+        #Ultima union de las instantaneas columnares y las dos partes de las que sale
+        self._columns: Optional[Tuple["AppointmentColumns", "AppointmentColumns", "AppointmentColumns"]] = None
+
+    def _reaches_archive(self, date_: date) -> bool:
+        newest = self._archive.newest_date()
+        return newest is not None and date_ <= newest
+
+    def _is_archived(self, appointment: Appointment) -> bool:
+        return self._reaches_archive(appointment.date) and self._archive.contains(appointment)
+
+    def _check_writable(self, appointments: Iterable[Appointment]) -> None:
+        for appointment in appointments:
+            if self._is_archived(appointment):
+                raise ValueError(
+                    f"La cita del coche {appointment.car.plate} del {appointment.date.isoformat()} "
+                    f"a las {appointment.time.strftime('%H:%M')} esta archivada y no se puede modificar"
+                )
+
+    def _only_archived(self, appointments: List[Appointment]) -> List[Appointment]:
+        """De las citas dadas, las que estan en el archivo pero no en el almacen vivo"""
+        candidates = [a for a in appointments if self._reaches_archive(a.date)]
+        if not candidates:
+            return []
+        live: Set[Tuple[str, date, time]] = set()
+        for day in {a.date for a in candidates}:
+            live.update(_key(a) for a in self._hot.find_by_date(day))
+        return [a for a in candidates if _key(a) not in live and self._archive.contains(a)]
+
+    @staticmethod
+    def _merge(archived: List[Appointment], hot: List[Appointment]) -> List[Appointment]:
+        if not archived:
+            return hot
+        live = {_key(a) for a in hot}
+        return [a for a in archived if _key(a) not in live] + hot
+
+    #Implementacion del Protocolo
+    def add(self, appointment: Appointment) -> None:
+        self._check_writable([appointment])
+        self._hot.add(appointment)
+
+    def add_many(self, appointments: List[Appointment]) -> None:
+        self._check_writable(appointments)
+        self._hot.add_many(appointments)
+
+    def list_all(self) -> List[Appointment]:
+        return self._merge(self._archive.list_all(), self._hot.list_all())
+
+    def find_by_date(self, date_: date) -> List[Appointment]:
+        hot = self._hot.find_by_date(date_)
+        if not self._reaches_archive(date_):
+            return hot
+        return self._merge(self._archive.find_by_date(date_), hot)
+
+    def find_by_customer(self, dni: str) -> List[Appointment]:
+        return self._merge(self._archive.find_by_customer(dni), self._hot.find_by_customer(dni))
+
+    def find_by_car(self, plate: str) -> List[Appointment]:
+        return self._merge(self._archive.find_by_car(plate), self._hot.find_by_car(plate))
+
+    def iter_range(self, start: Optional[date] = None, end: Optional[date] = None, dni: Optional[str] = None) -> Iterator[Appointment]:
+        """Mezcla en orden de fecha y hora los dos recorridos sin cargarlos enteros"""
+        if start is not None and not self._reaches_archive(start):
+            yield from self._hot.iter_range(start, end, dni)
+            return
+        sources = (
+            ((a.date, a.time, HOT, a) for a in self._hot.iter_range(start, end, dni)),
+            ((a.date, a.time, ARCHIVED, a) for a in self._archive.iter_range(start, end, dni)),
+        )
+        merged = heapq.merge(*sources, key=lambda item: item[:3])
+        for _, same_moment in groupby(merged, key=lambda item: item[:2]):
+            live: Set[str] = set()
+            for _, _, source, appointment in same_moment:
+                if source == HOT:
+                    live.add(appointment.car.plate)
+                    yield appointment
+                elif appointment.car.plate not in live:
+                    yield appointment
+
+    def export_columns(self) -> "AppointmentColumns":
+        """Instantanea columnar del archivo y el almacen vivo; en las citas repetidas vale la viva"""
+        from adapters.analytics.appointment_columns import AppointmentColumns
+        hot = self._hot.export_columns()
+        newest = self._archive.newest_date()
+        if newest is None:
+            return hot
+        archived = self._archive.export_columns()
+        cached = self._columns
+        if cached is not None and cached[0] is archived and cached[1] is hot:
+            return cached[2]
+        #Solo las citas vivas de dias ya archivados pueden estar en los dos
+        columns = AppointmentColumns.concat([archived.without(hot.filter(end=newest).keys()), hot])
+        self._columns = (archived, hot, columns)
+        return columns
+
+    def update(self, appointment: Appointment) -> List[Appointment]:
+        self._check_writable(self._only_archived([appointment]))
+        return self._hot.update(appointment)
+
+    def delete(self, appointment: Appointment) -> List[Appointment]:
+        self._check_writable(self._only_archived([appointment]))
+        return self._hot.delete(appointment)
+
+    def reschedule(self, original: Appointment, moved: Appointment) -> Optional[Appointment]:
+        self._check_writable(self._only_archived([original]))
+        #El hueco de destino tambien lo ocupa una cita archivada
+        if _key(moved) != _key(original) and self._only_archived([moved]):
+            return None
+        return self._hot.reschedule(original, moved)
+
+    def upsert_many(self, appointments: List[Appointment]) -> List[Appointment]:
+        self._check_writable(self._only_archived(appointments))
+        return self._hot.upsert_many(appointments)
+
+    def delete_many(self, appointments: List[Appointment]) -> List[Appointment]:
+        self._check_writable(self._only_archived(appointments))
+        return self._hot.delete_many(appointments)
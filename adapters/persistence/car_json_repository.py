@@ -1,16 +1,25 @@
-
-from typing import List, Optional
+from bisect import bisect_right
+from operator import attrgetter
+from typing import List, Optional, Tuple
 from dataclasses import asdict
 from datetime import date
 
-from adapters.persistence.json_base import JsonRepositoryBase
+from adapters.persistence.json_base import JsonRepositoryBase, restore_trusted
+from adapters.persistence.json_codec import JsonCodec
+from adapters.persistence.persistent import PersistentTable
 
 from core.domain.car import Car
 
+#Fila compacta para la instantanea de arranque: (matricula, marca, modelo, año, revision_ordinal o 0)
+CarRow = Tuple[str, str, str, int, int]
+#Indice por fecha de revision de una version de la tabla: (tabla, sin revision, fechas ordenadas, coches en ese orden)
+RevisionIndex = Tuple[PersistentTable, List[Car], List[date], List[Car]]
+
 
 class CarJsonRepository(JsonRepositoryBase):
-    def __init__(self, file_path: str) -> None:
-        super().__init__(file_path)
+    def __init__(self, file_path: str, codec: Optional[JsonCodec] = None) -> None:
+        super().__init__(file_path, codec)
+        self._revision_index: Optional[RevisionIndex] = None
     
     #Pasar de objeto a diccionario
     def _car_to_dict(self, car: Car) -> dict:
@@ -28,36 +37,123 @@ class CarJsonRepository(JsonRepositoryBase):
         
         return Car(**data)
     
+    def _build_cache(self, data: List[dict]) -> PersistentTable[str, Car]:
+        """Tabla versionada matricula -> Car en el orden del fichero"""
+        return PersistentTable(attrgetter('plate'), (self._dict_to_car(item) for item in data))
+    
+    #Instantanea de arranque (ver adapters/persistence/startup_snapshot.py)
+    def dump_rows(self) -> List[CarRow]:
+        return [
+            (c.plate, c.brand, c.model, c.year, c.last_revision.toordinal() if c.last_revision else 0)
+            for c in self.list_all()
+        ]
+    
+    def load_rows(self, rows: List[CarRow]) -> None:
+        #Las filas salen de objetos ya validados: no repetimos las validaciones
+        self._install_cache(PersistentTable(attrgetter('plate'), (
+            restore_trusted(Car, plate=plate, brand=brand, model=model, year=year,
+                            last_revision=date.fromordinal(revision) if revision else None)
+            for plate, brand, model, year, revision in rows
+        )))
+    
     #Implementacion del Protocolo
     def add(self, car: Car) -> None:
-        cars_data = self._read_json()
-        cars_data.append(self._car_to_dict(car))
-        self._write_json(cars_data)
+        """Guarda un coche nuevo; ValueError sin escribir nada si la clave ya existe"""
+        #Con la comprobacion en disco el fichero y la cache nunca difieren (nada de repetidos en el fichero)
+        if not self.add_if_absent(car):
+            raise ValueError(f"Ya existe un coche con matricula {car.plate}")
+    
+    def add_if_absent(self, car: Car) -> bool:
+        """Añade el registro solo si su clave no existe; la comprobacion y la escritura son un solo paso"""
+        def change(cars_data: List[dict]) -> bool:
+            #Se comprueba sobre lo que hay en disco: si otro proceso escribe antes de confirmar, se repite
+            if any(item.get('plate') == car.plate for item in cars_data):
+                return False
+            cars_data.append(self._car_to_dict(car))
+            return True
+        return self._mutate(change, lambda cars: cars.put_if_absent(car))
+    
+    def add_many(self, cars: List[Car]) -> None:
+        """Añade todo el lote con una sola lectura y una sola escritura del fichero"""
+        if not cars:
+            return
+        def change(cars_data: List[dict]) -> bool:
+            #Como en add: si alguna clave ya esta en disco (o se repite en el lote) no se escribe nada
+            seen = {item.get('plate') for item in cars_data}
+            clashes = []
+            for car in cars:
+                if car.plate in seen:
+                    clashes.append(car.plate)
+                seen.add(car.plate)
+            if clashes:
+                raise ValueError(f"Ya existen coches con matricula {', '.join(clashes)}")
+            cars_data.extend(self._car_to_dict(c) for c in cars)
+            return True
+        self._mutate(change, lambda table: table.put_many(cars, replace=False))
     
     def get_by_plate(self, plate: str) -> Optional[Car]:
-        cars_data = self._read_json()
-        for car_dict in cars_data:
-            if car_dict.get('plate') == plate:
-                return self._dict_to_car(car_dict)
-        return None
+        return self._snapshot().get(plate)
     
     def list_all(self) -> List[Car]:
-        cars_data = self._read_json()
-        return [self._dict_to_car(d) for d in cars_data]
+        return self._snapshot().values()
+    
+    def list_due_for_revision(self, cutoff: date) -> List[Car]:
+        """Coches sin revision y, con una busqueda binaria, los revisados en cutoff o antes (los mas antiguos primero)"""
+        table = self._snapshot()
+        index = self._revision_index
+        #Las versiones de la tabla son inmutables: el indice vale mientras no se publique otra
+        if index is None or index[0] is not table:
+            never = [car for car in table if car.last_revision is None]
+            revised = sorted((car for car in table if car.last_revision is not None), key=attrgetter('last_revision'))
+            index = (table, never, [car.last_revision for car in revised], revised)
+            self._revision_index = index
+        _, never, dates, revised = index
+        return never + revised[:bisect_right(dates, cutoff)]
     
     def update(self, car: Car) -> None:
-        cars_data = self._read_json()
-        updated = False
-        for i, car_dict in enumerate(cars_data):
-            if car_dict.get('plate') == car.plate:
-                cars_data[i] = self._car_to_dict(car)
-                updated = True
-                break
-        if updated:
-            self._write_json(cars_data)
+        self.update_if_present(car)
+    
+    def update_if_present(self, car: Car) -> bool:
+        """Sustituye el registro si existe; la comprobacion y la escritura son un solo paso"""
+        def change(cars_data: List[dict]) -> bool:
+            for i, car_dict in enumerate(cars_data):
+                if car_dict.get('plate') == car.plate:
+                    cars_data[i] = self._car_to_dict(car)
+                    return True
+            return False
+        return self._mutate(change, lambda cars: cars.put(car))
     
     def delete(self, plate: str) -> None:
-        cars_data = self._read_json()
-        #Filtramos la lista nos quedamos con los que NO tengan esa matricula
-        new_data = [c for c in cars_data if c.get('plate') != plate]
-        self._write_json(new_data)
\ No newline at end of file
+        def change(cars_data: List[dict]) -> bool:
+            #Filtramos la lista nos quedamos con los que NO tengan esa matricula
+            cars_data[:] = [c for c in cars_data if c.get('plate') != plate]
+            return True
+        self._mutate(change, lambda cars: cars.remove(plate))
+    
+    def upsert_many(self, cars: List[Car]) -> None:
+        """Inserta los coches nuevos y sustituye los existentes (matricula) con una sola escritura"""
+        if not cars:
+            return
+        def change(cars_data: List[dict]) -> bool:
+            #Como en update, si hubiera repetidos manda la primera aparicion
+            positions = {}
+            for i, item in enumerate(cars_data):
+                positions.setdefault(item.get('plate'), i)
+            for car in cars:
+                i = positions.get(car.plate)
+                if i is None:
+                    positions[car.plate] = len(cars_data)
+                    cars_data.append(self._car_to_dict(car))
+                else:
+                    cars_data[i] = self._car_to_dict(car)
+            return True
+        self._mutate(change, lambda table: table.put_many(cars))
+    
+    def delete_many(self, plates: List[str]) -> None:
+        """Elimina todos los coches de la lista con una sola escritura"""
+        targets = set(plates)
+        def change(cars_data: List[dict]) -> bool:
+            before = len(cars_data)
+            cars_data[:] = [item for item in cars_data if item.get('plate') not in targets]
+            return len(cars_data) != before
+        self._mutate(change, lambda table: table.remove_many(targets))
@@ -1,13 +1,19 @@
-from typing import List, Optional
+from operator import attrgetter
+from typing import List, Optional, Tuple
 from dataclasses import asdict
 from datetime import date
 
 from core.domain.customer import Customer
-from adapters.persistence.json_base import JsonRepositoryBase
+from adapters.persistence.json_base import JsonRepositoryBase, restore_trusted
+from adapters.persistence.json_codec import JsonCodec
+from adapters.persistence.persistent import PersistentTable
+
+#Fila compacta para la instantanea de arranque: (dni, nombre, apellidos, nacimiento_ordinal, email, telefono)
+CustomerRow = Tuple[str, str, str, int, str, str]
 
 class CustomerJsonRepository(JsonRepositoryBase):
-    def __init__(self, file_path: str) -> None:
-        super().__init__(file_path)
+    def __init__(self, file_path: str, codec: Optional[JsonCodec] = None) -> None:
+        super().__init__(file_path, codec)
     
     def _customer_to_dict(self, customer: Customer) -> dict:
         """Convierte Objeto Customer -> Diccionario JSON"""
@@ -24,35 +30,109 @@ class CustomerJsonRepository(JsonRepositoryBase):
         #El doble asterisco desempaqueta el diccionario en argumentos nombrados
         return Customer(**data)
     
+    def _build_cache(self, data: List[dict]) -> PersistentTable[str, Customer]:
+        """Tabla versionada dni -> Customer en el orden del fichero"""
+        return PersistentTable(attrgetter('dni'), (self._dict_to_customer(item) for item in data))
+    
+    #Instantanea de arranque (ver adapters/persistence/startup_snapshot.py)
+    def dump_rows(self) -> List[CustomerRow]:
+        return [
+            (c.dni, c.name, c.surname, c.birth_date.toordinal(), c.email, c.phone)
+            for c in self.list_all()
+        ]
+    
+    def load_rows(self, rows: List[CustomerRow]) -> None:
+        #Las filas salen de objetos ya validados: no repetimos las validaciones
+        self._install_cache(PersistentTable(attrgetter('dni'), (
+            restore_trusted(Customer, dni=dni, name=name, surname=surname,
+                            birth_date=date.fromordinal(birth), email=email, phone=phone)
+            for dni, name, surname, birth, email, phone in rows
+        )))
+    
     #Implementacion del Protocolo CustomerRepository
     def add(self, customer: Customer) -> None:
-        customers_data = self._read_json()
-        customers_data.append(self._customer_to_dict(customer))
-        self._write_json(customers_data)
+        """Guarda un cliente nuevo; ValueError sin escribir nada si la clave ya existe"""
+        #Con la comprobacion en disco el fichero y la cache nunca difieren (nada de repetidos en el fichero)
+        if not self.add_if_absent(customer):
+            raise ValueError(f"Ya existe un cliente con DNI {customer.dni}")
+    
+    def add_if_absent(self, customer: Customer) -> bool:
+        """Añade el registro solo si su clave no existe; la comprobacion y la escritura son un solo paso"""
+        def change(customers_data: List[dict]) -> bool:
+            #Se comprueba sobre lo que hay en disco: si otro proceso escribe antes de confirmar, se repite
+            if any(item.get('dni') == customer.dni for item in customers_data):
+                return False
+            customers_data.append(self._customer_to_dict(customer))
+            return True
+        return self._mutate(change, lambda customers: customers.put_if_absent(customer))
+    
+    def add_many(self, customers: List[Customer]) -> None:
+        """Añade todo el lote con una sola lectura y una sola escritura del fichero"""
+        if not customers:
+            return
+        def change(customers_data: List[dict]) -> bool:
+            #Como en add: si alguna clave ya esta en disco (o se repite en el lote) no se escribe nada
+            seen = {item.get('dni') for item in customers_data}
+            clashes = []
+            for customer in customers:
+                if customer.dni in seen:
+                    clashes.append(customer.dni)
+                seen.add(customer.dni)
+            if clashes:
+                raise ValueError(f"Ya existen clientes con DNI {', '.join(clashes)}")
+            customers_data.extend(self._customer_to_dict(c) for c in customers)
+            return True
+        self._mutate(change, lambda table: table.put_many(customers, replace=False))
     
     def get_by_dni(self, dni: str) -> Optional[Customer]:
-        customers_data = self._read_json()
-        for cust_dict in customers_data:
-            if cust_dict.get('dni') == dni:
-                return self._dict_to_customer(cust_dict)
-        return None
+        return self._snapshot().get(dni)
     
     def list_all(self) -> List[Customer]:
-        customers_data = self._read_json()
-        return [self._dict_to_customer(d) for d in customers_data]
+        return self._snapshot().values()
     
     def update(self, customer: Customer) -> None:
-        customers_data = self._read_json()
-        updated = False
-        for i, cust_dict in enumerate(customers_data):
-            if cust_dict.get('dni') == customer.dni:
-                customers_data[i] = self._customer_to_dict(customer)
-                updated = True
-                break
-        if updated:
-            self._write_json(customers_data)
+        self.update_if_present(customer)
+    
+    def update_if_present(self, customer: Customer) -> bool:
+        """Sustituye el registro si existe; la comprobacion y la escritura son un solo paso"""
+        def change(customers_data: List[dict]) -> bool:
+            for i, cust_dict in enumerate(customers_data):
+                if cust_dict.get('dni') == customer.dni:
+                    customers_data[i] = self._customer_to_dict(customer)
+                    return True
+            return False
+        return self._mutate(change, lambda customers: customers.put(customer))
     
     def delete(self, dni: str) -> None:
-        customers_data = self._read_json()
-        new_data = [c for c in customers_data if c.get('dni') != dni]
-        self._write_json(new_data)
\ No newline at end of file
+        def change(customers_data: List[dict]) -> bool:
+            customers_data[:] = [c for c in customers_data if c.get('dni') != dni]
+            return True
+        self._mutate(change, lambda customers: customers.remove(dni))
+    
+    def upsert_many(self, customers: List[Customer]) -> None:
+        """Inserta los clientes nuevos y sustituye los existentes (DNI) con una sola escritura"""
+        if not customers:
+            return
+        def change(customers_data: List[dict]) -> bool:
+            #Como en update, si hubiera repetidos manda la primera aparicion
+            positions = {}
+            for i, item in enumerate(customers_data):
+                positions.setdefault(item.get('dni'), i)
+            for customer in customers:
+                i = positions.get(customer.dni)
+                if i is None:
+                    positions[customer.dni] = len(customers_data)
+                    customers_data.append(self._customer_to_dict(customer))
+                else:
+                    customers_data[i] = self._customer_to_dict(customer)
+            return True
+        self._mutate(change, lambda table: table.put_many(customers))
+    
+    def delete_many(self, dnis: List[str]) -> None:
+        """Elimina todos los clientes de la lista con una sola escritura"""
+        targets = set(dnis)
+        def change(customers_data: List[dict]) -> bool:
+            before = len(customers_data)
+            customers_data[:] = [item for item in customers_data if item.get('dni') not in targets]
+            return len(customers_data) != before
+        self._mutate(change, lambda table: table.remove_many(targets))
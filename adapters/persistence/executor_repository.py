@@ -0,0 +1,43 @@
+import asyncio
+import functools
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any
+
+DEFAULT_MAX_WORKERS = 8
+
+
+def make_io_executor(max_workers: int = DEFAULT_MAX_WORKERS) -> ThreadPoolExecutor:
+    """Pool acotado para la E/S bloqueante de los repositorios"""
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="repo-io")
+
+
+class ExecutorRepository:
+    """
+    Adapta un repositorio sincrono (JSON, ...) a su puerto asincrono: cada metodo
+    publico devuelve una corrutina que ejecuta la llamada bloqueante en el executor,
+    sin bloquear el bucle de eventos.
+
+    Los repositorios JSON ya son seguros entre hilos (lecturas en paralelo,
+    escrituras en exclusiva), asi que las llamadas no se serializan aqui.
+    """
+
+    def __init__(self, target: Any, executor: Executor) -> None:
+        self._target = target
+        self._executor = executor
+
+    def __getattr__(self, attr: str) -> Any:
+        value = getattr(self._target, attr)
+        if attr.startswith("_") or not callable(value):
+            return value
+
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            loop = asyncio.get_running_loop()
+            call = functools.partial(value, *args, **kwargs)
+            return await loop.run_in_executor(self._executor, call)
+
+        wrapper.__name__ = attr
+        wrapper.__doc__ = getattr(value, "__doc__", None)
+        return wrapper
+
+    def __repr__(self) -> str:
+        return f"ExecutorRepository({self._target!r})"
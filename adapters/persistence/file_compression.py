@@ -0,0 +1,190 @@
+"""
+Compresion transparente de los ficheros de datos JSON.
+
+La compresion de cada fichero la decide su extension: customers.json.gz (gzip),
+customers.json.xz (lzma) o customers.json.zst (zstd, con el modulo zstandard o
+compression.zstd si estan). Sin ninguna de ellas el fichero va tal cual.
+
+Lectura y escritura son en streaming y por trozos: al leer nunca estan a la vez
+en memoria el fichero comprimido y el descomprimido, y al escribir el comprimido
+sale al disco trozo a trozo.
+
+data_file() elige la ruta de cada fichero en la carpeta de datos: si ya existe
+en alguna de las variantes se usa esa, y si no la de la compresion configurada
+(TALLER_COMPRESSION=none|gzip|lzma|zstd, por defecto none).
+"""
+import gzip
+import io
+import lzma
+import os
+import zlib
+from contextlib import nullcontext
+from typing import IO, Any, ContextManager, Dict, List, Optional, Tuple, Type
+
+#zstd: compression.zstd (Python 3.14+) o el paquete zstandard; los dos son opcionales
+try:
+    from compression import zstd
+except ImportError:  # pragma: no cover - depende del entorno
+    zstd = None
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depende del entorno
+    zstandard = None
+
+# Tamaño de los trozos en los que se lee y escribe
+CHUNK_SIZE = 1024 * 1024
+
+
+class Compression:
+    """Sin compresion: el fichero se lee y escribe tal cual"""
+
+    name = "none"
+    extension = ""
+    # Excepciones de un fichero comprimido mal formado o cortado
+    errors: Tuple[Type[BaseException], ...] = ()
+
+    def __init__(self, level: Optional[int] = None) -> None:
+        self.level = level
+
+    def reader(self, raw: IO[bytes]) -> ContextManager[IO[bytes]]:
+        """Flujo descomprimido sobre raw (no lo cierra)"""
+        return nullcontext(raw)
+
+    def writer(self, raw: IO[bytes]) -> ContextManager[IO[bytes]]:
+        """Flujo que comprime hacia raw (no lo cierra)"""
+        return nullcontext(raw)
+
+    def read(self, raw: IO[bytes]) -> bytearray:
+        """Contenido descomprimido de raw, acumulado trozo a trozo en un solo buffer"""
+        data = bytearray()
+        with self.reader(raw) as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    return data
+                data += chunk
+
+    def decompress(self, data: bytes) -> bytes:
+        """Descomprime de una vez un trozo pequeño ya en memoria (sin el coste de montar un flujo)"""
+        return bytes(self.read(io.BytesIO(data)))
+
+    def write(self, raw: IO[bytes], payload: bytes) -> None:
+        """Escribe payload comprimido en raw, trozo a trozo"""
+        view = memoryview(payload)
+        with self.writer(raw) as f:
+            for start in range(0, len(view), CHUNK_SIZE):
+                f.write(view[start:start + CHUNK_SIZE])
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(level={self.level})"
+
+
+class GzipCompression(Compression):
+    name = "gzip"
+    extension = ".gz"
+    errors = (gzip.BadGzipFile, zlib.error, EOFError)
+    # El 9 de gzip cuesta mucha CPU para apenas ganar espacio en JSON
+    default_level = 6
+
+    def reader(self, raw: IO[bytes]) -> ContextManager[IO[bytes]]:
+        return gzip.GzipFile(fileobj=raw, mode="rb")
+
+    def decompress(self, data: bytes) -> bytes:
+        return gzip.decompress(data)
+
+    def writer(self, raw: IO[bytes]) -> ContextManager[IO[bytes]]:
+        #mtime=0: mismos datos, mismo fichero
+        return gzip.GzipFile(fileobj=raw, mode="wb", mtime=0,
+                             compresslevel=self.default_level if self.level is None else self.level)
+
+
+class LzmaCompression(Compression):
+    name = "lzma"
+    extension = ".xz"
+    errors = (lzma.LZMAError, EOFError)
+    # Los presets altos son muy lentos escribiendo; el 1 ya comprime mas que gzip
+    default_level = 1
+
+    def reader(self, raw: IO[bytes]) -> ContextManager[IO[bytes]]:
+        return lzma.LZMAFile(raw, mode="rb")
+
+    def decompress(self, data: bytes) -> bytes:
+        return lzma.decompress(data)
+
+    def writer(self, raw: IO[bytes]) -> ContextManager[IO[bytes]]:
+        return lzma.LZMAFile(raw, mode="wb", preset=self.default_level if self.level is None else self.level)
+
+
+class ZstdCompression(Compression):
+    name = "zstd"
+    extension = ".zst"
+    errors = tuple(e for e in (getattr(zstd, "ZstdError", None), getattr(zstandard, "ZstdError", None), EOFError) if e)
+    default_level = 3
+
+    def _level(self) -> int:
+        return self.default_level if self.level is None else self.level
+
+    def reader(self, raw: IO[bytes]) -> ContextManager[IO[bytes]]:
+        if zstd is not None:
+            return zstd.ZstdFile(raw, mode="rb")
+        return zstandard.ZstdDecompressor().stream_reader(raw, closefd=False)
+
+    def writer(self, raw: IO[bytes]) -> ContextManager[IO[bytes]]:
+        if zstd is not None:
+            return zstd.ZstdFile(raw, mode="wb", level=self._level())
+        return zstandard.ZstdCompressor(level=self._level()).stream_writer(raw, closefd=False)
+
+
+# nombre -> (clase, modulo del que depende o None si no esta instalado)
+COMPRESSIONS: Dict[str, Tuple[Type[Compression], Any]] = {
+    "none": (Compression, os),
+    "gzip": (GzipCompression, gzip),
+    "lzma": (LzmaCompression, lzma),
+    "zstd": (ZstdCompression, zstd or zstandard),
+}
+# extension -> nombre
+EXTENSIONS: Dict[str, str] = {cls.extension: name for name, (cls, _) in COMPRESSIONS.items() if cls.extension}
+
+
+def available_compressions() -> List[str]:
+    """Compresiones que se pueden usar en este entorno"""
+    return [name for name, (_, module) in COMPRESSIONS.items() if module is not None]
+
+
+def make_compression(name: str = "none", level: Optional[int] = None) -> Compression:
+    if name not in COMPRESSIONS:
+        raise ValueError(f"Compresion desconocida: {name} (opciones: {', '.join(COMPRESSIONS)})")
+    cls, module = COMPRESSIONS[name]
+    if module is None:
+        raise ValueError(f"La compresion {name} no esta disponible (pip install zstandard)")
+    return cls(level)
+
+
+def compression_for(path: str) -> Compression:
+    """Compresion de un fichero segun su extension (.gz, .xz, .zst o ninguna)"""
+    return make_compression(EXTENSIONS.get(os.path.splitext(path)[1], "none"))
+
+
+def configured_compression() -> str:
+    """Compresion de los ficheros nuevos segun TALLER_COMPRESSION"""
+    return os.environ.get("TALLER_COMPRESSION", "none")
+
+
+def data_file(data_dir: str, name: str, compression: Optional[str] = None) -> str:
+    """
+    Ruta del fichero name (p. ej. customers.json) en data_dir: la variante que ya exista
+    (primero la de la compresion pedida) o, si no hay ninguna, la de la compresion pedida
+    (por defecto la configurada).
+    """
+    wanted = make_compression(compression or configured_compression()).extension
+    variants = [wanted] + [ext for ext in ("",) + tuple(EXTENSIONS) if ext != wanted]
+    for extension in variants:
+        path = os.path.join(data_dir, name + extension)
+        if os.path.exists(path):
+            return path
+    return os.path.join(data_dir, name + wanted)
+
+
+def data_file_variants(data_dir: str, name: str) -> List[str]:
+    """Todas las rutas posibles del fichero name, comprimido o no"""
+    return [os.path.join(data_dir, name + ext) for ext in ("",) + tuple(EXTENSIONS)]
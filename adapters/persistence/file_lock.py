@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+#Cerrojo consultivo entre procesos: fcntl en POSIX, msvcrt en Windows
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+# La generacion ocupa siempre GEN_WIDTH bytes al principio del fichero de cerrojo
+GEN_WIDTH = 20
+# En Windows los bloqueos de rango son obligatorios: bloqueamos un byte lejos de la generacion
+_MSVCRT_LOCK_OFFSET = 64
+
+
+@dataclass
+class LockStats:
+    """Contadores de contencion de un cerrojo (por proceso)"""
+
+    acquisitions: int = 0
+    wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    commits: int = 0
+    retries: int = 0
+
+
+class FileLock:
+    """
+    Cerrojo exclusivo entre procesos (y entre hilos del mismo proceso) sobre un
+    fichero auxiliar <datos>.lock, que ademas guarda la generacion de los datos:
+    un contador que sube en cada escritura confirmada.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.stats = LockStats()
+        #flock no excluye a los hilos que comparten descriptor: lo cubre este Lock
+        self._thread_lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+
+    def __enter__(self) -> "FileLock":
+        start = time.perf_counter()
+        self._thread_lock.acquire()
+        try:
+            self._acquire_os()
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        waited = time.perf_counter() - start
+        self.stats.acquisitions += 1
+        self.stats.wait_seconds += waited
+        self.stats.max_wait_seconds = max(self.stats.max_wait_seconds, waited)
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        try:
+            self._release_os()
+        finally:
+            self._thread_lock.release()
+
+    def _acquire_os(self) -> None:
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            os.lseek(self._fd, _MSVCRT_LOCK_OFFSET, os.SEEK_SET)
+            while True:
+                try:
+                    msvcrt.locking(self._fd, msvcrt.LK_NBLCK, 1)
+                    return
+                except OSError:
+                    time.sleep(0.005)
+
+    def _release_os(self) -> None:
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        elif msvcrt is not None:
+            os.lseek(self._fd, _MSVCRT_LOCK_OFFSET, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+
+    def generation(self) -> int:
+        """Generacion actual; se puede leer sin el cerrojo (la escritura es de tamaño fijo)"""
+        with open(self.path, "rb") as f:
+            raw = f.read(GEN_WIDTH).strip()
+        return int(raw) if raw else 0
+
+    def bump(self, generation: int) -> int:
+        """Publica la generacion siguiente. Solo con el cerrojo adquirido"""
+        generation += 1
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        os.write(self._fd, b"%*d" % (GEN_WIDTH, generation))
+        return generation
+
+    def close(self) -> None:
+        os.close(self._fd)
@@ -1,32 +1,213 @@
-import json
 import os
-from typing import List, TypeVar
+import threading
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from typing import Any, Callable, List, Optional, Tuple, TypeVar
+
+from adapters.persistence.file_compression import compression_for
+from adapters.persistence.file_lock import FileLock
+from adapters.persistence.json_codec import JsonCodec, default_codec
+from adapters.persistence.rwlock import ReadWriteLock
 
 T = TypeVar('T')
 
-class JsonRepositoryBase:
-    """Clase base que maneja las operaciones CRUD básicas de JSON"""
+# Intentos optimistas de una escritura antes de hacerla entera bajo el cerrojo
+MAX_COMMIT_RETRIES = 3
+
+# Observadores de E/S para instrumentacion opcional: callback(kind, path, nbytes)
+# con kind "read" o "write". Sin observadores no se calcula nada extra.
+IoObserver = Callable[[str, str, int], None]
+_io_observers: List[IoObserver] = []
+
+
+def add_io_observer(observer: IoObserver) -> None:
+    """Registra un observador que recibe cada lectura/escritura de fichero JSON"""
+    _io_observers.append(observer)
+
+
+def remove_io_observer(observer: IoObserver) -> None:
+    """Quita un observador registrado (si no estaba, no hace nada)"""
+    if observer in _io_observers:
+        _io_observers.remove(observer)
+
+
+def _notify_io(kind: str, path: str, nbytes: int) -> None:
+    for observer in list(_io_observers):
+        observer(kind, path, nbytes)
+
+
+def restore_trusted(cls: type, **fields: Any) -> Any:
+    """Reconstruye un objeto de dominio ya validado sin pasar por __post_init__"""
+    obj = cls.__new__(cls)
+    obj.__dict__.update(fields)
+    return obj
+
+
+class JsonRepositoryBase(ABC):
+    """
+    Clase base que maneja las operaciones CRUD básicas de JSON.
+    Cada repositorio implementa _build_cache (filas crudas -> cache en memoria).
+    """
     
-    def __init__(self, file_path: str) -> None:
+    def __init__(self, file_path: str, codec: Optional[JsonCodec] = None) -> None:
         """Configura la ruta del archivo y se asegura que existe"""
         self._file_path = file_path
+        #Compresion segun la extension (.gz, .xz, .zst); ver adapters/persistence/file_compression.py
+        self._compression = compression_for(file_path)
         self._ensure_file_exists()
+        #Codificador JSON (ver adapters/persistence/json_codec.py); por defecto segun TALLER_JSON_CODEC
+        self._codec = codec or default_codec()
+        #Cerrojo entre procesos (<fichero>.lock) con la generacion de los datos
+        self._lock = FileLock(file_path + ".lock")
+        #Entre hilos: lectores en paralelo sobre la cache, escritores en exclusiva
+        self._rw = ReadWriteLock()
+        self._write_mutex = threading.Lock()
+        #Cache de las filas ya convertidas y version del fichero de la que salieron
+        self._cache: Any = None
+        self._cache_key: Optional[Tuple[int, int, int]] = None
     
     def _ensure_file_exists(self):
         """Crea el archivo json vacio si no existe para evitar errores"""
         if not os.path.exists(self._file_path):
-            with open(self._file_path, 'w', encoding='utf-8') as f:
-                json.dump([], f)
+            with open(self._file_path, 'wb') as f:
+                self._compression.write(f, b"[]")
     
     def _read_json(self) -> List[dict]:
-        """Leer el archivo JSON y devuelve una lista de diccionarios"""
+        """
+        Leer el archivo JSON y devuelve una lista de diccionarios ([] si no existe).
+        Un fichero cortado o dañado lanza ValueError: leerlo como vacio haria que la
+        siguiente escritura lo sustituyera por solo el cambio, perdiendo todo lo demas.
+        """
         try:
-            with open(self._file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
+            with open(self._file_path, 'rb') as f:
+                #Se descomprime en streaming: en memoria solo esta el JSON descomprimido
+                raw = self._compression.read(f)
+                size = os.fstat(f.fileno()).st_size
+            data = self._codec.loads(raw)
+        except FileNotFoundError:
             return []
+        except (*self._compression.errors, *self._codec.errors) as ex:
+            raise ValueError(f"{self._file_path} esta dañado y no se puede leer ({type(ex).__name__}: {ex})") from ex
+        if _io_observers:
+            _notify_io("read", self._file_path, size)
+        return data
+    
+    def _write_tmp(self, data: Any) -> str:
+        """Escribe los datos en un temporal junto al fichero y devuelve su ruta"""
+        tmp_path = f"{self._file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        raw = self._codec.dumps(data)
+        with open(tmp_path, 'wb') as f:
+            self._compression.write(f, raw)
+            f.flush()
+            #El rename solo es atomico frente a un corte si los datos ya estan en disco
+            os.fsync(f.fileno())
+            size = f.tell()
+        if _io_observers:
+            _notify_io("write", self._file_path, size)
+        return tmp_path
+    
+    def _write_json(self, data: Any) -> None:
+        """Escribe los datos en el archivo JSON de forma atomica (temporal + rename)"""
+        #Un lector nunca ve el fichero a medio escribir: ve el anterior o el nuevo
+        os.replace(self._write_tmp(data), self._file_path)
+    
+    def _file_key(self) -> Optional[Tuple[int, int, int]]:
+        """Version del fichero en disco (mtime_ns, tamaño, inodo) o None si no existe"""
+        try:
+            st = os.stat(self._file_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+    
+    @abstractmethod
+    def _build_cache(self, data: List[dict]) -> Any:
+        """Convierte las filas crudas en la estructura en memoria de cada repositorio"""
+    
+    def _cached(self) -> Any:
+        """Devuelve la cache en memoria, reconstruyendola solo si el fichero ha cambiado (con _rw de escritura)"""
+        key = self._file_key()
+        if self._cache is None or key != self._cache_key:
+            self._cache = self._build_cache(self._read_json())
+            self._cache_key = key
+        return self._cache
+    
+    def _query(self, read: Callable[[Any], T]) -> T:
+        """
+        Ejecuta read sobre la cache con el cerrojo de lectura: muchos lectores a la vez
+        y ninguno ve una escritura a medias. read debe devolver datos ya materializados.
+        Si la cache esta caducada se recarga con el cerrojo de escritura.
+        """
+        with self._rw.read_locked():
+            if self._cache is not None and self._file_key() == self._cache_key:
+                return read(self._cache)
+        with self._rw.write_locked():
+            return read(self._cached())
+    
+    def _snapshot(self) -> Any:
+        """
+        Version publicada de la cache. Solo para caches inmutables: el lector la fija y
+        la recorre sin cerrojos mientras los escritores publican la siguiente.
+        """
+        return self._query(lambda cache: cache)
+    
+    def _mutate(self, change: Callable[[List[dict]], bool], sync: Callable[[Any], Any]) -> bool:
+        """
+        Aplica change sobre las filas crudas y escribe si devuelve True; sync recibe la
+        cache publicada y devuelve la version siguiente sin modificar la anterior.
+        
+        Escritura optimista: se lee y se prepara el fichero nuevo sin cerrojo y solo
+        se bloquea para comprobar que la generacion no ha cambiado y renombrar. Si otro
+        proceso ha escrito entretanto, change se repite sobre los datos nuevos (los
+        cambios que no chocan se combinan solos). Tras MAX_COMMIT_RETRIES intentos
+        se hace la lectura-modificacion-escritura entera bajo el cerrojo.
+        """
+        #Los escritores del mismo proceso van de uno en uno; los lectores siguen mientras se prepara el fichero
+        with self._write_mutex:
+            for _ in range(MAX_COMMIT_RETRIES):
+                result = self._try_mutate(change, sync, locked=False)
+                if result is not None:
+                    return result
+                self._lock.stats.retries += 1
+            with self._lock:
+                return self._try_mutate(change, sync, locked=True)
+    
+    def _try_mutate(self, change: Callable[[List[dict]], bool], sync: Callable[[Any], Any], locked: bool) -> Optional[bool]:
+        """Un intento de _mutate; None si otro proceso ha escrito antes de confirmar"""
+        #Primero la generacion y luego los datos: si cambian entre medias, el commit falla
+        generation = self._lock.generation()
+        key = self._file_key()
+        data = self._read_json()
+        if not change(data):
+            return False
+        tmp_path = self._write_tmp(data)
+        try:
+            #La version siguiente se deriva sin bloquear a nadie; solo vale si la cache
+            #reflejaba exactamente los datos que hemos modificado
+            base = self._cache
+            derived = sync(base) if base is not None and key == self._cache_key else None
+            
+            #Publicar el fichero y la version nueva de la cache es un solo paso para los lectores
+            with self._rw.write_locked():
+                with nullcontext() if locked else self._lock:
+                    if self._lock.generation() != generation:
+                        return None
+                    os.replace(tmp_path, self._file_path)
+                    self._lock.bump(generation)
+                    new_key = self._file_key()
+                self._lock.stats.commits += 1
+                
+                if derived is not None and self._cache is base:
+                    self._cache = derived
+                    self._cache_key = new_key
+                else:
+                    self._cache = None
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return True
     
-    def _write_json(self, data: List[dict]) -> None:
-        """Escribe la lista de diccionarios en el archivo JSON"""
-        with open(self._file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
\ No newline at end of file
+    def _install_cache(self, cache: Any) -> None:
+        """Instala una cache restaurada desde fuera (instantanea de arranque) para el fichero actual"""
+        with self._rw.write_locked():
+            self._cache = cache
+            self._cache_key = self._file_key()
@@ -0,0 +1,166 @@
+"""
+Codificadores JSON intercambiables para los repositorios (JsonRepositoryBase).
+
+Trabajan con bytes en UTF-8 en las dos direcciones, que es lo que hablan orjson
+y msgspec sin conversiones. Con compact=True "auto" elige el mas rapido de los
+instalados:
+
+  - orjson:  el mas rapido; en modo indentado solo sabe indentar con 2 espacios.
+  - msgspec: casi igual de rapido; indenta reformateando lo ya codificado.
+  - json:    la libreria estandar, siempre disponible (indent=4 como hasta ahora).
+
+Con compact=True se escribe sin indentar ni espacios: ficheros mas pequeños y
+escrituras mas rapidas, a cambio de no poder leerlos comodamente a mano. Los
+ficheros indentados son para leerlos a mano, y "auto" los deja como siempre
+(libreria estandar, indent=4): instalar orjson no cambia el formato de los
+ficheros ya escritos. orjson o msgspec indentados hay que pedirlos por nombre.
+
+El codificador por defecto se puede fijar con variables de entorno:
+TALLER_JSON_CODEC=auto|orjson|msgspec|json y TALLER_JSON_COMPACT=1.
+"""
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type, TypeVar
+
+#Aceleradores opcionales: si no estan se usa la libreria estandar
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - depende del entorno
+    msgspec = None
+
+T = TypeVar('T')
+
+# Orden de preferencia de "auto" en modo compacto (el indentado es siempre "json")
+PREFERENCE = ("orjson", "msgspec", "json")
+
+
+class JsonCodec(ABC):
+    """Codificador base: loads(bytes) -> datos y dumps(datos) -> bytes"""
+
+    name = ""
+    # Excepciones que lanza loads con un documento mal formado
+    errors: Tuple[Type[BaseException], ...] = (ValueError,)
+
+    def __init__(self, compact: bool = False) -> None:
+        self.compact = compact
+
+    @abstractmethod
+    def loads(self, raw: bytes) -> Any:
+        """Documento en UTF-8 -> datos; un documento mal formado lanza una de errors"""
+
+    @abstractmethod
+    def dumps(self, data: Any) -> bytes:
+        """Datos -> documento en UTF-8, indentado salvo con compact"""
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(compact={self.compact})"
+
+
+class StdlibCodec(JsonCodec):
+    name = "json"
+    errors = (json.JSONDecodeError, UnicodeDecodeError)
+
+    def loads(self, raw: bytes) -> Any:
+        return json.loads(raw)
+
+    def dumps(self, data: Any) -> bytes:
+        if self.compact:
+            text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        else:
+            text = json.dumps(data, indent=4, ensure_ascii=False)
+        return text.encode("utf-8")
+
+
+class OrjsonCodec(JsonCodec):
+    name = "orjson"
+    errors = (orjson.JSONDecodeError,) if orjson else ()
+
+    def __init__(self, compact: bool = False) -> None:
+        super().__init__(compact)
+        #Claves no str (p. ej. int) como en json.dumps, que las convierte a texto
+        self._option = orjson.OPT_NON_STR_KEYS | (0 if compact else orjson.OPT_INDENT_2)
+
+    def loads(self, raw: bytes) -> Any:
+        return orjson.loads(raw)
+
+    def dumps(self, data: Any) -> bytes:
+        return orjson.dumps(data, option=self._option)
+
+
+class MsgspecCodec(JsonCodec):
+    name = "msgspec"
+    errors = (msgspec.DecodeError,) if msgspec else ()
+
+    def __init__(self, compact: bool = False) -> None:
+        super().__init__(compact)
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+
+    def loads(self, raw: bytes) -> Any:
+        return self._decoder.decode(raw)
+
+    def dumps(self, data: Any) -> bytes:
+        raw = self._encoder.encode(data)
+        return raw if self.compact else msgspec.json.format(raw, indent=4)
+
+
+# nombre -> (clase, modulo del que depende o None)
+CODECS: Dict[str, Tuple[Type[JsonCodec], Any]] = {
+    "orjson": (OrjsonCodec, orjson),
+    "msgspec": (MsgspecCodec, msgspec),
+    "json": (StdlibCodec, json),
+}
+
+
+def available_codecs() -> List[str]:
+    """Codificadores que se pueden usar en este entorno, en orden de preferencia"""
+    return [name for name in PREFERENCE if CODECS[name][1] is not None]
+
+
+def make_codec(name: str = "auto", compact: bool = False) -> JsonCodec:
+    """Codificador por nombre; "auto" es el mas rapido de los instalados (compacto) o la libreria estandar (indentado)"""
+    if name == "auto":
+        name = available_codecs()[0] if compact else "json"
+    if name not in CODECS:
+        raise ValueError(f"Codificador JSON desconocido: {name} (opciones: auto, {', '.join(PREFERENCE)})")
+    cls, module = CODECS[name]
+    if module is None:
+        raise ValueError(f"El codificador {name} no esta instalado (pip install {name})")
+    return cls(compact)
+
+
+_default: Optional[JsonCodec] = None
+
+
+def default_codec_name() -> str:
+    """Codificador pedido con TALLER_JSON_CODEC ("auto" si no se fija)"""
+    return os.environ.get("TALLER_JSON_CODEC", "auto")
+
+
+def default_codec() -> JsonCodec:
+    """Codificador de los repositorios que no reciben uno, segun TALLER_JSON_CODEC / TALLER_JSON_COMPACT"""
+    global _default
+    if _default is None:
+        _default = make_codec(default_codec_name(), compact=os.environ.get("TALLER_JSON_COMPACT") == "1")
+    return _default
+
+
+def set_default_codec(codec: Optional[JsonCodec]) -> None:
+    """Cambia el codificador por defecto (None: se vuelve a elegir con las variables de entorno)"""
+    global _default
+    _default = codec
+
+
+def decode_column(values: Iterable[str], parse: Callable[[str], T]) -> List[T]:
+    """
+    Decodifica una columna entera (fechas u horas ISO): cada valor distinto se parsea
+    una sola vez y las repeticiones comparten el mismo objeto.
+    """
+    values = list(values)
+    parsed: Dict[str, T] = {value: parse(value) for value in set(values)}
+    return list(map(parsed.__getitem__, values))
@@ -0,0 +1,240 @@
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Generic, Hashable, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+# Cubos del mapa persistente: una escritura copia la tupla de cubos y un solo cubo
+BUCKETS = 512
+_BUCKET_MASK = BUCKETS - 1
+# Huecos por trozo del vector persistente: una escritura copia la tupla de trozos y un trozo
+CHUNK_SHIFT = 9
+CHUNK = 1 << CHUNK_SHIFT
+_CHUNK_MASK = CHUNK - 1
+
+#Cubo vacio compartido por todos los mapas; de solo lectura para que nadie lo modifique
+_EMPTY_BUCKET: Any = MappingProxyType({})
+
+
+class PersistentMap(Generic[K, V]):
+    """
+    Mapa inmutable con comparticion estructural: set/delete devuelven un mapa nuevo
+    que comparte con el anterior todos los cubos salvo el modificado. Sin orden.
+    """
+
+    __slots__ = ("_buckets", "_len")
+
+    def __init__(self, items: Iterable[Tuple[K, V]] = ()) -> None:
+        buckets: List[Dict[K, V]] = [{} for _ in range(BUCKETS)]
+        for key, value in items:
+            buckets[hash(key) & _BUCKET_MASK][key] = value
+        self._buckets = tuple(b if b else _EMPTY_BUCKET for b in buckets)
+        self._len = sum(len(b) for b in buckets)
+
+    @classmethod
+    def _derive(cls, buckets: Tuple[Dict[K, V], ...], length: int) -> "PersistentMap[K, V]":
+        new = cls.__new__(cls)
+        new._buckets = buckets
+        new._len = length
+        return new
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        return self._buckets[hash(key) & _BUCKET_MASK].get(key, default)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._buckets[hash(key) & _BUCKET_MASK]
+
+    def __len__(self) -> int:
+        return self._len
+
+    def items(self) -> Iterator[Tuple[K, V]]:
+        for bucket in self._buckets:
+            yield from bucket.items()
+
+    def set(self, key: K, value: V) -> "PersistentMap[K, V]":
+        i = hash(key) & _BUCKET_MASK
+        bucket = dict(self._buckets[i])
+        length = self._len + (key not in bucket)
+        bucket[key] = value
+        return self._derive(self._buckets[:i] + (bucket,) + self._buckets[i + 1:], length)
+
+    def delete(self, key: K) -> "PersistentMap[K, V]":
+        i = hash(key) & _BUCKET_MASK
+        if key not in self._buckets[i]:
+            return self
+        bucket = dict(self._buckets[i])
+        del bucket[key]
+        return self._derive(self._buckets[:i] + (bucket or _EMPTY_BUCKET,) + self._buckets[i + 1:], self._len - 1)
+
+
+class ChunkedVector(Generic[V]):
+    """
+    Vector inmutable por trozos de CHUNK huecos. Los borrados dejan un hueco (None)
+    para que las posiciones no cambien; append/set/delete devuelven un vector nuevo
+    que comparte con el anterior todos los trozos salvo el modificado.
+    """
+
+    __slots__ = ("_chunks", "_size", "_count")
+
+    def __init__(self, items: Iterable[V] = ()) -> None:
+        values = list(items)
+        self._chunks = tuple(tuple(values[i:i + CHUNK]) for i in range(0, len(values), CHUNK))
+        self._size = len(values)
+        self._count = len(values)
+
+    @classmethod
+    def _derive(cls, chunks: Tuple[tuple, ...], size: int, count: int) -> "ChunkedVector[V]":
+        new = cls.__new__(cls)
+        new._chunks = chunks
+        new._size = size
+        new._count = count
+        return new
+
+    def __getitem__(self, position: int) -> Optional[V]:
+        return self._chunks[position >> CHUNK_SHIFT][position & _CHUNK_MASK]
+
+    def __len__(self) -> int:
+        """Elementos vivos (sin contar huecos)"""
+        return self._count
+
+    @property
+    def size(self) -> int:
+        """Posiciones ocupadas, huecos incluidos: la siguiente posicion libre"""
+        return self._size
+
+    def __iter__(self) -> Iterator[V]:
+        for chunk in self._chunks:
+            for value in chunk:
+                if value is not None:
+                    yield value
+
+    def items(self) -> Iterator[Tuple[int, V]]:
+        for position, value in enumerate(v for chunk in self._chunks for v in chunk):
+            if value is not None:
+                yield position, value
+
+    def append(self, value: V) -> "ChunkedVector[V]":
+        if self._size & _CHUNK_MASK:
+            chunks = self._chunks[:-1] + (self._chunks[-1] + (value,),)
+        else:
+            chunks = self._chunks + ((value,),)
+        return self._derive(chunks, self._size + 1, self._count + 1)
+
+    def _replace(self, position: int, value: Optional[V], count: int) -> "ChunkedVector[V]":
+        c, offset = position >> CHUNK_SHIFT, position & _CHUNK_MASK
+        chunk = self._chunks[c]
+        chunk = chunk[:offset] + (value,) + chunk[offset + 1:]
+        return self._derive(self._chunks[:c] + (chunk,) + self._chunks[c + 1:], self._size, count)
+
+    def set(self, position: int, value: V) -> "ChunkedVector[V]":
+        return self._replace(position, value, self._count)
+
+    def delete(self, position: int) -> "ChunkedVector[V]":
+        if self[position] is None:
+            return self
+        return self._replace(position, None, self._count - 1)
+
+
+class PersistentTable(Generic[K, V]):
+    """
+    Tabla inmutable y versionada de valores con clave, en orden de insercion.
+    Cada escritura devuelve la version siguiente, que comparte casi toda su
+    estructura con la anterior; los lectores que tengan la anterior no la ven cambiar.
+    """
+
+    __slots__ = ("_key_of", "_rows", "_positions", "version")
+
+    def __init__(self, key_of: Callable[[V], K], values: Iterable[V] = ()) -> None:
+        #Como en un dict, la primera aparicion de cada clave fija su posicion y valor
+        unique: Dict[K, V] = {}
+        for value in values:
+            unique.setdefault(key_of(value), value)
+        self._key_of = key_of
+        self._rows: ChunkedVector[V] = ChunkedVector(unique.values())
+        self._positions: PersistentMap[K, int] = PersistentMap((key, i) for i, key in enumerate(unique))
+        self.version = 0
+
+    def _derive(self, rows: ChunkedVector[V], positions: PersistentMap[K, int]) -> "PersistentTable[K, V]":
+        #Demasiados huecos: se compacta reconstruyendo (coste amortizado entre los borrados)
+        if rows.size - len(rows) > max(CHUNK, len(rows)):
+            new = PersistentTable(self._key_of, rows)
+        else:
+            new = PersistentTable.__new__(PersistentTable)
+            new._key_of = self._key_of
+            new._rows = rows
+            new._positions = positions
+        new.version = self.version + 1
+        return new
+
+    def get(self, key: K) -> Optional[V]:
+        position = self._positions.get(key)
+        return None if position is None else self._rows[position]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._positions
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __iter__(self) -> Iterator[V]:
+        return iter(self._rows)
+
+    def values(self) -> List[V]:
+        return list(self._rows)
+
+    def put(self, value: V) -> "PersistentTable[K, V]":
+        """Inserta al final o sustituye en su sitio si la clave ya existe"""
+        key = self._key_of(value)
+        position = self._positions.get(key)
+        if position is None:
+            return self._derive(self._rows.append(value), self._positions.set(key, self._rows.size))
+        return self._derive(self._rows.set(position, value), self._positions)
+
+    def put_if_absent(self, value: V) -> "PersistentTable[K, V]":
+        if self._key_of(value) in self._positions:
+            return self
+        return self.put(value)
+
+    def put_many(self, values: Iterable[V], replace: bool = True) -> "PersistentTable[K, V]":
+        """
+        Varias escrituras publicadas como una sola version. Un lote grande frente a la
+        tabla se aplica reconstruyendola entera, que sale mas barato que valor a valor.
+        """
+        values = list(values)
+        if not values:
+            return self
+        if len(values) * 8 >= len(self):
+            merged = {self._key_of(value): value for value in self}
+            for value in values:
+                key = self._key_of(value)
+                if replace or key not in merged:
+                    merged[key] = value
+            new = PersistentTable(self._key_of, merged.values())
+        else:
+            new = self
+            for value in values:
+                new = new.put(value) if replace else new.put_if_absent(value)
+            if new is self:
+                return self
+        new.version = self.version + 1
+        return new
+
+    def remove(self, key: K) -> "PersistentTable[K, V]":
+        position = self._positions.get(key)
+        if position is None:
+            return self
+        return self._derive(self._rows.delete(position), self._positions.delete(key))
+
+    def remove_many(self, keys: Iterable[K]) -> "PersistentTable[K, V]":
+        """Varios borrados publicados como una sola version (reconstruyendo si el lote es grande)"""
+        keys = {key for key in keys if key in self._positions}
+        if not keys:
+            return self
+        if len(keys) * 8 >= len(self):
+            new = PersistentTable(self._key_of, (v for v in self if self._key_of(v) not in keys))
+        else:
+            new = self
+            for key in keys:
+                new = new.remove(key)
+        new.version = self.version + 1
+        return new
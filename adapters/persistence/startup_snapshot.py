@@ -0,0 +1,124 @@
+import gc
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+from typing import Dict, Optional, Tuple
+
+from adapters.persistence.json_base import JsonRepositoryBase
+
+# Cabecera: magia, version del formato y longitud de la clave que sigue
+MAGIC = b"TSNP"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHI")
+
+# Clave de un fichero fuente: (nombre, mtime_ns, tamaño, blake2b)
+SourceKey = Tuple[str, int, int, str]
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """Hash blake2b del contenido del fichero, leido por bloques"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class StartupSnapshot:
+    """
+    Instantanea binaria del estado ya hidratado de los repositorios JSON.
+    Se guarda con marshal (tuplas compactas) tras una carga completa y en el
+    siguiente arranque se restaura con mmap si los ficheros fuente no han
+    cambiado (mtime, tamaño y hash); si han cambiado se hace la carga normal.
+    """
+
+    def __init__(self, snapshot_path: str, repos: Dict[str, JsonRepositoryBase]) -> None:
+        self._path = snapshot_path
+        #nombre -> repositorio con dump_rows()/load_rows()
+        self._repos = repos
+
+    def _stat_key(self) -> Tuple[Tuple[str, int, int], ...]:
+        result = []
+        for name, repo in self._repos.items():
+            st = os.stat(repo._file_path)
+            result.append((name, st.st_mtime_ns, st.st_size))
+        return tuple(result)
+
+    def _source_key(self) -> Tuple[SourceKey, ...]:
+        return tuple(
+            (name, mtime, size, file_digest(repo._file_path))
+            for (name, mtime, size), repo in zip(self._stat_key(), self._repos.values())
+        )
+
+    def _matches(self, stored_key: Tuple[SourceKey, ...]) -> bool:
+        #El hash solo se calcula si mtime y tamaño ya coinciden
+        if tuple(k[:3] for k in stored_key) != self._stat_key():
+            return False
+        return tuple(stored_key) == self._source_key()
+
+    def _read_header(self, mm: mmap.mmap) -> Tuple[Tuple[SourceKey, ...], int]:
+        magic, version, key_len = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError("Instantanea con formato desconocido")
+        key = marshal.loads(mm[HEADER.size:HEADER.size + key_len])
+        return key, HEADER.size + key_len
+
+    def stored_key(self) -> Optional[Tuple[SourceKey, ...]]:
+        """Clave guardada en la instantanea actual (None si no hay o esta corrupta)"""
+        try:
+            with open(self._path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return self._read_header(mm)[0]
+        except (OSError, ValueError, EOFError, TypeError, struct.error):
+            return None
+
+    def restore(self) -> bool:
+        """Restaura las caches de los repositorios si la instantanea sigue siendo valida"""
+        try:
+            with open(self._path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                key, offset = self._read_header(mm)
+                if not self._matches(key):
+                    return False
+                #marshal lee directamente de la memoria mapeada, sin copiar el fichero
+                with memoryview(mm) as view, view[offset:] as payload_view:
+                    payload = marshal.loads(payload_view)
+        except (OSError, ValueError, EOFError, TypeError, struct.error):
+            return False
+
+        #Se crean millones de tuplas sin ciclos: el recolector solo añadiria pasadas inutiles
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for name, repo in self._repos.items():
+                repo.load_rows(payload[name])
+        finally:
+            if gc_enabled:
+                gc.enable()
+        return True
+
+    def save(self) -> bool:
+        """Escribe la instantanea del estado actual; no hace nada si ya esta al dia"""
+        key = self._source_key()
+        if self.stored_key() == key:
+            return False
+        payload = {name: repo.dump_rows() for name, repo in self._repos.items()}
+        #Si un fichero ha cambiado mientras volcabamos, la instantanea no seria coherente
+        if self._source_key() != key:
+            return False
+
+        raw_key = marshal.dumps(key)
+        tmp_path = self._path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(raw_key)))
+            f.write(raw_key)
+            f.write(marshal.dumps(payload))
+        os.replace(tmp_path, self._path)
+        return True
+
+    def warm_up(self) -> bool:
+        """Restaura la instantanea o, si no vale, hace la carga completa y la guarda. True si se restauro"""
+        if self.restore():
+            return True
+        self.save()
+        return False
@@ -0,0 +1,86 @@
+import threading
+from typing import Iterator, List, Optional
+from datetime import date
+
+from core.domain.appointment import Appointment
+from core.ports.appointment_repository import AppointmetRepository
+from core.ports.appointment_stats_repository import AppointmentStatsRepository
+
+
+class StatsTrackingAppointmentRepository:
+    """
+    Decorador de AppointmetRepository que mantiene los agregados al dia.
+    Cada add/update/delete se delega en el repositorio real y despues se
+    aplica de forma incremental sobre el repositorio de agregados.
+
+    Lo que se resta son las filas que el repositorio real devuelve como
+    sustituidas o borradas, leidas dentro de su propia confirmacion: si otro
+    proceso cambia la misma cita justo antes, el delta sale de su version.
+    """
+
+    def __init__(self, inner: AppointmetRepository, stats_repo: AppointmentStatsRepository) -> None:
+        self._inner = inner
+        self._stats = stats_repo
+        #Cita + agregados son dos escrituras: un hilo no debe colarse entre ambas
+        self._write_lock = threading.Lock()
+
+    #Implementacion del Protocolo
+    def add(self, appointment: Appointment) -> None:
+        with self._write_lock:
+            self._inner.add(appointment)
+            self._stats.record_added(appointment)
+
+    def list_all(self) -> List[Appointment]:
+        return self._inner.list_all()
+
+    def find_by_date(self, date_: date) -> List[Appointment]:
+        return self._inner.find_by_date(date_)
+
+    def find_by_customer(self, dni: str) -> List[Appointment]:
+        return self._inner.find_by_customer(dni)
+
+    def find_by_car(self, plate: str) -> List[Appointment]:
+        return self._inner.find_by_car(plate)
+
+    def iter_range(self, start: Optional[date] = None, end: Optional[date] = None, dni: Optional[str] = None) -> Iterator[Appointment]:
+        return self._inner.iter_range(start, end, dni)
+
+    def update(self, appointment: Appointment) -> List[Appointment]:
+        with self._write_lock:
+            replaced = self._inner.update(appointment)
+            if replaced:
+                self._stats.record_changes([appointment], replaced)
+            return replaced
+
+    def delete(self, appointment: Appointment) -> List[Appointment]:
+        with self._write_lock:
+            #El repositorio borra todas las filas con esa clave: se restan todas
+            removed = self._inner.delete(appointment)
+            self._stats.record_changes([], removed)
+            return removed
+
+    def reschedule(self, original: Appointment, moved: Appointment) -> Optional[Appointment]:
+        with self._write_lock:
+            replaced = self._inner.reschedule(original, moved)
+            if replaced is not None:
+                self._stats.record_changes([moved], [replaced])
+            return replaced
+
+    def add_many(self, appointments: List[Appointment]) -> None:
+        with self._write_lock:
+            self._inner.add_many(appointments)
+            self._stats.record_changes(appointments, [])
+
+    def upsert_many(self, appointments: List[Appointment]) -> List[Appointment]:
+        with self._write_lock:
+            replaced = self._inner.upsert_many(appointments)
+            #Si el lote repite una cita, la ultima version es la que queda guardada
+            latest = {(a.car.plate, a.date, a.time): a for a in appointments}
+            self._stats.record_changes(list(latest.values()), replaced)
+            return replaced
+
+    def delete_many(self, appointments: List[Appointment]) -> List[Appointment]:
+        with self._write_lock:
+            removed = self._inner.delete_many(appointments)
+            self._stats.record_changes([], removed)
+            return removed
@@ -0,0 +1,175 @@
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk
+from collections import deque
+from typing import Any, Callable, Deque, Optional, Tuple
+
+from adapters.persistence.json_base import add_io_observer, remove_io_observer
+
+
+class IoCounter:
+    """E/S de una accion o de un trabajo en segundo plano; se suma desde cualquier hilo"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.start = time.perf_counter()
+        self.reads = 0
+        self.writes = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self._lock = threading.Lock()
+
+    def add(self, kind: str, nbytes: int) -> None:
+        with self._lock:
+            if kind == "read":
+                self.reads += 1
+                self.bytes_read += nbytes
+            else:
+                self.writes += 1
+                self.bytes_written += nbytes
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.start) * 1000
+
+
+class IoDebugOverlay:
+    """
+    Modo desarrollador: barra de estado con la E/S que provoca cada accion de la UI.
+    Cuenta las llamadas a JsonRepositoryBase._read_json / _write_json, los bytes y el
+    tiempo de pared de cada accion, y guarda un log rotativo de las acciones lentas.
+
+    Cada hilo cuenta en su propio IoCounter: la accion en curso en el hilo de Tk, y
+    cada trabajo en segundo plano en uno propio con el nombre de la accion que lo
+    lanzo (ver start_job / run_job / finish_job). Asi la E/S de un hilo que termina
+    tarde no se suma a la accion que se este midiendo en ese momento.
+    """
+
+    def __init__(self, root: tk.Tk, colors: dict, slow_ms: float = 200.0, log_size: int = 50) -> None:
+        self.root = root
+        self.COLORS = colors
+        self.slow_ms = slow_ms
+        self.slow_log: Deque[Tuple[str, str]] = deque(maxlen=log_size)
+
+        # Contador del hilo actual (la accion o el trabajo que se esta midiendo en el)
+        self._local = threading.local()
+
+        # Barra de estado
+        self.bar = tk.Frame(root, bg=colors['bg_secondary'])
+        self.status_label = tk.Label(
+            self.bar,
+            text="🛠️ Modo desarrollador: esperando acción...",
+            font=("Consolas", 9),
+            bg=colors['bg_secondary'],
+            fg=colors['text_secondary'],
+            anchor="w"
+        )
+        self.status_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=10, pady=4)
+
+        self.slow_button = tk.Button(
+            self.bar,
+            text="🐢 Lentas (0)",
+            command=self.show_slow_log,
+            bg=colors['bg_card'],
+            fg=colors['text_primary'],
+            font=("Segoe UI", 9),
+            borderwidth=0,
+            relief='flat',
+            cursor='hand2',
+            highlightthickness=0
+        )
+        self.slow_button.pack(side=tk.RIGHT, padx=10, pady=2)
+
+        add_io_observer(self._on_io)
+
+    def pack(self) -> None:
+        """Coloca la barra de estado en la parte inferior de la ventana."""
+        self.bar.pack(side=tk.BOTTOM, fill=tk.X)
+
+    def close(self) -> None:
+        remove_io_observer(self._on_io)
+
+    def _counter(self) -> Optional[IoCounter]:
+        return getattr(self._local, "counter", None)
+
+    def _on_io(self, kind: str, path: str, nbytes: int) -> None:
+        #Llega desde el hilo que hace la E/S: solo cuenta si ese hilo esta midiendo algo
+        counter = self._counter()
+        if counter is not None:
+            counter.add(kind, nbytes)
+
+    def track(self, name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        """Envuelve un callback de la UI para medir la E/S que provoca."""
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            #Las acciones anidadas (p.ej. un refresco dentro de un guardado) cuentan en la exterior
+            if self._counter() is not None:
+                return fn(*args, **kwargs)
+
+            counter = self._local.counter = IoCounter(name)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._local.counter = None
+                self._report(counter)
+        return wrapper
+
+    def start_job(self) -> IoCounter:
+        """Contador para un trabajo en segundo plano, con el nombre de la accion que lo lanza (hilo de Tk)"""
+        action = self._counter()
+        return IoCounter(f"{action.name if action else 'Precarga'} (segundo plano)")
+
+    def run_job(self, counter: IoCounter, fn: Callable[[], Any]) -> Any:
+        """Ejecuta fn en el hilo del trabajo contando su E/S en counter"""
+        self._local.counter = counter
+        try:
+            return fn()
+        finally:
+            self._local.counter = None
+
+    def finish_job(self, counter: IoCounter) -> None:
+        """Muestra la E/S del trabajo; se llama desde el hilo de Tk cuando termina"""
+        self._report(counter)
+
+    def _report(self, counter: IoCounter) -> None:
+        elapsed_ms = counter.elapsed_ms()
+        summary = (
+            f"{counter.name}: _read_json x{counter.reads} ({self._format_bytes(counter.bytes_read)}) | "
+            f"_write_json x{counter.writes} ({self._format_bytes(counter.bytes_written)}) | "
+            f"{elapsed_ms:.1f} ms"
+        )
+        slow = elapsed_ms >= self.slow_ms
+        if slow:
+            self.slow_log.append((time.strftime("%H:%M:%S"), summary))
+            self.slow_button.config(text=f"🐢 Lentas ({len(self.slow_log)})")
+
+        #La ventana puede haberse cerrado durante la accion
+        if self.status_label.winfo_exists():
+            self.status_label.config(
+                text=("🐢 " if slow else "⚡ ") + summary,
+                fg=self.COLORS['warning'] if slow else self.COLORS['text_secondary']
+            )
+
+    @staticmethod
+    def _format_bytes(nbytes: int) -> str:
+        for unit in ("B", "KB", "MB"):
+            if nbytes < 1024:
+                return f"{nbytes:.0f} {unit}" if unit == "B" else f"{nbytes:.1f} {unit}"
+            nbytes /= 1024
+        return f"{nbytes:.1f} GB"
+
+    def show_slow_log(self) -> None:
+        """Abre una ventana con el log rotativo de acciones lentas."""
+        dialog = tk.Toplevel(self.root)
+        dialog.title(f"Acciones lentas (>= {self.slow_ms:.0f} ms)")
+        dialog.geometry("900x400")
+        dialog.configure(bg=self.COLORS['bg_main'])
+
+        table = ttk.Treeview(dialog, columns=("Hora", "Acción"), show="headings", style='Modern.Treeview')
+        table.heading("Hora", text="Hora")
+        table.heading("Acción", text="Acción")
+        table.column("Hora", width=90, stretch=False)
+        table.column("Acción", width=780)
+        table.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        for when, summary in reversed(self.slow_log):
+            table.insert("", tk.END, values=(when, summary))
@@ -793,3 +793,82 @@ class AppointmentForm(FormBase):
         self.cost_error.config(text="")
         
         self.clear_global_error()
+
+
+# ==========================================
+# 📤 FORMULARIO DE EXPORTACIÓN DE CITAS
+# ==========================================
+class ExportForm(FormBase):
+    # Texto del combo -> (formato, extensión)
+    FORMATS = {
+        "CSV (contabilidad)": ("csv", ".csv"),
+        "JSON-lines": ("jsonl", ".jsonl"),
+        "iCalendar (.ics)": ("ics", ".ics"),
+    }
+    ALL_CUSTOMERS = "Todos los clientes"
+    
+    def __init__(self, parent: tk.Widget) -> None:
+        super().__init__(parent)
+        
+        current_row = 1
+        
+        # Formato
+        tk.Label(self, text="Formato:", font=("Segoe UI", 10, "bold"), bg=self.COLORS['bg_main'], fg=self.COLORS['text_primary']).grid(row=current_row, column=0, sticky="w", pady=5)
+        self.format_var = tk.StringVar(value=next(iter(self.FORMATS)))
+        self.format_combo = ttk.Combobox(self, textvariable=self.format_var, values=list(self.FORMATS), width=27, state="readonly", font=("Segoe UI", 10))
+        self.format_combo.grid(row=current_row, column=1, sticky="w", pady=5)
+        current_row += 1
+        
+        # Rango de fechas (opcional)
+        tk.Label(self, text="Desde:", font=("Segoe UI", 10, "bold"), bg=self.COLORS['bg_main'], fg=self.COLORS['text_primary']).grid(row=current_row, column=0, sticky="w", pady=5)
+        self.from_picker = DatePickerEntry(self)
+        self.from_picker.grid(row=current_row, column=1, sticky="w", pady=5)
+        current_row += 1
+        
+        tk.Label(self, text="Hasta:", font=("Segoe UI", 10, "bold"), bg=self.COLORS['bg_main'], fg=self.COLORS['text_primary']).grid(row=current_row, column=0, sticky="w", pady=5)
+        self.to_picker = DatePickerEntry(self)
+        self.to_picker.grid(row=current_row, column=1, sticky="w", pady=5)
+        current_row += 1
+        
+        # Cliente (opcional)
+        tk.Label(self, text="Cliente:", font=("Segoe UI", 10, "bold"), bg=self.COLORS['bg_main'], fg=self.COLORS['text_primary']).grid(row=current_row, column=0, sticky="w", pady=5)
+        self.customer_var = tk.StringVar(value=self.ALL_CUSTOMERS)
+        self.customer_combo = ttk.Combobox(self, textvariable=self.customer_var, width=27, state="readonly", font=("Segoe UI", 10))
+        self.customer_combo.grid(row=current_row, column=1, sticky="w", pady=5)
+        current_row += 1
+        
+        self.customer_map: Dict[str, str] = {}  # display -> dni
+    
+    def load_customers(self, customers: List[Customer]) -> None:
+        """Carga la lista de clientes para filtrar."""
+        self.customer_map = {f"{c.dni} - {c.name} {c.surname}": c.dni for c in customers}
+        self.customer_combo['values'] = [self.ALL_CUSTOMERS] + list(self.customer_map)
+    
+    def validate(self) -> bool:
+        self.from_picker.clear_error()
+        self.to_picker.clear_error()
+        start, end = self.from_picker.get_date(), self.to_picker.get_date()
+        if start and end and start > end:
+            self.to_picker.set_error("Anterior a 'Desde'")
+            self.show_global_error("Revisa los campos marcados en rojo.")
+            return False
+        self.clear_global_error()
+        return True
+    
+    def get_data(self) -> Dict[str, Any]:
+        """Devuelve formato, extensión y filtros para el servicio de exportación."""
+        fmt, extension = self.FORMATS[self.format_var.get()]
+        return {
+            "format": fmt,
+            "extension": extension,
+            "start": self.from_picker.get_date(),
+            "end": self.to_picker.get_date(),
+            "dni": self.customer_map.get(self.customer_var.get()),
+        }
+    
+    def clear(self) -> None:
+        self.format_var.set(next(iter(self.FORMATS)))
+        self.from_picker.clear()
+        self.to_picker.clear()
+        self.customer_var.set(self.ALL_CUSTOMERS)
+        self.clear_global_error()
@@ -1,12 +1,26 @@
+import queue
+import threading
 import tkinter as tk
-from tkinter import ttk, messagebox
-from typing import Any, List
+from tkinter import ttk, messagebox, filedialog
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
-from adapters.ui.tkinter_forms import CustomerForm, CarForm, AppointmentForm
+from adapters.ui.tkinter_forms import CustomerForm, CarForm, AppointmentForm, ExportForm
+from adapters.ui.debug_overlay import IoDebugOverlay
 from core.domain.customer import Customer
 from core.domain.car import Car
 from core.domain.appointment import Appointment
 
+# Pausa entre la precarga de una pestaña y la siguiente (ms)
+PREFETCH_DELAY_MS = 150
+# Cada cuanto mira el hilo de Tk si ha terminado un trabajo en segundo plano (ms)
+BACKGROUND_POLL_MS = 50
+# Filas que se insertan en una tabla entre evento y evento
+FILL_BATCH_ROWS = 500
+
+# Fila de una tabla: (valores, tags)
+TableRow = Tuple[tuple, tuple]
+
 
 class MainWindow:
     def __init__(
@@ -27,8 +41,26 @@ class MainWindow:
         list_appointments: Any,
         update_appointment: Any,
         delete_appointment: Any,
+        reschedule_appointment: Any,
+        export_appointments: Any,
+        # Dashboard Services
+        get_agenda: Any = None,
+        get_workload: Any = None,
+        get_monthly_revenue: Any = None,
+        get_top_customers: Any = None,
+        list_cars_due_revision: Any = None,
+        # Modo desarrollador (barra de estado con la E/S de cada accion)
+        dev_mode: bool = False,
+        slow_action_ms: float = 200.0,
+        # Carga inicial de datos que corre en un hilo; las pestañas leen cuando termina
+        startup: Optional[Callable[[], Any]] = None,
     ) -> None:
         self.root = root
+        #Se lanza con la carga de la pestaña visible, cuando la ventana ya esta pintada
+        self._startup = startup
+        self._startup_done = threading.Event()
+        if startup is None:
+            self._startup_done.set()
         
         # Servicios clientes
         self.reg_cust = register_customer
@@ -47,6 +79,21 @@ class MainWindow:
         self.list_appt = list_appointments
         self.upd_appt = update_appointment
         self.del_appt = delete_appointment
+        self.resched_appt = reschedule_appointment
+        self.export_appt = export_appointments
+        
+        # Servicios dashboard (leen agregados precalculados, nunca list_all de citas)
+        self.get_agenda = get_agenda
+        self.get_workload = get_workload
+        self.get_month_rev = get_monthly_revenue
+        self.get_top_cust = get_top_customers
+        self.list_cars_rev = list_cars_due_revision
+        
+        # Fuentes de datos que han cambiado desde el ultimo pintado del dashboard
+        self._dashboard_stale = {'appointments', 'cars'}
+        self.dashboard_tab = None
+        # Ultimo relleno por lotes de cada tabla: uno nuevo cancela el anterior
+        self._fill_jobs: Dict[str, object] = {}
         
         # =======================================
         # ENHANCED MODERN COLOR PALETTE
@@ -95,6 +142,12 @@ class MainWindow:
         # Configure ttk styles
         self._configure_styles()
         
+        # Barra de estado del modo desarrollador (se empaqueta antes para que no la tape el contenido)
+        self.debug_overlay = None
+        if dev_mode:
+            self.debug_overlay = IoDebugOverlay(self.root, self.COLORS, slow_ms=slow_action_ms)
+            self.debug_overlay.pack()
+        
         # Main container with padding
         main_container = tk.Frame(self.root, bg=self.COLORS['bg_main'])
         main_container.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
@@ -130,15 +183,145 @@ class MainWindow:
         self.notebook = ttk.Notebook(main_container, style='Modern.TNotebook')
         self.notebook.pack(fill=tk.BOTH, expand=True)
         
-        # Crear tabs
-        self._build_customers_tab()
-        self._build_cars_tab()
-        self._build_appointments_tab()
+        # Crear tabs vacios: cada uno se construye y se carga la primera vez que se muestra
+        # (o en segundo plano cuando la aplicacion esta ociosa)
+        self._lazy_tabs = {}
+        self._add_lazy_tab(
+            "👥 Clientes", self._build_customers_tab,
+            lambda: self._run_in_background(self._fetch_cust_rows, self._show_cust_rows),
+        )
+        self._add_lazy_tab(
+            "🚗 Coches", self._build_cars_tab,
+            lambda: self._run_in_background(self._fetch_car_rows, self._show_car_rows),
+        )
+        self._add_lazy_tab(
+            "📅 Citas", self._build_appointments_tab,
+            lambda: self._run_in_background(self._fetch_appointments, self._show_appointments),
+        )
+        if self.get_agenda is not None:
+            self.dashboard_tab = self._add_lazy_tab(
+                "📊 Dashboard", self._build_dashboard_tab, self._prefetch_dashboard
+            )
+        self.notebook.bind("<<NotebookTabChanged>>", self._track("Cambio de pestaña", self._on_tab_changed))
+        
+        # El primer frame no espera a los datos: la pestaña visible se carga en cuanto
+        # se pinta la ventana y el resto se precarga despues, de una en una
+        self.root.after_idle(self._load_visible_tab)
+    
+    # ==========================
+    # LAZY TABS
+    # ==========================
+    def _add_lazy_tab(self, text, builder, loader) -> tk.Frame:
+        """
+        Añade una pestaña vacia que se construira y cargara bajo demanda.
+        loader lanza la lectura de sus datos en segundo plano y la pinta al terminar.
+        """
+        tab = tk.Frame(self.notebook, bg=self.COLORS['bg_main'])
+        self.notebook.add(tab, text=text)
+        self._lazy_tabs[str(tab)] = {'frame': tab, 'builder': builder, 'loader': loader, 'built': False, 'loaded': False}
+        return tab
+    
+    def _ensure_tab_loaded(self, tab_name: str) -> None:
+        """Construye los widgets de la pestaña y lanza la carga de sus datos si aun no se ha hecho."""
+        entry = self._lazy_tabs.get(tab_name)
+        if entry is None:
+            return
+        if not entry['built']:
+            entry['builder'](entry['frame'])
+            entry['built'] = True
+        if not entry['loaded']:
+            #Marcada antes de leer: si se vuelve a pedir mientras tanto no se lee dos veces
+            entry['loaded'] = True
+            entry['loader']()
+    
+    def _load_visible_tab(self) -> None:
+        """Lanza la carga inicial y la de la pestaña visible, y programa la precarga del resto."""
+        if self._startup is not None:
+            threading.Thread(target=self._run_startup, args=(self._startup,), name="startup", daemon=True).start()
+            self._startup = None
+        self._ensure_tab_loaded(self.notebook.select())
+        self.root.after(PREFETCH_DELAY_MS, self._prefetch_next_tab)
+    
+    def _run_startup(self, startup: Callable[[], Any]) -> None:
+        """Carga inicial en su hilo; aunque falle, las pestañas leen despues por su cuenta."""
+        try:
+            startup()
+        finally:
+            self._startup_done.set()
+    
+    def _prefetch_next_tab(self) -> None:
+        """
+        Precarga una pestaña pendiente: los widgets se crean aqui, pero los datos se leen
+        en un hilo y la tabla se rellena por lotes, asi que la ventana sigue respondiendo.
+        """
+        pending = [name for name, entry in self._lazy_tabs.items() if not entry['loaded']]
+        if not pending:
+            return
+        self._ensure_tab_loaded(pending[0])
+        if len(pending) > 1:
+            #Devolvemos el control al bucle de eventos entre pestaña y pestaña
+            self.root.after_idle(lambda: self.root.after(PREFETCH_DELAY_MS, self._prefetch_next_tab))
+    
+    # ==========================
+    # TRABAJO EN SEGUNDO PLANO
+    # ==========================
+    def _run_in_background(self, work: Callable[[], Any], done: Callable[[Any], None],
+                           failed: Optional[Callable[[Exception], None]] = None) -> None:
+        """
+        Ejecuta work en un hilo y entrega su resultado a done en el hilo de Tk (tkinter
+        no se puede tocar desde otros hilos: el resultado se recoge con after).
+        Si work falla se llama a failed, o se muestra el error. En modo desarrollador la
+        E/S del hilo se cuenta aparte y se muestra al terminar, a nombre de la accion que
+        lo lanzo.
+        """
+        results: "queue.Queue[Tuple[bool, Any]]" = queue.Queue(maxsize=1)
+        overlay = self.debug_overlay
+        counter = overlay.start_job() if overlay is not None else None
+        
+        def target() -> None:
+            #Si la carga inicial sigue en marcha, se espera a ella en lugar de repetirla
+            self._startup_done.wait()
+            try:
+                results.put((True, work() if counter is None else overlay.run_job(counter, work)))
+            except Exception as ex:
+                results.put((False, ex))
         
-        # Cargar datos iniciales
-        self._refresh_cust_table()
-        self._refresh_car_table()
-        self._refresh_appt_table()
+        def poll() -> None:
+            try:
+                ok, value = results.get_nowait()
+            except queue.Empty:
+                self.root.after(BACKGROUND_POLL_MS, poll)
+                return
+            if counter is not None:
+                overlay.finish_job(counter)
+            if ok:
+                done(value)
+            elif failed is not None:
+                failed(value)
+            else:
+                messagebox.showerror("Error", str(value))
+        
+        threading.Thread(target=target, daemon=True).start()
+        self.root.after(BACKGROUND_POLL_MS, poll)
+    
+    def _fill_table_in_batches(self, table: ttk.Treeview, rows: List[TableRow]) -> None:
+        """Sustituye el contenido de la tabla insertando FILL_BATCH_ROWS filas por evento."""
+        job = object()
+        self._fill_jobs[str(table)] = job
+        table.delete(*table.get_children())
+        
+        def insert(start: int) -> None:
+            #Otro relleno de la misma tabla ha empezado despues: este se abandona
+            if self._fill_jobs.get(str(table)) is not job:
+                return
+            for values, tags in rows[start:start + FILL_BATCH_ROWS]:
+                table.insert("", tk.END, values=values, tags=tags)
+            if start + FILL_BATCH_ROWS < len(rows):
+                self.root.after(1, insert, start + FILL_BATCH_ROWS)
+            else:
+                del self._fill_jobs[str(table)]
+        
+        insert(0)
     
     def _configure_styles(self) -> None:
         """Configure modern ttk styles."""
@@ -194,10 +377,8 @@ class MainWindow:
     # ==========================
     # CUSTOMER LOGIC
     # ==========================
-    def _build_customers_tab(self) -> None:
+    def _build_customers_tab(self, tab: tk.Frame) -> None:
         """Construye el tab de clientes."""
-        tab = tk.Frame(self.notebook, bg=self.COLORS['bg_main'])
-        self.notebook.add(tab, text="👥 Clientes")
         
         # Header
         header = tk.Frame(tab, bg=self.COLORS['bg_secondary'], height=60)
@@ -280,8 +461,15 @@ class MainWindow:
             padx=5
         )
     
+    def _track(self, name, command):
+        """En modo desarrollador envuelve el callback para medir su E/S; si no, lo devuelve tal cual."""
+        if self.debug_overlay is None:
+            return command
+        return self.debug_overlay.track(name, command)
+    
     def _create_modern_button(self, parent, text, command, bg, side=tk.LEFT, padx=0):
         """Helper para crear botones modernos con estilo consistente y máximo contraste."""
+        command = self._track(text, command)
         # Determinar color hover basado en el color base
         hover_color = None
         if bg == self.COLORS['success']:
@@ -347,6 +535,8 @@ class MainWindow:
             style: 'primary' (guardar), 'secondary' (cancelar), 'danger' (eliminar)
             width: Ancho del botón
         """
+        command = self._track(f"{parent.winfo_toplevel().title()} › {text}", command)
+        
         # Configuración de colores mejorados para cada estilo
         if style == 'primary':
             bg_color = self.COLORS['success']
@@ -393,19 +583,15 @@ class MainWindow:
     
     def _refresh_cust_table(self) -> None:
         """Refresca la tabla de clientes."""
-        # Limpiar
-        for item in self.cust_table.get_children():
-            self.cust_table.delete(item)
-        
-        # Cargar datos
+        self._show_cust_rows(self._fetch_cust_rows())
+    
+    def _fetch_cust_rows(self) -> List[TableRow]:
+        """Filas de la tabla de clientes (no toca tkinter: vale desde otro hilo)."""
         customers: List[Customer] = self.list_cust.execute()
-        for c in customers:
-            self.cust_table.insert(
-                "",
-                tk.END,
-                values=(c.dni, f"{c.name} {c.surname}", c.email, c.age(), c.phone),
-                tags=(c.dni,)
-            )
+        return [((c.dni, f"{c.name} {c.surname}", c.email, c.age(), c.phone), (c.dni,)) for c in customers]
+    
+    def _show_cust_rows(self, rows: List[TableRow]) -> None:
+        self._fill_table_in_batches(self.cust_table, rows)
     
     def _open_new_cust_dialog(self) -> None:
         """Abre diálogo para nuevo cliente."""
@@ -508,10 +694,8 @@ class MainWindow:
     # ==========================
     # CAR LOGIC
     # ==========================
-    def _build_cars_tab(self) -> None:
+    def _build_cars_tab(self, tab: tk.Frame) -> None:
         """Construye el tab de coches."""
-        tab = tk.Frame(self.notebook, bg=self.COLORS['bg_main'])
-        self.notebook.add(tab, text="🚗 Coches")
         
         # Header
         header = tk.Frame(tab, bg=self.COLORS['bg_secondary'], height=60)
@@ -590,18 +774,19 @@ class MainWindow:
     
     def _refresh_car_table(self) -> None:
         """Refresca la tabla de coches."""
-        for item in self.car_table.get_children():
-            self.car_table.delete(item)
-        
+        self._dashboard_stale.add('cars')
+        self._show_car_rows(self._fetch_car_rows())
+    
+    def _fetch_car_rows(self) -> List[TableRow]:
+        """Filas de la tabla de coches (no toca tkinter: vale desde otro hilo)."""
         cars: List[Car] = self.list_car.execute()
-        for c in cars:
-            needs_rev = "⚠️ SÍ" if c.needs_revision() else "✅ NO"
-            self.car_table.insert(
-                "",
-                tk.END,
-                values=(c.plate, f"{c.brand} {c.model}", c.year, needs_rev),
-                tags=(c.plate,)
-            )
+        return [
+            ((c.plate, f"{c.brand} {c.model}", c.year, "⚠️ SÍ" if c.needs_revision() else "✅ NO"), (c.plate,))
+            for c in cars
+        ]
+    
+    def _show_car_rows(self, rows: List[TableRow]) -> None:
+        self._fill_table_in_batches(self.car_table, rows)
     
     def _open_new_car_dialog(self) -> None:
         """Abre diálogo para nuevo coche."""
@@ -700,10 +885,8 @@ class MainWindow:
     # ==========================
     # APPOINTMENT LOGIC
     # ==========================
-    def _build_appointments_tab(self) -> None:
+    def _build_appointments_tab(self, tab: tk.Frame) -> None:
         """Construye el tab de citas."""
-        tab = tk.Frame(self.notebook, bg=self.COLORS['bg_main'])
-        self.notebook.add(tab, text="📅 Citas")
         
         # Header
         header = tk.Frame(tab, bg=self.COLORS['bg_secondary'], height=60)
@@ -792,34 +975,36 @@ class MainWindow:
             side=tk.LEFT,
             padx=5
         )
+        
+        self._create_modern_button(
+            actions_frame,
+            text="📤 Exportar",
+            command=self._open_export_appt_dialog,
+            bg=self.COLORS['primary'],
+            side=tk.RIGHT,
+            padx=5
+        )
     
     def _refresh_appt_table(self) -> None:
         """Refresca la tabla de citas (muestra todas las citas ordenadas)."""
-        for item in self.appt_table.get_children():
-            self.appt_table.delete(item)
-        
-        # Obtener todas las citas desde el repositorio
+        self._dashboard_stale.add('appointments')
+        self._show_appointments(self._fetch_appointments())
+    
+    def _fetch_appointments(self) -> Tuple[List[Appointment], List[TableRow]]:
+        """Todas las citas ordenadas por fecha y hora, y sus filas (vale desde otro hilo)."""
         all_appts: List[Appointment] = self.list_appt.execute()
-        
-        # Ordenarlas por fecha y hora
         sorted_appts = sorted(all_appts, key=lambda a: (a.date, a.time))
-        
-        for idx, a in enumerate(sorted_appts):
-            self.appt_table.insert(
-                "",
-                tk.END,
-                values=(
-                    str(a.date),
-                    a.time.strftime("%H:%M"),
-                    a.customer.dni,
-                    a.car.plate,
-                    f"{a.cost} €"
-                ),
-                tags=(str(idx),)
-            )
-        
-        # Guardar referencia temporal para eliminar
+        rows = [
+            ((str(a.date), a.time.strftime("%H:%M"), a.customer.dni, a.car.plate, f"{a.cost} €"), (str(idx),))
+            for idx, a in enumerate(sorted_appts)
+        ]
+        return sorted_appts, rows
+    
+    def _show_appointments(self, loaded: Tuple[List[Appointment], List[TableRow]]) -> None:
+        sorted_appts, rows = loaded
+        # Guardar referencia temporal para eliminar (los tags de cada fila son su posicion)
         self._current_appointments = sorted_appts
+        self._fill_table_in_batches(self.appt_table, rows)
     
     def _open_new_appt_dialog(self) -> None:
         """Abre diálogo para nueva cita."""
@@ -899,10 +1084,9 @@ class MainWindow:
             try:
                 data = form.get_data()
                 
-                # Primero eliminamos la cita original
-                self.del_appt.execute(original_appt)
-                # Luego creamos la nueva cita actualizada
-                self.sched_appt.execute(
+                # Se mueve la cita en una sola escritura (sin borrarla y volver a crearla)
+                self.resched_appt.execute(
+                    original_appt,
                     customer_dni=data["customer_dni"],
                     car_plate=data["car_plate"],
                     date_=data["date_"],
@@ -937,3 +1121,203 @@ class MainWindow:
                 self._refresh_appt_table()
             except Exception as ex:
                 messagebox.showerror("Error", str(ex))
+    
+    def _open_export_appt_dialog(self) -> None:
+        """Exporta citas a CSV, JSON-lines o iCalendar, con filtros opcionales."""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Exportar Citas")
+        dialog.geometry("600x400")
+        dialog.resizable(False, False)
+        dialog.transient(self.root)
+        dialog.grab_set()
+        dialog.configure(bg=self.COLORS['bg_dialog'])
+        
+        form = ExportForm(dialog)
+        form.load_customers(self.list_cust.execute())
+        form.pack(fill=tk.BOTH, expand=True)
+        
+        btn_frame = tk.Frame(dialog, bg=self.COLORS['bg_dialog'])
+        btn_frame.pack(fill=tk.X, padx=20, pady=10)
+        
+        def export():
+            if not form.validate():
+                return
+            data = form.get_data()
+            path = filedialog.asksaveasfilename(
+                parent=dialog,
+                title="Guardar exportación",
+                defaultextension=data["extension"],
+                filetypes=[(data["format"].upper(), f"*{data['extension']}")],
+            )
+            if not path:
+                return
+            
+            def work() -> int:
+                # Import perezoso: solo hace falta al exportar
+                from adapters.exporting.appointment_export import export_to_file
+                appointments = self.export_appt.execute(data["start"], data["end"], data["dni"])
+                return export_to_file(appointments, data["format"], path)
+            
+            def done(count: int) -> None:
+                #El dialogo se puede haber cerrado mientras se escribia el fichero
+                if dialog.winfo_exists():
+                    dialog.destroy()
+                messagebox.showinfo("Éxito", f"{count} citas exportadas a {path}")
+            
+            def failed(ex: Exception) -> None:
+                if not dialog.winfo_exists():
+                    messagebox.showerror("Error", str(ex))
+                    return
+                export_btn.configure(state=tk.NORMAL, text="Exportar")
+                form.show_global_error(str(ex))
+            
+            #Exportar recorre todo el rango pedido: se hace en un hilo para no congelar la ventana
+            export_btn.configure(state=tk.DISABLED, text="Exportando…")
+            self._run_in_background(work, done, failed)
+        
+        export_btn = self._create_dialog_button(btn_frame, "Exportar", export, style='primary')
+        export_btn.pack(side=tk.RIGHT, padx=5)
+        self._create_dialog_button(btn_frame, "Cancelar", dialog.destroy, style='secondary').pack(side=tk.RIGHT, padx=5)
+
+    
+    # ==========================
+    # DASHBOARD LOGIC
+    # ==========================
+    def _build_dashboard_tab(self, tab: tk.Frame) -> None:
+        """Construye el tab de dashboard (KPIs a partir de agregados cacheados)."""
+        # Header
+        header = tk.Frame(tab, bg=self.COLORS['bg_secondary'], height=60)
+        header.pack(fill=tk.X, padx=0, pady=0)
+        header.pack_propagate(False)
+        
+        header_inner = tk.Frame(header, bg=self.COLORS['bg_secondary'])
+        header_inner.pack(fill=tk.BOTH, expand=True, padx=20, pady=15)
+        
+        tk.Label(
+            header_inner,
+            text="Resumen del Taller",
+            font=("Segoe UI", 18, "bold"),
+            bg=self.COLORS['bg_secondary'],
+            fg=self.COLORS['text_primary']
+        ).pack(side=tk.LEFT)
+        
+        self.month_revenue_label = tk.Label(
+            header_inner,
+            text="",
+            font=("Segoe UI", 14, "bold"),
+            bg=self.COLORS['bg_secondary'],
+            fg=self.COLORS['success']
+        )
+        self.month_revenue_label.pack(side=tk.RIGHT)
+        
+        # Rejilla 2x2 de tarjetas
+        grid = tk.Frame(tab, bg=self.COLORS['bg_main'])
+        grid.pack(fill=tk.BOTH, expand=True, padx=20, pady=15)
+        grid.columnconfigure((0, 1), weight=1, uniform="dash")
+        grid.rowconfigure((0, 1), weight=1, uniform="dash")
+        
+        self.agenda_table = self._create_dashboard_card(
+            grid, 0, 0, "📅 Agenda de hoy",
+            {"Hora": 80, "Cliente": 120, "Coche": 120, "Coste": 100}
+        )
+        self.workload_table = self._create_dashboard_card(
+            grid, 0, 1, "📈 Carga próximos 7 días",
+            {"Día": 140, "Citas": 80, "Facturación": 120}
+        )
+        self.revision_table = self._create_dashboard_card(
+            grid, 1, 0, "🔧 Coches pendientes de revisión",
+            {"Matrícula": 120, "Marca/Modelo": 200, "Última": 120}
+        )
+        self.top_cust_table = self._create_dashboard_card(
+            grid, 1, 1, "🏆 Mejores clientes",
+            {"DNI": 120, "Citas": 80, "Total": 120, "Media": 100}
+        )
+    
+    def _create_dashboard_card(self, parent, row, column, title, widths) -> ttk.Treeview:
+        """Helper para crear una tarjeta del dashboard con titulo y tabla."""
+        card = tk.Frame(parent, bg=self.COLORS['bg_card'])
+        card.grid(row=row, column=column, sticky="nsew", padx=8, pady=8)
+        
+        tk.Label(
+            card,
+            text=title,
+            font=("Segoe UI", 12, "bold"),
+            bg=self.COLORS['bg_card'],
+            fg=self.COLORS['text_primary']
+        ).pack(anchor="w", padx=12, pady=(10, 5))
+        
+        table = ttk.Treeview(
+            card,
+            columns=tuple(widths),
+            show="headings",
+            height=5,
+            style='Modern.Treeview'
+        )
+        for col, width in widths.items():
+            table.heading(col, text=col)
+            table.column(col, width=width)
+        table.pack(fill=tk.BOTH, expand=True, padx=12, pady=(0, 12))
+        return table
+    
+    def _on_tab_changed(self, event=None) -> None:
+        """Construye/carga la pestaña mostrada; el dashboard se repinta si sus datos han cambiado."""
+        selected = self.notebook.select()
+        self._ensure_tab_loaded(selected)
+        if self.dashboard_tab is not None and selected == str(self.dashboard_tab):
+            self._refresh_dashboard()
+    
+    def _refresh_dashboard(self) -> None:
+        """Refresca los widgets del dashboard cuyas fuentes han cambiado."""
+        stale = set(self._dashboard_stale)
+        self._dashboard_stale.clear()
+        self._show_dashboard(self._fetch_dashboard(stale))
+    
+    def _prefetch_dashboard(self) -> None:
+        """Lee los datos del dashboard en segundo plano y lo pinta al terminar."""
+        #Lo que cambie mientras se lee vuelve a quedar pendiente para el proximo pintado
+        stale = set(self._dashboard_stale)
+        self._dashboard_stale.clear()
+        self._run_in_background(lambda: self._fetch_dashboard(stale), self._show_dashboard)
+    
+    def _fetch_dashboard(self, stale: Set[str]) -> Dict[str, Any]:
+        """Datos de los widgets cuyas fuentes estan en stale (no toca tkinter: vale desde otro hilo)."""
+        data: Dict[str, Any] = {}
+        if 'appointments' in stale:
+            today = date.today()
+            data['agenda'] = [
+                (e.time.strftime("%H:%M"), e.customer_dni, e.car_plate, f"{e.cost:.2f} €")
+                for e in self.get_agenda.execute(today)
+            ]
+            data['workload'] = [
+                (day.strftime("%a %d/%m"), summary.count, f"{summary.total:.2f} €")
+                for day, summary in self.get_workload.execute(today, 7)
+            ]
+            data['top_customers'] = [
+                (dni, summary.count, f"{summary.total:.2f} €", f"{summary.average():.2f} €")
+                for dni, summary in self.get_top_cust.execute(5)
+            ]
+            data['month'] = self.get_month_rev.execute(today.year, today.month)
+        if 'cars' in stale:
+            data['revision'] = [
+                (c.plate, f"{c.brand} {c.model}", str(c.last_revision) if c.last_revision else "Nunca")
+                for c in self.list_cars_rev.execute()
+            ]
+        return data
+    
+    def _show_dashboard(self, data: Dict[str, Any]) -> None:
+        if 'agenda' in data:
+            self._fill_table(self.agenda_table, data['agenda'])
+            self._fill_table(self.workload_table, data['workload'])
+            self._fill_table(self.top_cust_table, data['top_customers'])
+            month = data['month']
+            self.month_revenue_label.config(
+                text=f"Facturación del mes: {month.total:.2f} € ({month.count} citas)"
+            )
+        if 'revision' in data:
+            self._fill_table(self.revision_table, data['revision'])
+    
+    def _fill_table(self, table: ttk.Treeview, rows: List[tuple]) -> None:
+        """Sustituye el contenido de una tabla por las filas dadas."""
+        table.delete(*table.get_children())
+        for row in rows:
+            table.insert("", tk.END, values=row)
@@ -0,0 +1,135 @@
+"""
+Benchmark de los informes de periodo (analytics en la linea de comandos):
+instantanea columnar (adapters/analytics/appointment_columns.py) frente a
+recorrer las citas de dominio que devuelve list_all.
+
+Para cada formato del almacen (json, bin) y cada camino se calcula el mismo
+informe: facturacion por mes de todo el historico, citas por hora y ocupacion
+por dia del ultimo año. Se mide:
+
+  - primera: la primera llamada de un proceso (incluye exportar las columnas)
+  - repetida: las siguientes (mejor de --repeat vueltas; la instantanea ya esta hecha)
+
+y la aceleracion de la repetida frente a recorrer los objetos. El camino
+"python" es el mismo columnar sin NumPy (lo que se usa si no esta instalado).
+Referencia con 50000 citas: numpy ~100x, python ~30-40x; agrupar por cliente o
+coche sin NumPy sigue siendo un bucle por fila y acelera bastante menos.
+
+Uso:
+    python -m benchmarks.bench_analytics --size 200000 --repeat 5
+"""
+import argparse
+import json
+import shutil
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List
+
+from adapters.analytics import appointment_columns
+from bootstrap import build_services
+from tools.generate_dataset import generate
+
+FORMATS = ("json", "bin")
+TODAY = date(2026, 1, 1)
+SLOTS_PER_DAY = 8
+
+
+def best_of(repeat: int, fn: Callable[[], Any]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def columnar_report(services) -> Any:
+    start = TODAY - timedelta(days=365)
+    return (
+        services.get_revenue_breakdown.execute(None, None, "month"),
+        services.get_busy_hours.execute(start, TODAY),
+        services.get_utilisation.execute(start, TODAY, SLOTS_PER_DAY),
+    )
+
+
+def objects_report(services) -> Any:
+    """El mismo informe recorriendo las citas hidratadas"""
+    start = TODAY - timedelta(days=365)
+    months: Dict[str, float] = defaultdict(float)
+    hours: Dict[int, int] = defaultdict(int)
+    days: Dict[date, int] = defaultdict(int)
+    for a in services.appointment_repo.list_all():
+        months[f"{a.date.year:04d}-{a.date.month:02d}"] += a.cost
+        if start <= a.date <= TODAY:
+            hours[a.time.hour] += 1
+            days[a.date] += 1
+    return (
+        sorted((k, round(v, 2)) for k, v in months.items()),
+        sorted(hours.items()),
+        sorted((d, n / SLOTS_PER_DAY) for d, n in days.items()),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Informes de periodo: columnar frente a objetos de dominio")
+    parser.add_argument("--size", type=int, default=200000, help="Numero de citas del dataset")
+    parser.add_argument("--repeat", type=int, default=3, help="Vueltas por medida (se queda la mejor)")
+    parser.add_argument("--output", help="Guarda los resultados en este JSON")
+    args = parser.parse_args()
+
+    n_customers = max(10, args.size // 10)
+    n_cars = max(10, args.size // 8)
+    paths = [("objetos", None), ("python", False)]
+    if appointment_columns.np is not None:
+        paths.insert(1, ("numpy", True))
+    numpy_module = appointment_columns.np
+    results: List[Dict[str, Any]] = []
+    print(f"\n== Informes de periodo @ {args.size} citas ({n_customers} clientes, {n_cars} coches)")
+    print(f"{'almacen':<10}{'camino':<10}{'primera ms':>12}{'repetida ms':>13}{'aceleracion':>13}")
+    for fmt in FORMATS:
+        data_dir = tempfile.mkdtemp(prefix="bench_analytics_")
+        try:
+            generate(data_dir, n_customers, n_cars, args.size, seed=42, fmt=fmt, today=TODAY)
+            baseline = None
+            expected = None
+            for name, use_numpy in paths:
+                appointment_columns.np = numpy_module if use_numpy else None
+                report = objects_report if use_numpy is None else columnar_report
+                #Servicios nuevos: la primera llamada paga cargar el almacen y, si es columnar, exportarlo
+                services = build_services(data_dir)
+                start = time.perf_counter()
+                first = report(services)
+                first_s = time.perf_counter() - start
+                repeated_s = best_of(args.repeat, lambda: report(services))
+                if expected is None:
+                    expected = first
+                elif first[1:] != expected[1:] or [k for k, _ in first[0]] != [k for k, _ in expected[0]]:
+                    raise SystemExit(f"El camino {name} no da el mismo informe ({fmt})")
+                if baseline is None:
+                    baseline = repeated_s
+                row = {
+                    "store": fmt, "path": name,
+                    "first_ms": round(first_s * 1000, 1),
+                    "repeated_ms": round(repeated_s * 1000, 2),
+                    "speedup": round(baseline / repeated_s, 1),
+                }
+                results.append(row)
+                print(f"{fmt:<10}{name:<10}{row['first_ms']:>12}{row['repeated_ms']:>13}{row['speedup']:>12}x")
+        finally:
+            appointment_columns.np = numpy_module
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    if numpy_module is None:
+        print("NumPy no esta instalado: solo se mide el camino python (instalalo para vectorizar)")
+    else:
+        print("El camino python es el que se usa sin NumPy (por cliente o coche acelera menos)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"size": args.size, "results": results}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
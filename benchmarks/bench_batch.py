@@ -0,0 +1,132 @@
+"""
+Benchmark de las escrituras por lotes (add_many / upsert_many / delete_many)
+frente a las mismas operaciones hechas con llamadas sueltas en bucle.
+
+Sobre un dataset sintetico y para cada entidad (clientes, coches y citas, estas
+con sus agregados) se mide, con el mismo tamaño de lote:
+
+  - add:    N x add         frente a add_many(N)
+  - update: N x update      frente a upsert_many(N)
+  - delete: N x delete      frente a delete_many(N)
+
+Cada llamada suelta reescribe el fichero entero, asi que el bucle cuesta N
+escrituras y el lote una sola, sea cual sea N.
+
+Uso:
+    python -m benchmarks.bench_batch --size 10000 --batch 10,100,1000
+"""
+import argparse
+import dataclasses
+import json
+import shutil
+import tempfile
+import time
+from datetime import date, time as time_, timedelta
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.stress_multiprocess import make_customer, open_stores
+from tools.generate_dataset import dni_for, generate, plate_for
+
+OPERATIONS = ("add", "update", "delete")
+
+
+def timed(fn: Callable[[], None]) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def make_car(i: int):
+    from core.domain.car import Car
+    return Car(plate=plate_for(i), brand="Seat", model="Leon", year=2015, last_revision=None)
+
+
+def appointment_factory(stores: tuple) -> Callable[[int], object]:
+    from core.domain.appointment import Appointment
+    customers, cars = stores[0], stores[1]
+    customer = customers.get_by_dni(dni_for(0))
+    car = cars.get_by_plate(plate_for(0))
+    first_day = date.today() + timedelta(days=1000)
+
+    def make(i: int):
+        return Appointment(customer=customer, car=car, date=first_day + timedelta(days=i // 10),
+                           time=time_(8 + i % 10, 0), cost=50.0)
+    return make
+
+
+def entity_cases(stores: tuple) -> List[Tuple[str, object, Callable[[int], object], Callable[[object], object]]]:
+    """(entidad, repositorio, fabrica de registros nuevos, clave para borrar)"""
+    customers, cars, _, _, appointments = stores
+    return [
+        ("customers", customers, make_customer, lambda c: c.dni),
+        ("cars", cars, make_car, lambda c: c.plate),
+        ("appointments", appointments, appointment_factory(stores), lambda a: a),
+    ]
+
+
+def run_case(repo, make, key_of, batch: int, offset: int) -> Dict[str, Tuple[float, float]]:
+    """Devuelve operacion -> (segundos en bucle, segundos en lote) para un lote de batch registros"""
+    looped = [make(offset + i) for i in range(batch)]
+    batched = [make(offset + batch + i) for i in range(batch)]
+
+    def changed(items: list) -> list:
+        return [dataclasses.replace(item) for item in items]
+
+    def loop(method: str, items: list) -> Callable[[], None]:
+        call = getattr(repo, method)
+        return lambda: [call(item) for item in items]
+
+    return {
+        "add": (timed(loop("add", looped)), timed(lambda: repo.add_many(batched))),
+        "update": (timed(loop("update", changed(looped))), timed(lambda: repo.upsert_many(changed(batched)))),
+        "delete": (timed(loop("delete", [key_of(x) for x in looped])),
+                   timed(lambda: repo.delete_many([key_of(x) for x in batched]))),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Escrituras por lotes frente a llamadas sueltas")
+    parser.add_argument("--size", type=int, default=10000, help="Numero de citas del dataset")
+    parser.add_argument("--batch", default="10,100", help="Tamaños de lote separados por comas")
+    parser.add_argument("--output", help="Guarda los resultados en este JSON")
+    args = parser.parse_args()
+
+    batches = [int(b) for b in args.batch.split(",") if b.strip()]
+    n_customers = max(10, args.size // 10)
+    n_cars = max(10, args.size // 8)
+    data_dir = tempfile.mkdtemp(prefix="bench_batch_")
+    results = []
+    try:
+        generate(data_dir, n_customers, n_cars, args.size, seed=42)
+        stores = open_stores(data_dir)
+        stores[3].rebuild(stores[2].list_all())
+
+        print(f"\n== Lotes @ {args.size} citas ({n_customers} clientes, {n_cars} coches)")
+        print(f"{'entidad':<14}{'op':<8}{'lote':>6}{'bucle ops/s':>14}{'lote ops/s':>14}{'x':>8}")
+        #Claves nuevas por encima de las del dataset para no chocar con lo ya guardado
+        offset = max(n_customers, n_cars) + 1
+        for batch in batches:
+            for entity, repo, make, key_of in entity_cases(stores):
+                timings = run_case(repo, make, key_of, batch, offset)
+                for op in OPERATIONS:
+                    loop_s, batch_s = timings[op]
+                    row = {
+                        "entity": entity, "op": op, "batch": batch,
+                        "loop_ops_per_sec": round(batch / loop_s, 1),
+                        "batch_ops_per_sec": round(batch / batch_s, 1),
+                        "speedup": round(loop_s / batch_s, 1),
+                    }
+                    results.append(row)
+                    print(f"{entity:<14}{op:<8}{batch:>6}{row['loop_ops_per_sec']:>14}"
+                          f"{row['batch_ops_per_sec']:>14}{row['speedup']:>8}")
+            offset += 2 * batch
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"size": args.size, "results": results}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
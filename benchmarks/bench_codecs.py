@@ -0,0 +1,93 @@
+"""
+Benchmark de los codificadores JSON (adapters/persistence/json_codec.py) sobre
+los ficheros reales de un dataset sintetico: clientes, coches y citas.
+
+Para cada codificador instalado, en modo indentado y compacto, se mide:
+
+  - parse: bytes -> listas y diccionarios (lo que hace cada recarga de cache)
+  - dump:  listas y diccionarios -> bytes (lo que hace cada escritura)
+
+en MB/s y filas/s (mejor de --repeat vueltas), y el tamaño del fichero que
+escribe cada modo.
+
+Uso:
+    python -m benchmarks.bench_codecs --size 100000 --repeat 5
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+from adapters.persistence.json_codec import available_codecs, make_codec
+from tools.generate_dataset import generate
+
+ENTITIES = ("customers", "cars", "appointments")
+MB = 1024 * 1024
+
+
+def best_of(repeat: int, fn: Callable[[], Any]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Lectura y escritura de los ficheros JSON con cada codificador")
+    parser.add_argument("--size", type=int, default=100000, help="Numero de citas del dataset")
+    parser.add_argument("--repeat", type=int, default=3, help="Vueltas por medida (se queda la mejor)")
+    parser.add_argument("--codecs", default=",".join(available_codecs()), help="Codificadores separados por comas")
+    parser.add_argument("--output", help="Guarda los resultados en este JSON")
+    args = parser.parse_args()
+
+    codecs = [c for c in args.codecs.split(",") if c.strip()]
+    n_customers = max(10, args.size // 10)
+    n_cars = max(10, args.size // 8)
+    data_dir = tempfile.mkdtemp(prefix="bench_codecs_")
+    results: List[Dict[str, Any]] = []
+    try:
+        generate(data_dir, n_customers, n_cars, args.size, seed=42)
+        print(f"\n== Codificadores JSON @ {args.size} citas ({n_customers} clientes, {n_cars} coches)")
+        print(f"{'fichero':<14}{'codec':<10}{'modo':<10}{'parse MB/s':>12}{'parse filas/s':>16}"
+              f"{'dump MB/s':>12}{'dump filas/s':>15}{'bytes':>12}")
+        for entity in ENTITIES:
+            with open(os.path.join(data_dir, f"{entity}.json"), "rb") as f:
+                raw = f.read()
+            #Todos los codificadores parten de los mismos datos y se comparan con ellos
+            data = json.loads(raw)
+            for name in codecs:
+                for compact in (False, True):
+                    codec = make_codec(name, compact)
+                    written = codec.dumps(data)
+                    if codec.loads(written) != data:
+                        raise SystemExit(f"{name} no conserva los datos de {entity}")
+                    #Se parsea el fichero tal como lo escribe este modo
+                    parse_s = best_of(args.repeat, lambda: codec.loads(written))
+                    dump_s = best_of(args.repeat, lambda: codec.dumps(data))
+                    row = {
+                        "file": entity, "codec": name, "mode": "compact" if compact else "indent",
+                        "parse_mb_per_sec": round(len(written) / MB / parse_s, 1),
+                        "parse_rows_per_sec": round(len(data) / parse_s),
+                        "dump_mb_per_sec": round(len(written) / MB / dump_s, 1),
+                        "dump_rows_per_sec": round(len(data) / dump_s),
+                        "bytes": len(written),
+                    }
+                    results.append(row)
+                    print(f"{entity:<14}{name:<10}{row['mode']:<10}{row['parse_mb_per_sec']:>12}"
+                          f"{row['parse_rows_per_sec']:>16}{row['dump_mb_per_sec']:>12}"
+                          f"{row['dump_rows_per_sec']:>15}{row['bytes']:>12}")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"size": args.size, "results": results}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
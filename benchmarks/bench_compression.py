@@ -0,0 +1,125 @@
+"""
+Benchmark de la compresion de los ficheros JSON (adapters/persistence/file_compression.py):
+CPU frente a E/S para cada compresion sobre clientes, coches y citas sinteticos.
+
+Para cada fichero y compresion disponible se lee y escribe con el mismo camino que
+usan los repositorios (_read_json / _write_json, con el codificador por defecto) y
+se informa de:
+
+  - bytes en disco y ratio frente al fichero sin comprimir
+  - segundos de escritura y de lectura (mejor de --repeat, con el fichero en cache)
+  - pico de memoria de una lectura (tracemalloc): la descompresion es en streaming
+  - disco "break-even": por debajo de esa velocidad de lectura del disco, leer el
+    fichero comprimido sale mas rapido que leerlo sin comprimir (los bytes que se
+    ahorran compensan la CPU de descomprimir)
+
+Uso:
+    python -m benchmarks.bench_compression --size 100000 --repeat 3
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from adapters.persistence.file_compression import available_compressions, make_compression
+from tools.generate_dataset import generate
+
+MB = 1024 * 1024
+
+
+def entity_repos() -> Dict[str, Callable[[str], Any]]:
+    from adapters.persistence.appointment_json_repository import AppointmentJsonRepository
+    from adapters.persistence.car_json_repository import CarJsonRepository
+    from adapters.persistence.customer_json_repository import CustomerJsonRepository
+    return {
+        "customers": CustomerJsonRepository,
+        "cars": CarJsonRepository,
+        #Solo se usa la lectura/escritura cruda: no hacen falta los repositorios de clientes y coches
+        "appointments": lambda path: AppointmentJsonRepository(path, None, None),
+    }
+
+
+def best_of(repeat: int, fn: Callable[[], Any]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def read_peak(fn: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def break_even(plain: Dict[str, Any], row: Dict[str, Any]) -> str:
+    """Velocidad de disco (MB/s) por debajo de la cual compensa leer comprimido"""
+    saved = plain["bytes"] - row["bytes"]
+    extra_cpu = row["read_s"] - plain["read_s"]
+    if saved <= 0:
+        return "nunca"
+    if extra_cpu <= 0:
+        return "siempre"
+    return f"{saved / MB / extra_cpu:.0f} MB/s"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="CPU frente a E/S de cada compresion de los ficheros JSON")
+    parser.add_argument("--size", type=int, default=100000, help="Numero de citas del dataset")
+    parser.add_argument("--repeat", type=int, default=3, help="Vueltas por medida (se queda la mejor)")
+    parser.add_argument("--compressions", default=",".join(available_compressions()),
+                        help="Compresiones separadas por comas")
+    parser.add_argument("--output", help="Guarda los resultados en este JSON")
+    args = parser.parse_args()
+
+    compressions = [c for c in args.compressions.split(",") if c.strip()]
+    if "none" not in compressions:
+        compressions.insert(0, "none")
+    n_customers = max(10, args.size // 10)
+    n_cars = max(10, args.size // 8)
+    data_dir = tempfile.mkdtemp(prefix="bench_compression_")
+    results: List[Dict[str, Any]] = []
+    try:
+        generate(data_dir, n_customers, n_cars, args.size, seed=42)
+        print(f"\n== Compresion @ {args.size} citas ({n_customers} clientes, {n_cars} coches)")
+        print(f"{'fichero':<14}{'compresion':<12}{'bytes':>12}{'ratio':>8}{'escribir s':>12}"
+              f"{'leer s':>10}{'pico MB':>10}{'compensa con disco <':>22}")
+        for entity, make_repo in entity_repos().items():
+            data = make_repo(os.path.join(data_dir, f"{entity}.json"))._read_json()
+            plain: Dict[str, Any] = {}
+            for name in compressions:
+                path = os.path.join(data_dir, f"{entity}.bench.json{make_compression(name).extension}")
+                repo = make_repo(path)
+                write_s = best_of(args.repeat, lambda: repo._write_json(data))
+                read_s = best_of(args.repeat, repo._read_json)
+                row = {
+                    "file": entity, "compression": name, "bytes": os.path.getsize(path),
+                    "write_s": round(write_s, 4), "read_s": round(read_s, 4),
+                    "read_peak_mb": round(read_peak(repo._read_json) / MB, 1),
+                }
+                if name == "none":
+                    plain = row
+                row["ratio"] = round(plain["bytes"] / row["bytes"], 2)
+                row["break_even"] = "-" if name == "none" else break_even(plain, row)
+                results.append(row)
+                print(f"{entity:<14}{name:<12}{row['bytes']:>12}{row['ratio']:>8}{row['write_s']:>12}"
+                      f"{row['read_s']:>10}{row['read_peak_mb']:>10}{row['break_even']:>22}")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"size": args.size, "results": results}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
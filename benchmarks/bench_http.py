@@ -0,0 +1,178 @@
+"""
+Generador de carga local para la API HTTP (adapters/http).
+
+Arranca `python -m adapters.http` en un subproceso sobre un dataset sintetico
+y lanza muchos clientes concurrentes (hilos repartidos en varios procesos para
+que el GIL del cliente no sea el cuello de botella). Cada cliente mantiene una
+conexion keep-alive y repite una mezcla de peticiones; la mitad de los GET se
+revalidan con If-None-Match para medir tambien las respuestas 304.
+
+Uso:
+    python -m benchmarks.bench_http --clients 128 --duration 10
+    python -m benchmarks.bench_http --size 100000 --writes 0.05 --output http.json
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+from benchmarks.bench_repositories import _percentile
+from tools.generate_dataset import dni_for, generate, plate_for
+
+
+def request_mix(rng: random.Random, n_customers: int, n_cars: int, today: date) -> Tuple[str, str, str]:
+    """Devuelve (nombre, metodo, ruta) de la siguiente peticion de lectura"""
+    roll = rng.random()
+    if roll < 0.25:
+        return "customers_page", "GET", f"/customers?offset={rng.randrange(0, max(1, n_customers - 50))}&limit=50"
+    if roll < 0.45:
+        return "customer", "GET", f"/customers/{dni_for(rng.randrange(n_customers))}"
+    if roll < 0.60:
+        return "car_appointments", "GET", f"/cars/{plate_for(rng.randrange(n_cars))}/appointments"
+    if roll < 0.80:
+        day = today + timedelta(days=rng.randrange(-30, 30))
+        return "appointments_by_date", "GET", f"/appointments?date={day.isoformat()}&limit=100"
+    if roll < 0.90:
+        return "report_month", "GET", "/reports/month"
+    return "agenda", "GET", "/reports/agenda"
+
+
+def run_client(host: str, port: int, seed: int, deadline: float, n_customers: int, n_cars: int, writes: float,
+               samples: List[Tuple[str, int, float]]) -> None:
+    rng = random.Random(seed)
+    today = date.today()
+    etags: Dict[str, str] = {}
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    while time.monotonic() < deadline:
+        headers = {}
+        if rng.random() < writes:
+            name, method, path = "schedule", "POST", "/appointments"
+            day = today + timedelta(days=rng.randrange(400, 800))
+            body = json.dumps({
+                "customer_dni": dni_for(rng.randrange(n_customers)), "car_plate": plate_for(rng.randrange(n_cars)),
+                "date": day.isoformat(), "time": f"{rng.randrange(8, 20):02d}:{rng.choice((0, 30)):02d}",
+                "cost": round(rng.uniform(30, 300), 2),
+            }).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        else:
+            name, method, path = request_mix(rng, n_customers, n_cars, today)
+            body = None
+            if path in etags and rng.random() < 0.5:
+                headers["If-None-Match"] = etags[path]
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+            samples.append((name, 0, (time.perf_counter() - start) * 1000))
+            continue
+        samples.append((name, response.status, (time.perf_counter() - start) * 1000))
+        if response.getheader("ETag"):
+            etags[path] = response.getheader("ETag")
+    conn.close()
+
+
+def run_load_process(args: tuple) -> List[Tuple[str, int, float]]:
+    """Un proceso generador: varios hilos cliente hasta la fecha limite"""
+    host, port, threads, seed, deadline, n_customers, n_cars, writes = args
+    samples: List[Tuple[str, int, float]] = []
+    workers = [
+        threading.Thread(target=run_client, args=(host, port, seed * 1000 + i, deadline, n_customers, n_cars, writes, samples))
+        for i in range(threads)
+    ]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return samples
+
+
+def summarize(samples: List[Tuple[str, int, float]], duration: float) -> dict:
+    by_name: Dict[str, List[float]] = {}
+    for name, _, ms in samples:
+        by_name.setdefault(name, []).append(ms)
+    latencies = [ms for _, _, ms in samples]
+    return {
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / duration, 1),
+        "p50_ms": round(_percentile(latencies, 50), 3) if latencies else None,
+        "p99_ms": round(_percentile(latencies, 99), 3) if latencies else None,
+        "status": dict(Counter(str(status) for _, status, _ in samples)),
+        "endpoints": {
+            name: {"requests": len(ms), "p50_ms": round(_percentile(ms, 50), 3), "p99_ms": round(_percentile(ms, 99), 3)}
+            for name, ms in sorted(by_name.items())
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generador de carga para la API HTTP")
+    parser.add_argument("--size", type=int, default=10000, help="Numero de citas del dataset")
+    parser.add_argument("--clients", type=int, default=128, help="Clientes concurrentes en total")
+    parser.add_argument("--processes", type=int, default=4, help="Procesos generadores de carga")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos de carga")
+    parser.add_argument("--writes", type=float, default=0.0, help="Fraccion de peticiones que programan una cita")
+    parser.add_argument("--output", help="Guarda el resumen en este JSON")
+    args = parser.parse_args()
+
+    n_customers = max(10, args.size // 10)
+    n_cars = max(10, args.size // 8)
+    data_dir = tempfile.mkdtemp(prefix="bench_http_")
+    server = None
+    try:
+        generate(data_dir, n_customers, n_cars, args.size, seed=42)
+        server = subprocess.Popen(
+            [sys.executable, "-m", "adapters.http", "--data", data_dir, "--port", "0", "--quiet"],
+            stdout=subprocess.PIPE, text=True,
+        )
+        #La primera linea anuncia el puerto elegido
+        banner = server.stdout.readline()
+        host, port = banner.strip().rsplit("//", 1)[1].rsplit(":", 1)
+
+        processes = max(1, min(args.processes, args.clients))
+        per_process = [args.clients // processes + (1 if i < args.clients % processes else 0) for i in range(processes)]
+        deadline = time.monotonic() + args.duration
+        jobs = [(host, int(port), threads, i, deadline, n_customers, n_cars, args.writes)
+                for i, threads in enumerate(per_process)]
+        start = time.monotonic()
+        with multiprocessing.Pool(processes) as pool:
+            samples = [s for chunk in pool.map(run_load_process, jobs) for s in chunk]
+        summary = summarize(samples, time.monotonic() - start)
+    finally:
+        if server:
+            server.send_signal(signal.SIGINT)
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    summary.update(size=args.size, clients=args.clients, writes=args.writes)
+    print(f"\n== HTTP @ {args.size} citas | {args.clients} clientes | {args.duration:.0f} s")
+    print(f"{summary['requests']} peticiones, {summary['throughput_rps']} req/s, "
+          f"p50 {summary['p50_ms']} ms, p99 {summary['p99_ms']} ms, estados {summary['status']}")
+    print(f"{'endpoint':<24}{'peticiones':>12}{'p50 ms':>12}{'p99 ms':>12}")
+    for name, row in summary["endpoints"].items():
+        print(f"{name:<24}{row['requests']:>12}{row['p50_ms']:>12.3f}{row['p99_ms']:>12.3f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""
+Benchmark de los puertos de repositorio y de los casos de uso de core/application.
+
+Para cada adaptador de almacenamiento y cada tamaño (numero de citas) se genera
+un dataset sintetico y se ejecutan todos los metodos de los puertos y todos los
+servicios. Por operacion se mide ops/s, latencia p50/p95/p99 y bytes escritos en
+disco; por tamaño, el pico de memoria (RSS) del proceso que lo ejecuta.
+
+Cada (adaptador, tamaño) corre en un subproceso propio para aislar el pico de RSS
+y poder cortarlo por timeout sin perder las operaciones ya medidas. Un caso que
+se pasa de tiempo se marca como TIMEOUT; uno que termina con error, como FALLO
+con su stderr, y el benchmark acaba con codigo 1.
+
+Uso:
+    python -m benchmarks.bench_repositories --sizes 1000,10000 --output bench.json
+    python -m benchmarks.bench_repositories --save-baseline benchmarks/baseline.json
+    python -m benchmarks.bench_repositories --baseline benchmarks/baseline.json  # falla si hay regresion
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, time as time_, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+from tools.generate_dataset import dni_for, generate, plate_for
+
+DEFAULT_SIZES = "1000,10000,100000,1000000"
+# Percentiles de latencia que se comparan con la linea base
+PERCENTILES = ("p50_ms", "p95_ms", "p99_ms")
+# Caracteres del final del stderr que se guardan de un caso que falla
+STDERR_TAIL = 4000
+
+
+class Stores(NamedTuple):
+    customers: object
+    cars: object
+    appointments: object
+    stats: object
+    files: List[str]
+
+
+# ==========================
+# ADAPTADORES
+# ==========================
+def build_json(data_dir: str) -> Stores:
+    from adapters.persistence.appointment_json_repository import AppointmentJsonRepository
+    from adapters.persistence.appointment_stats_json_repository import AppointmentStatsJsonRepository
+    from adapters.persistence.car_json_repository import CarJsonRepository
+    from adapters.persistence.customer_json_repository import CustomerJsonRepository
+
+    files = [os.path.join(data_dir, f) for f in ("customers.json", "cars.json", "appointments.json", "stats.json")]
+    customers = CustomerJsonRepository(files[0])
+    cars = CarJsonRepository(files[1])
+    appointments = AppointmentJsonRepository(files[2], customers, cars)
+    stats = AppointmentStatsJsonRepository(files[3])
+    return Stores(customers, cars, appointments, stats, files)
+
+
+def build_bin(data_dir: str) -> Stores:
+    """Clientes, coches y agregados en JSON; citas en el almacen binario de ancho fijo"""
+    from adapters.persistence.appointment_binary_repository import AppointmentBinaryRepository
+    from adapters.persistence.appointment_stats_json_repository import AppointmentStatsJsonRepository
+    from adapters.persistence.car_json_repository import CarJsonRepository
+    from adapters.persistence.customer_json_repository import CustomerJsonRepository
+
+    files = [os.path.join(data_dir, f) for f in ("customers.json", "cars.json", "appointments.bin", "stats.json")]
+    customers = CustomerJsonRepository(files[0])
+    cars = CarJsonRepository(files[1])
+    appointments = AppointmentBinaryRepository(files[2], customers, cars)
+    stats = AppointmentStatsJsonRepository(files[3])
+    return Stores(customers, cars, appointments, stats, files)
+
+
+# Adaptador -> (formato del generador, constructor de repositorios)
+ADAPTERS: Dict[str, tuple] = {
+    "json": ("json", build_json),
+    "bin": ("bin", build_bin),
+}
+
+
+# ==========================
+# MEDICION
+# ==========================
+def _percentile(samples: List[float], pct: float) -> float:
+    """Percentil por rango mas cercano"""
+    ordered = sorted(samples)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def measure(name: str, op: Callable[[int], object], files: List[str], repeat: int, budget: float) -> dict:
+    """
+    Ejecuta op(i) hasta repeat veces (o hasta agotar el presupuesto de tiempo). Los bytes
+    escritos en files los cuentan los propios repositorios (observadores de E/S): un
+    almacen que añade o escribe en su sitio no cuenta el fichero entero.
+    """
+    from adapters.persistence.json_base import add_io_observer, remove_io_observer
+    watched = set(files)
+    written = [0]
+
+    def on_io(kind: str, path: str, nbytes: int) -> None:
+        if kind == "write" and path in watched:
+            written[0] += nbytes
+
+    samples: List[float] = []
+    started = time.perf_counter()
+    add_io_observer(on_io)
+    try:
+        for i in range(repeat):
+            t0 = time.perf_counter()
+            op(i)
+            samples.append(time.perf_counter() - t0)
+            if time.perf_counter() - started > budget:
+                break
+    finally:
+        remove_io_observer(on_io)
+    total = sum(samples)
+    return {
+        "op": name,
+        "calls": len(samples),
+        "ops_per_sec": len(samples) / total if total else None,
+        "p50_ms": _percentile(samples, 50) * 1000,
+        "p95_ms": _percentile(samples, 95) * 1000,
+        "p99_ms": _percentile(samples, 99) * 1000,
+        "bytes_written": written[0],
+    }
+
+
+def _peak_rss_kb() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    #Linux lo da en KiB, macOS en bytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+# ==========================
+# ESCENARIO
+# ==========================
+def iter_operations(stores: Stores, n_customers: int, n_cars: int):
+    """Devuelve (nombre, op) de todos los metodos de los puertos y todos los servicios"""
+    from core.application import appointment_services as appt
+    from core.application import car_services as car_s
+    from core.application import customer_services as cust_s
+    from core.application import report_services as rep
+    from core.domain.appointment import Appointment
+    from core.domain.car import Car
+    from core.domain.customer import Customer
+    from adapters.persistence.stats_tracking_appointment_repository import StatsTrackingAppointmentRepository
+
+    customers, cars, stats = stores.customers, stores.cars, stores.stats
+    appointments = StatsTrackingAppointmentRepository(stores.appointments, stats)
+    today = date.today()
+    # Fecha futura libre para las citas nuevas (el generador llega a today + 90)
+    free_day = today + timedelta(days=400)
+
+    def new_customer(i: int, offset: int) -> Customer:
+        return Customer(dni=dni_for(n_customers + offset + i), name="Bench", surname="Mark",
+                        birth_date=date(1990, 1, 1), email=f"bench{offset + i}@example.com", phone="600000000")
+
+    def new_car(i: int, offset: int) -> Car:
+        return Car(plate=plate_for(n_cars + offset + i), brand="Bench", model="Mark", year=2020)
+
+    existing_customer = customers.get_by_dni(dni_for(0))
+    existing_car = cars.get_by_plate(plate_for(0))
+
+    def new_appointment(i: int, day_offset: int) -> Appointment:
+        return Appointment(customer=existing_customer, car=existing_car,
+                           date=free_day + timedelta(days=day_offset + i), time=time_(10), cost=100.0)
+
+    # --- Puertos: clientes ---
+    yield "customers.add", lambda i: customers.add(new_customer(i, 0))
+    yield "customers.get_by_dni", lambda i: customers.get_by_dni(dni_for(i % n_customers))
+    yield "customers.list_all", lambda i: customers.list_all()
+    yield "customers.update", lambda i: customers.update(new_customer(i, 0))
+    yield "customers.delete", lambda i: customers.delete(new_customer(i, 0).dni)
+    # --- Puertos: coches ---
+    yield "cars.add", lambda i: cars.add(new_car(i, 0))
+    yield "cars.get_by_plate", lambda i: cars.get_by_plate(plate_for(i % n_cars))
+    yield "cars.list_all", lambda i: cars.list_all()
+    yield "cars.update", lambda i: cars.update(new_car(i, 0))
+    yield "cars.delete", lambda i: cars.delete(new_car(i, 0).plate)
+    # --- Puertos: citas ---
+    yield "appointments.add", lambda i: appointments.add(new_appointment(i, 0))
+    yield "appointments.list_all", lambda i: appointments.list_all()
+    yield "appointments.find_by_date", lambda i: appointments.find_by_date(today + timedelta(days=i % 30))
+    yield "appointments.find_by_customer", lambda i: appointments.find_by_customer(dni_for(i % n_customers))
+    yield "appointments.find_by_car", lambda i: appointments.find_by_car(plate_for(i % n_cars))
+    yield "appointments.update", lambda i: appointments.update(new_appointment(i, 0))
+    yield "appointments.delete", lambda i: appointments.delete(new_appointment(i, 0))
+
+    # --- Servicios de cliente ---
+    yield "RegisterCustomerService", lambda i: cust_s.RegisterCustomerService(customers).execute(new_customer(i, 10_000_000))
+    yield "GetCustomerbyDniService", lambda i: cust_s.GetCustomerbyDniService(customers).execute(dni_for(i % n_customers))
+    yield "ListCustomerService", lambda i: cust_s.ListCustomerService(customers).execute()
+    yield "UpdateCustomerService", lambda i: cust_s.UpdateCustomerService(customers).execute(new_customer(i, 10_000_000))
+    yield "DeleteCustomerService", lambda i: cust_s.DeleteCustomerService(customers).execute(new_customer(i, 10_000_000).dni)
+    # --- Servicios de coche ---
+    yield "RegisterCarService", lambda i: car_s.RegisterCarService(cars).execute(new_car(i, 10_000_000))
+    yield "GetCarByPlateService", lambda i: car_s.GetCarByPlateService(cars).execute(plate_for(i % n_cars))
+    yield "ListCarsService", lambda i: car_s.ListCarsService(cars).execute()
+    yield "ListCarsDueForRevisionService", lambda i: car_s.ListCarsDueForRevisionService(cars).execute()
+    yield "UpdateCarsService", lambda i: car_s.UpdateCarsService(cars).execute(new_car(i, 10_000_000))
+    yield "DeleteCarsService", lambda i: car_s.DeleteCarsService(cars).execute(new_car(i, 10_000_000).plate)
+    # --- Servicios de cita ---
+    yield "SheduleAppointmentService", lambda i: appt.SheduleAppointmentService(appointments, customers, cars).execute(
+        dni_for(0), plate_for(0), free_day + timedelta(days=1000 + i), time_(10), 100.0)
+    yield "ListAppointmentsByDateService", lambda i: appt.ListAppointmentsByDateService(appointments).execute(today + timedelta(days=i % 30))
+    yield "ListAppointmentsByCustomerService", lambda i: appt.ListAppointmentsByCustomerService(appointments).execute(dni_for(i % n_customers))
+    yield "ListAppointmentsByCarService", lambda i: appt.ListAppointmentsByCarService(appointments).execute(plate_for(i % n_cars))
+    yield "UpdateAppointmentService", lambda i: appt.UpdateAppointmentService(appointments).execute(new_appointment(i, 1000))
+    yield "DeleteAppointmentService", lambda i: appt.DeleteAppointmentService(appointments).execute(new_appointment(i, 1000))
+    # --- Servicios de informes ---
+    yield "GetDailyRevenueService", lambda i: rep.GetDailyRevenueService(stats).execute(today)
+    yield "GetMonthlyRevenueService", lambda i: rep.GetMonthlyRevenueService(stats).execute(today.year, today.month)
+    yield "GetCustomerLifetimeValueService", lambda i: rep.GetCustomerLifetimeValueService(stats).execute(dni_for(0))
+    yield "GetCarSpendService", lambda i: rep.GetCarSpendService(stats).execute(plate_for(0))
+    yield "GetTopCustomersService", lambda i: rep.GetTopCustomersService(stats).execute(5)
+    yield "GetAgendaService", lambda i: rep.GetAgendaService(stats).execute(today)
+    yield "GetWorkloadService", lambda i: rep.GetWorkloadService(stats).execute(today, 7)
+
+
+def run_worker(adapter: str, size: int, repeat: int, budget: float) -> None:
+    """Ejecuta un (adaptador, tamaño) y emite un JSON por linea en stdout"""
+    fmt, build = ADAPTERS[adapter]
+    n_customers = max(10, size // 10)
+    n_cars = max(10, size // 8)
+    data_dir = tempfile.mkdtemp(prefix=f"bench_{adapter}_{size}_")
+    try:
+        generate(data_dir, n_customers, n_cars, size, seed=42, fmt=fmt)
+        stores = build(data_dir)
+        for name, op in iter_operations(stores, n_customers, n_cars):
+            result = measure(name, op, stores.files, repeat, budget)
+            print(json.dumps(result), flush=True)
+        print(json.dumps({"peak_rss_kb": _peak_rss_kb()}), flush=True)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+# ==========================
+# ORQUESTACION
+# ==========================
+def run_case(adapter: str, size: int, repeat: int, budget: float, timeout: float) -> dict:
+    cmd = [sys.executable, "-m", "benchmarks.bench_repositories", "--worker", adapter, str(size),
+           "--repeat", str(repeat), "--op-budget", str(budget)]
+    case = {"adapter": adapter, "size": size, "ops": {}, "peak_rss_kb": None,
+            "timed_out": False, "returncode": None, "stderr": ""}
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    try:
+        stdout, stderr = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        #Si el caso se pasa de tiempo se mata el subproceso; lo ya medido se conserva
+        proc.kill()
+        stdout, stderr = proc.communicate()
+        case["timed_out"] = True
+    for line in stdout.splitlines():
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            #Ultima linea a medio escribir al matar el subproceso
+            continue
+        if "op" in row:
+            case["ops"][row.pop("op")] = row
+        else:
+            case.update(row)
+    case["returncode"] = proc.returncode
+    case["stderr"] = stderr[-STDERR_TAIL:]
+    return case
+
+
+def failed(case: dict) -> bool:
+    """El subproceso termino con error (no por timeout)"""
+    return not case["timed_out"] and case["returncode"] != 0
+
+
+def compare(results: List[dict], baseline: List[dict], tolerance: float, min_delta_ms: float) -> List[str]:
+    """
+    Devuelve las regresiones: p50, p95 o p99 por encima de la linea base mas la tolerancia.
+    Las diferencias menores que min_delta_ms se ignoran (ruido en operaciones de microsegundos),
+    igual que los percentiles que no estan en la linea base.
+    """
+    previous = {(c["adapter"], c["size"]): c["ops"] for c in baseline}
+    regressions = []
+    for case in results:
+        base_ops = previous.get((case["adapter"], case["size"]), {})
+        for op, row in case["ops"].items():
+            base = base_ops.get(op)
+            if not base:
+                continue
+            for metric in PERCENTILES:
+                before, after = base.get(metric), row.get(metric)
+                if before is None or after is None or after - before < min_delta_ms:
+                    continue
+                if after > before * (1 + tolerance):
+                    regressions.append(
+                        f"{case['adapter']}/{case['size']}/{op}: {metric[:-3]} {before:.3f} ms -> {after:.3f} ms"
+                    )
+    return regressions
+
+
+def print_table(results: List[dict]) -> None:
+    for case in results:
+        flag = " (TIMEOUT)" if case["timed_out"] else ""
+        if failed(case):
+            flag = f" (FALLO: codigo {case['returncode']})"
+        print(f"\n== {case['adapter']} @ {case['size']} citas | pico RSS {case['peak_rss_kb']} KiB{flag}")
+        print(f"{'operacion':<36}{'ops/s':>12}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}{'bytes':>14}")
+        for op, row in case["ops"].items():
+            ops = f"{row['ops_per_sec']:.1f}" if row["ops_per_sec"] else "-"
+            p95 = f"{row['p95_ms']:.3f}" if row.get("p95_ms") is not None else "-"
+            print(f"{op:<36}{ops:>12}{row['p50_ms']:>12.3f}{p95:>12}{row['p99_ms']:>12.3f}{row['bytes_written']:>14}")
+        if failed(case) and case["stderr"]:
+            print("  stderr:")
+            for line in case["stderr"].rstrip().splitlines():
+                print("    " + line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de repositorios y servicios")
+    parser.add_argument("--adapters", default=",".join(ADAPTERS))
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Numero de citas, separados por comas")
+    parser.add_argument("--repeat", type=int, default=20, help="Llamadas maximas por operacion")
+    parser.add_argument("--op-budget", type=float, default=2.0, help="Segundos maximos por operacion")
+    parser.add_argument("--timeout", type=float, default=1800.0, help="Segundos maximos por (adaptador, tamaño)")
+    parser.add_argument("--output", help="Guarda los resultados en este JSON")
+    parser.add_argument("--baseline", help="Compara contra esta linea base y falla si hay regresion")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Margen de regresion admitido (0.25 = +25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="Diferencia minima de latencia para contar como regresion")
+    parser.add_argument("--save-baseline", help="Guarda los resultados como nueva linea base")
+    parser.add_argument("--worker", nargs=2, metavar=("ADAPTER", "SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker[0], int(args.worker[1]), args.repeat, args.op_budget)
+        return
+
+    results = []
+    for adapter in args.adapters.split(","):
+        if adapter not in ADAPTERS:
+            parser.error(f"Adaptador desconocido: {adapter}")
+        for size in (int(s) for s in args.sizes.split(",")):
+            results.append(run_case(adapter, size, args.repeat, args.op_budget, args.timeout))
+    print_table(results)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=4)
+
+    broken = [f"{c['adapter']}/{c['size']}" for c in results if failed(c)]
+    if broken:
+        print(f"\n❌ Casos que han fallado: {', '.join(broken)}")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.min_delta_ms)
+        if regressions:
+            print("\n❌ Regresiones respecto a la linea base:")
+            for line in regressions:
+                print("  - " + line)
+            sys.exit(1)
+        print("\n✅ Sin regresiones respecto a la linea base")
+    if broken:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
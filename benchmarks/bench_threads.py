@@ -0,0 +1,173 @@
+"""
+Benchmark multihilo de lecturas sobre los repositorios JSON compartidos.
+
+Con 1, 2, 4, ... hilos lanzando una mezcla de lecturas (cliente por DNI, citas de
+un dia, citas de un cliente, ranking de clientes) sobre las mismas instancias de
+repositorio, mide lecturas/s y latencia p50/p99 en dos modos:
+
+  - rwlock: los repositorios tal cual (cerrojo lector/escritor por repositorio),
+  - mutex:  cada llamada envuelta en un unico Lock global, como se hacia antes.
+
+Con --writer, un hilo mas actualiza coches y programa citas durante la medida,
+para ver cuanto esperan los lectores a un escritor (p99).
+
+Las lecturas son CPU en Python: con el GIL el rendimiento agregado apenas sube
+con los hilos (en un interprete sin GIL si escala). Lo que se gana con el cerrojo
+lector/escritor es que los lectores no hacen cola entre ellos ni detras de la
+preparacion de una escritura (lectura del JSON, serializacion y fsync).
+
+Uso:
+    python -m benchmarks.bench_threads --size 10000 --threads 1,2,4,8,16 --writer
+"""
+import argparse
+import json
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+from datetime import date, time as time_, timedelta
+from typing import Callable, List, Tuple
+
+from benchmarks.bench_repositories import _percentile
+from benchmarks.stress_multiprocess import open_stores
+from tools.generate_dataset import dni_for, generate, plate_for
+
+MODES = ("rwlock", "mutex")
+
+
+def read_mix(stores: tuple, n_customers: int, today: date) -> List[Tuple[str, Callable[[random.Random], object]]]:
+    customers, _, _, stats, appointments = stores
+    return [
+        ("get_by_dni", lambda rng: customers.get_by_dni(dni_for(rng.randrange(n_customers)))),
+        ("find_by_date", lambda rng: appointments.find_by_date(today + timedelta(days=rng.randrange(-30, 30)))),
+        ("find_by_customer", lambda rng: appointments.find_by_customer(dni_for(rng.randrange(n_customers)))),
+        ("top_customers", lambda rng: stats.top_customers(10)),
+    ]
+
+
+def run_readers(mix, threads: int, duration: float, guard) -> List[float]:
+    """Lanza los lectores a la vez y devuelve las latencias (s) de todas sus lecturas"""
+    samples: List[List[float]] = [[] for _ in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def reader(slot: int) -> None:
+        rng = random.Random(slot)
+        out = samples[slot]
+        barrier.wait()
+        deadline = time.perf_counter() + duration
+        while True:
+            _, op = mix[rng.randrange(len(mix))]
+            start = time.perf_counter()
+            with guard:
+                op(rng)
+            end = time.perf_counter()
+            out.append(end - start)
+            if end >= deadline:
+                return
+
+    workers = [threading.Thread(target=reader, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    for worker in workers:
+        worker.join()
+    return [s for chunk in samples for s in chunk]
+
+
+def run_writer(stores: tuple, stop: threading.Event, guard, counter: List[int]) -> None:
+    """Escribe sin pausa: alterna actualizar un coche y programar una cita nueva"""
+    from core.domain.appointment import Appointment
+    customers, cars, _, _, appointments = stores
+    customer = customers.get_by_dni(dni_for(0))
+    car = cars.get_by_plate(plate_for(0))
+    day = date.today() + timedelta(days=400)
+    while not stop.is_set():
+        n = counter[0]
+        with guard:
+            if n % 2:
+                cars.update(car)
+            else:
+                slot = day + timedelta(days=n // 20)
+                appointments.add(Appointment(customer=customer, car=car, date=slot,
+                                             time=time_(8 + n // 2 % 10, 0), cost=10.0))
+        counter[0] += 1
+
+
+def measure(stores: tuple, mix, mode: str, threads: int, duration: float, writer: bool) -> dict:
+    guard = threading.Lock() if mode == "mutex" else nullcontext()
+    stop = threading.Event()
+    writes = [0]
+    writer_thread = threading.Thread(target=run_writer, args=(stores, stop, guard, writes)) if writer else None
+    if writer_thread:
+        writer_thread.start()
+    try:
+        start = time.perf_counter()
+        samples = run_readers(mix, threads, duration, guard)
+        elapsed = time.perf_counter() - start
+    finally:
+        stop.set()
+        if writer_thread:
+            writer_thread.join()
+    return {
+        "mode": mode,
+        "threads": threads,
+        "writer": writer,
+        "reads_per_sec": round(len(samples) / elapsed, 1),
+        "p50_ms": round(_percentile(samples, 50) * 1000, 3),
+        "p99_ms": round(_percentile(samples, 99) * 1000, 3),
+        "writes": writes[0],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Escalado de lecturas concurrentes sobre los repositorios JSON")
+    parser.add_argument("--size", type=int, default=10000, help="Numero de citas del dataset")
+    parser.add_argument("--threads", default="1,2,4,8,16", help="Hilos lectores a probar, separados por comas")
+    parser.add_argument("--duration", type=float, default=3.0, help="Segundos por medida")
+    parser.add_argument("--modes", default=",".join(MODES), help="rwlock, mutex o ambos")
+    parser.add_argument("--writer", action="store_true", help="Repite cada medida con un hilo escritor")
+    parser.add_argument("--output", help="Guarda los resultados en este JSON")
+    args = parser.parse_args()
+
+    thread_counts = [int(t) for t in args.threads.split(",") if t.strip()]
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"Modos desconocidos: {', '.join(sorted(unknown))}")
+
+    n_customers = max(10, args.size // 10)
+    n_cars = max(10, args.size // 8)
+    data_dir = tempfile.mkdtemp(prefix="bench_threads_")
+    results: List[dict] = []
+    try:
+        generate(data_dir, n_customers, n_cars, args.size, seed=42)
+        stores = open_stores(data_dir)
+        stores[3].rebuild(stores[2].list_all())
+        mix = read_mix(stores, n_customers, date.today())
+        #Calienta las caches para medir solo lecturas en memoria
+        warm = random.Random(0)
+        for _, op in mix:
+            op(warm)
+
+        print(f"\n== Lecturas concurrentes @ {args.size} citas ({sys.version.split()[0]})")
+        print(f"{'modo':<8}{'hilos':>6}{'escritor':>10}{'lecturas/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'escrituras':>12}")
+        for writer in ([False, True] if args.writer else [False]):
+            for mode in modes:
+                for threads in thread_counts:
+                    row = measure(stores, mix, mode, threads, args.duration, writer)
+                    results.append(row)
+                    print(f"{mode:<8}{threads:>6}{'si' if writer else 'no':>10}{row['reads_per_sec']:>12}"
+                          f"{row['p50_ms']:>10.3f}{row['p99_ms']:>10.3f}{row['writes']:>12}")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"size": args.size, "results": results}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Prueba de estres multiproceso sobre la misma carpeta de datos (dos o mas
+puestos compartiendo los JSON). N procesos arrancan a la vez y cada uno:
+
+  - registra M clientes nuevos (DNIs distintos por proceso),
+  - actualiza M veces un coche propio (gana el ultimo valor de cada proceso),
+  - programa M citas distintas (con sus agregados incrementales),
+  - cancela la mitad de sus citas (en el almacen binario esto dispara la
+    compactacion mientras los demas procesos siguen escribiendo).
+
+Con --store bin las citas van en el almacen binario (appointments.bin) en vez
+de appointments.json. Al terminar se comprueba que no se ha perdido ninguna
+escritura: estan todos los clientes y las citas no canceladas, no queda
+ninguna cancelada, cada coche tiene su ultimo valor y los agregados
+coinciden con los recalculados desde cero. Tambien se mide la contencion:
+reintentos optimistas y tiempo de espera por el cerrojo.
+
+Uso:
+    python -m benchmarks.stress_multiprocess --processes 8 --ops 50
+    python -m benchmarks.stress_multiprocess --processes 8 --ops 50 --store bin
+"""
+import argparse
+import json
+import multiprocessing
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, time as time_, timedelta
+from typing import Dict, List
+
+from tools.generate_dataset import dni_for, plate_for
+
+
+def open_stores(data_dir: str, store: str = "json"):
+    from adapters.persistence.appointment_binary_repository import AppointmentBinaryRepository
+    from adapters.persistence.appointment_json_repository import AppointmentJsonRepository
+    from adapters.persistence.appointment_stats_json_repository import AppointmentStatsJsonRepository
+    from adapters.persistence.car_json_repository import CarJsonRepository
+    from adapters.persistence.customer_json_repository import CustomerJsonRepository
+    from adapters.persistence.stats_tracking_appointment_repository import StatsTrackingAppointmentRepository
+
+    customers = CustomerJsonRepository(f"{data_dir}/customers.json")
+    cars = CarJsonRepository(f"{data_dir}/cars.json")
+    if store == "bin":
+        appointment_store = AppointmentBinaryRepository(f"{data_dir}/appointments.bin", customers, cars)
+    else:
+        appointment_store = AppointmentJsonRepository(f"{data_dir}/appointments.json", customers, cars)
+    stats = AppointmentStatsJsonRepository(f"{data_dir}/stats.json")
+    appointments = StatsTrackingAppointmentRepository(appointment_store, stats)
+    return customers, cars, appointment_store, stats, appointments
+
+
+def make_customer(i: int):
+    from core.domain.customer import Customer
+    return Customer(dni=dni_for(i), name="Estres", surname="Prueba", birth_date=date(1990, 1, 1),
+                    email=f"estres{i}@example.com", phone="600000000")
+
+
+def make_car(process: int, year: int):
+    from core.domain.car import Car
+    return Car(plate=plate_for(process), brand="Seat", model="Ibiza", year=year, last_revision=None)
+
+
+def appointment_slot(process: int, j: int):
+    """(dia, hora) unicos por proceso para su coche"""
+    return date.today() + timedelta(days=1 + j // 10), time_(8 + j % 10, 0)
+
+
+def cancelled(j: int) -> bool:
+    """Cada proceso cancela las citas impares que ha programado"""
+    return j % 2 == 1
+
+
+def seed_store(data_dir: str, processes: int, store: str) -> None:
+    customers, cars, _, stats, _ = open_stores(data_dir, store)
+    customers.add(make_customer(0))
+    for p in range(processes):
+        cars.add(make_car(p, 2000))
+    stats.rebuild([])
+
+
+def run_worker(args: tuple) -> dict:
+    data_dir, store, process, ops, start_at = args
+    from adapters.persistence.file_lock import LockStats
+    from core.application.appointment_services import DeleteAppointmentService, SheduleAppointmentService
+    from core.application.car_services import UpdateCarsService
+    from core.application.customer_services import RegisterCustomerService
+
+    customers, cars, appointment_store, stats, appointments = open_stores(data_dir, store)
+    register = RegisterCustomerService(customers)
+    update_car = UpdateCarsService(cars)
+    schedule = SheduleAppointmentService(appointments, customers, cars)
+    cancel = DeleteAppointmentService(appointments)
+
+    #Todos los procesos empiezan a la vez para maximizar la contencion
+    time.sleep(max(0.0, start_at - time.time()))
+    timings: Dict[str, float] = {}
+
+    start = time.perf_counter()
+    for j in range(ops):
+        register.execute(make_customer(1 + process * ops + j))
+    timings["customers"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for j in range(ops):
+        update_car.execute(make_car(process, 2001 + j % 20))
+    timings["cars"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scheduled = []
+    for j in range(ops):
+        day, hour = appointment_slot(process, j)
+        scheduled.append(schedule.execute(dni_for(0), plate_for(process), day, hour, 10.0 + process))
+    timings["appointments"] = time.perf_counter() - start
+    #Las cancelaciones cuentan aparte sus reintentos y esperas
+    schedule_locks = appointment_store._lock.stats
+    appointment_store._lock.stats = LockStats()
+
+    start = time.perf_counter()
+    for j, appointment in enumerate(scheduled):
+        if cancelled(j):
+            cancel.execute(appointment)
+    timings["cancel"] = time.perf_counter() - start
+
+    locks = {
+        "customers": customers._lock.stats,
+        "cars": cars._lock.stats,
+        "appointments": schedule_locks,
+        "cancel": appointment_store._lock.stats,
+        "stats": stats._lock.stats,
+    }
+    return {"process": process, "timings": timings, "locks": {k: vars(v) for k, v in locks.items()}}
+
+
+def verify(data_dir: str, store: str, processes: int, ops: int) -> List[str]:
+    """Devuelve las escrituras perdidas (lista vacia si no falta nada)"""
+    customers, cars, appointment_store, stats, _ = open_stores(data_dir, store)
+    problems = []
+
+    stored = {c.dni for c in customers.list_all()}
+    missing = [i for i in range(processes * ops + 1) if dni_for(i) not in stored]
+    if missing:
+        problems.append(f"clientes perdidos: {len(missing)}")
+
+    last_year = 2001 + (ops - 1) % 20
+    for p in range(processes):
+        car = cars.get_by_plate(plate_for(p))
+        if car is None or car.year != last_year:
+            problems.append(f"coche {plate_for(p)}: año {car.year if car else None}, esperado {last_year}")
+
+    appointments = appointment_store.list_all()
+    keys = {(a.car.plate, a.date, a.time) for a in appointments}
+    expected = {(plate_for(p), *appointment_slot(p, j)) for p in range(processes) for j in range(ops) if not cancelled(j)}
+    if expected - keys:
+        problems.append(f"citas perdidas: {len(expected - keys)}")
+    if keys - expected:
+        problems.append(f"citas canceladas que siguen guardadas: {len(keys - expected)}")
+
+    total = sum(stats.by_car(plate_for(p)).count for p in range(processes))
+    if total != len(appointments):
+        problems.append(f"agregados: {total} citas contadas, {len(appointments)} guardadas")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Estres multiproceso sobre el mismo almacen")
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--store", choices=("json", "bin"), default="json", help="Formato del almacen de citas")
+    parser.add_argument("--ops", type=int, default=50, help="Operaciones por proceso y escenario")
+    parser.add_argument("--output", help="Guarda el resumen en este JSON")
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="stress_mp_")
+    try:
+        seed_store(data_dir, args.processes, args.store)
+        start_at = time.time() + 1.0
+        jobs = [(data_dir, args.store, p, args.ops, start_at) for p in range(args.processes)]
+        with multiprocessing.Pool(args.processes) as pool:
+            results = pool.map(run_worker, jobs)
+        problems = verify(data_dir, args.store, args.processes, args.ops)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    print(f"\n== {args.processes} procesos x {args.ops} operaciones por escenario (citas en {args.store})")
+    print(f"{'escenario':<14}{'ops/s':>10}{'commits':>10}{'reintentos':>12}{'espera ms':>12}{'max ms':>10}")
+    summary = {}
+    cancels = sum(1 for j in range(args.ops) if cancelled(j))
+    scenarios = (("customers", args.ops), ("cars", args.ops), ("appointments", args.ops), ("cancel", cancels))
+    for scenario, ops in scenarios:
+        elapsed = max(r["timings"][scenario] for r in results)
+        locks = [r["locks"][scenario] for r in results]
+        row = {
+            "ops_per_sec": round(args.processes * ops / elapsed, 1),
+            "commits": sum(l["commits"] for l in locks),
+            "retries": sum(l["retries"] for l in locks),
+            "lock_wait_ms": round(sum(l["wait_seconds"] for l in locks) * 1000, 1),
+            "max_lock_wait_ms": round(max(l["max_wait_seconds"] for l in locks) * 1000, 1),
+        }
+        summary[scenario] = row
+        print(f"{scenario:<14}{row['ops_per_sec']:>10}{row['commits']:>10}{row['retries']:>12}"
+              f"{row['lock_wait_ms']:>12}{row['max_lock_wait_ms']:>10}")
+    stats_wait = sum(r["locks"]["stats"]["wait_seconds"] for r in results) * 1000
+    print(f"agregados: espera total por el cerrojo {stats_wait:.1f} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"processes": args.processes, "ops": args.ops, "store": args.store, "scenarios": summary, "lost": problems}, f, indent=4)
+
+    if problems:
+        print("\n❌ Escrituras perdidas:")
+        for line in problems:
+            print("  - " + line)
+        sys.exit(1)
+    print("\n✅ Ninguna escritura perdida")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""
+Cableado compartido (Composition Root) de repositorios y servicios.
+
+Lo usan tanto la interfaz grafica (main.py) como la linea de comandos
+(python -m adapters.cli), asi que aqui no se importa nada de tkinter.
+"""
+import os
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Optional
+
+from adapters.persistence.car_json_repository import CarJsonRepository
+from adapters.persistence.customer_json_repository import CustomerJsonRepository
+from adapters.persistence.appointment_archive_repository import AppointmentArchiveJsonRepository
+from adapters.persistence.appointment_json_repository import AppointmentJsonRepository
+from adapters.persistence.appointment_stats_json_repository import AppointmentStatsJsonRepository, source_files_version
+from adapters.persistence.archived_appointment_repository import ArchivedAppointmentRepository
+from adapters.persistence.file_compression import data_file
+from adapters.persistence.stats_tracking_appointment_repository import StatsTrackingAppointmentRepository
+
+#Solo para las anotaciones: el almacen binario, la instantanea de arranque y las
+#metricas se importan en build_services cuando se usan (consultas sueltas mas rapidas)
+if TYPE_CHECKING:
+    from adapters.instrumentation.metrics import MetricsRegistry
+    from adapters.persistence.startup_snapshot import StartupSnapshot
+
+from core.application.customer_services import (
+    RegisterCustomerService,
+    GetCustomerbyDniService,
+    ListCustomerService,
+    UpdateCustomerService,
+    DeleteCustomerService,
+    RegisterCustomersBatchService,
+    UpsertCustomersBatchService,
+    DeleteCustomersBatchService,
+)
+from core.application.car_services import (
+    RegisterCarService,
+    GetCarByPlateService,
+    ListCarsService,
+    ListCarsDueForRevisionService,
+    UpdateCarsService,
+    DeleteCarsService,
+    RegisterCarsBatchService,
+    UpsertCarsBatchService,
+    DeleteCarsBatchService,
+)
+from core.application.appointment_services import (
+    SheduleAppointmentService,
+    ListAppointmentsByDateService,
+    ListAppointmentsByCustomerService,
+    ListAppointmentsByCarService,
+    UpdateAppointmentService,
+    RescheduleAppointmentService,
+    ExportAppointmentsService,
+    DeleteAppointmentService,
+    SheduleAppointmentsBatchService,
+    UpsertAppointmentsBatchService,
+    DeleteAppointmentsBatchService,
+    ArchivePastAppointmentsService,
+)
+from core.application.report_services import (
+    RebuildStatsService,
+    GetDailyRevenueService,
+    GetMonthlyRevenueService,
+    GetCustomerLifetimeValueService,
+    GetCarSpendService,
+    GetTopCustomersService,
+    GetAgendaService,
+    GetWorkloadService,
+    GetRevenueBreakdownService,
+    GetUtilisationService,
+    GetBusyHoursService,
+)
+
+
+@dataclass
+class Services:
+    """Repositorios y casos de uso ya cableados"""
+
+    # Repositorios
+    customer_repo: Any
+    car_repo: Any
+    appointment_repo: Any
+    stats_repo: Any
+    # Servicios de Cliente
+    register_customer: Any
+    get_customer: Any
+    list_customers: Any
+    update_customer: Any
+    delete_customer: Any
+    register_customers_batch: Any
+    upsert_customers_batch: Any
+    delete_customers_batch: Any
+    # Servicios de Coche
+    register_car: Any
+    get_car: Any
+    list_cars: Any
+    list_cars_due_revision: Any
+    update_car: Any
+    delete_car: Any
+    register_cars_batch: Any
+    upsert_cars_batch: Any
+    delete_cars_batch: Any
+    # Servicios de Cita
+    schedule_appointment: Any
+    list_appointments: Any
+    list_appointments_by_customer: Any
+    list_appointments_by_car: Any
+    update_appointment: Any
+    reschedule_appointment: Any
+    delete_appointment: Any
+    export_appointments: Any
+    schedule_appointments_batch: Any
+    upsert_appointments_batch: Any
+    delete_appointments_batch: Any
+    archive_appointments: Any
+    # Servicios de Informes
+    rebuild_stats: Any
+    get_daily_revenue: Any
+    get_monthly_revenue: Any
+    get_customer_value: Any
+    get_car_spend: Any
+    get_top_customers: Any
+    get_agenda: Any
+    get_workload: Any
+    get_revenue_breakdown: Any
+    get_utilisation: Any
+    get_busy_hours: Any
+    # Instantanea de arranque (solo con warm_start)
+    snapshot: Optional["StartupSnapshot"] = None
+
+
+def build_services(
+    data_dir: str = "data", metrics: Optional["MetricsRegistry"] = None, warm_start: bool = False,
+    defer_warm_up: bool = False,
+) -> Services:
+    """
+    Instancia los repositorios JSON de data_dir y les inyecta los servicios.
+    Con warm_start se cargan todos los datos al arrancar, desde la instantanea
+    binaria si sigue siendo valida (pensado para la UI, no para consultas sueltas).
+    Con defer_warm_up la instantanea se prepara pero no se carga: quien arranca llama
+    a services.snapshot.warm_up() cuando le convenga (la UI, despues de pintar la ventana).
+    Si data_dir tiene appointments.bin, las citas van en el almacen binario.
+    Los ficheros JSON pueden estar comprimidos (.gz, .xz, .zst; ver file_compression).
+    Las citas pasadas ya archivadas viven en data_dir/archive y se leen junto a las demas.
+    """
+    # Creamos la carpeta de datos si no existe
+    if not os.path.exists(data_dir):
+        os.makedirs(data_dir)
+
+    if metrics:
+        from adapters.instrumentation.metrics import instrument
+
+    def measured(obj, name):
+        return instrument(obj, name, metrics) if metrics else obj
+
+    def path(name: str) -> str:
+        return os.path.join(data_dir, name)
+
+    # Repositorios
+    car_json_repo = CarJsonRepository(data_file(data_dir, "cars.json"))
+    customer_json_repo = CustomerJsonRepository(data_file(data_dir, "customers.json"))
+    car_repo = measured(car_json_repo, "CarRepository")
+    customer_repo = measured(customer_json_repo, "CustomerRepository")
+    binary_store = os.path.exists(path("appointments.bin"))
+    if binary_store:
+        from adapters.persistence.appointment_binary_repository import AppointmentBinaryRepository
+        #Registros de ancho fijo con mmap: no hace falta la instantanea para arrancar rapido
+        appointment_store_repo = AppointmentBinaryRepository(path("appointments.bin"), customer_repo, car_repo)
+    else:
+        appointment_store_repo = AppointmentJsonRepository(data_file(data_dir, "appointments.json"), customer_repo, car_repo)
+
+    snapshot = None
+    if warm_start:
+        from adapters.persistence.startup_snapshot import StartupSnapshot
+        snapshot_repos = {"customers": customer_json_repo, "cars": car_json_repo}
+        if not binary_store:
+            snapshot_repos["appointments"] = appointment_store_repo
+        snapshot = StartupSnapshot(path(".startup_snapshot.bin"), snapshot_repos)
+        if not defer_warm_up:
+            snapshot.warm_up()
+    # Citas antiguas en segmentos comprimidos de solo lectura: las lecturas ven
+    # almacen vivo + archivo, las escrituras solo el almacen vivo
+    archive_repo = measured(
+        AppointmentArchiveJsonRepository(path("archive"), customer_repo, car_repo), "AppointmentArchiveRepository"
+    )
+    appointment_history_repo = ArchivedAppointmentRepository(appointment_store_repo, archive_repo)
+    # Los agregados (facturacion por dia/mes/cliente/coche) se mantienen
+    # de forma incremental envolviendo el repositorio de citas. Guardan la version
+    # de los ficheros de citas que reflejan: si no existen o no coinciden (caida
+    # entre las dos escrituras, fichero editado a mano) se rehacen al usarlos
+    if binary_store:
+        appointment_files = (path("appointments.bin"), path("appointments.bin.keys"), path("archive"))
+    else:
+        appointment_files = (data_file(data_dir, "appointments.json"), path("archive"))
+    stats_repo = measured(
+        AppointmentStatsJsonRepository(
+            data_file(data_dir, "stats.json"),
+            source_version=lambda: source_files_version(*appointment_files),
+            source=appointment_history_repo.list_all,
+        ),
+        "AppointmentStatsRepository",
+    )
+    appointment_repo = measured(
+        StatsTrackingAppointmentRepository(appointment_history_repo, stats_repo), "AppointmentRepository"
+    )
+
+    rebuild_stats = measured(RebuildStatsService(appointment_history_repo, stats_repo), "RebuildStatsService")
+    # Informes de periodos enteros: se calculan sobre la instantanea columnar de
+    # almacen vivo + archivo, sin hidratar citas
+    analytics_repo = measured(appointment_history_repo, "AppointmentAnalyticsRepository")
+
+    # Los servicios NO saben que es JSON, solo ven el "Protocolo"
+    return Services(
+        customer_repo=customer_repo,
+        car_repo=car_repo,
+        appointment_repo=appointment_repo,
+        stats_repo=stats_repo,
+        register_customer=measured(RegisterCustomerService(customer_repo), "RegisterCustomerService"),
+        get_customer=measured(GetCustomerbyDniService(customer_repo), "GetCustomerbyDniService"),
+        list_customers=measured(ListCustomerService(customer_repo), "ListCustomerService"),
+        update_customer=measured(UpdateCustomerService(customer_repo), "UpdateCustomerService"),
+        delete_customer=measured(DeleteCustomerService(customer_repo), "DeleteCustomerService"),
+        register_customers_batch=measured(RegisterCustomersBatchService(customer_repo), "RegisterCustomersBatchService"),
+        upsert_customers_batch=measured(UpsertCustomersBatchService(customer_repo), "UpsertCustomersBatchService"),
+        delete_customers_batch=measured(DeleteCustomersBatchService(customer_repo), "DeleteCustomersBatchService"),
+        register_car=measured(RegisterCarService(car_repo), "RegisterCarService"),
+        get_car=measured(GetCarByPlateService(car_repo), "GetCarByPlateService"),
+        list_cars=measured(ListCarsService(car_repo), "ListCarsService"),
+        list_cars_due_revision=measured(ListCarsDueForRevisionService(car_repo), "ListCarsDueForRevisionService"),
+        update_car=measured(UpdateCarsService(car_repo), "UpdateCarsService"),
+        delete_car=measured(DeleteCarsService(car_repo), "DeleteCarsService"),
+        register_cars_batch=measured(RegisterCarsBatchService(car_repo), "RegisterCarsBatchService"),
+        upsert_cars_batch=measured(UpsertCarsBatchService(car_repo), "UpsertCarsBatchService"),
+        delete_cars_batch=measured(DeleteCarsBatchService(car_repo), "DeleteCarsBatchService"),
+        schedule_appointment=measured(
+            SheduleAppointmentService(appointment_repo, customer_repo, car_repo), "SheduleAppointmentService"
+        ),
+        list_appointments=measured(ListAppointmentsByDateService(appointment_repo), "ListAppointmentsByDateService"),
+        list_appointments_by_customer=measured(
+            ListAppointmentsByCustomerService(appointment_repo), "ListAppointmentsByCustomerService"
+        ),
+        list_appointments_by_car=measured(ListAppointmentsByCarService(appointment_repo), "ListAppointmentsByCarService"),
+        update_appointment=measured(UpdateAppointmentService(appointment_repo), "UpdateAppointmentService"),
+        reschedule_appointment=measured(
+            RescheduleAppointmentService(appointment_repo, customer_repo, car_repo), "RescheduleAppointmentService"
+        ),
+        delete_appointment=measured(DeleteAppointmentService(appointment_repo), "DeleteAppointmentService"),
+        export_appointments=measured(ExportAppointmentsService(appointment_repo), "ExportAppointmentsService"),
+        schedule_appointments_batch=measured(
+            SheduleAppointmentsBatchService(appointment_repo, customer_repo, car_repo), "SheduleAppointmentsBatchService"
+        ),
+        upsert_appointments_batch=measured(UpsertAppointmentsBatchService(appointment_repo), "UpsertAppointmentsBatchService"),
+        delete_appointments_batch=measured(DeleteAppointmentsBatchService(appointment_repo), "DeleteAppointmentsBatchService"),
+        archive_appointments=measured(
+            ArchivePastAppointmentsService(appointment_store_repo, archive_repo, stats_repo), "ArchivePastAppointmentsService"
+        ),
+        rebuild_stats=rebuild_stats,
+        get_daily_revenue=measured(GetDailyRevenueService(stats_repo), "GetDailyRevenueService"),
+        get_monthly_revenue=measured(GetMonthlyRevenueService(stats_repo), "GetMonthlyRevenueService"),
+        get_customer_value=measured(GetCustomerLifetimeValueService(stats_repo), "GetCustomerLifetimeValueService"),
+        get_car_spend=measured(GetCarSpendService(stats_repo), "GetCarSpendService"),
+        get_top_customers=measured(GetTopCustomersService(stats_repo), "GetTopCustomersService"),
+        get_agenda=measured(GetAgendaService(stats_repo), "GetAgendaService"),
+        get_workload=measured(GetWorkloadService(stats_repo), "GetWorkloadService"),
+        get_revenue_breakdown=measured(GetRevenueBreakdownService(analytics_repo), "GetRevenueBreakdownService"),
+        get_utilisation=measured(GetUtilisationService(analytics_repo), "GetUtilisationService"),
+        get_busy_hours=measured(GetBusyHoursService(analytics_repo), "GetBusyHoursService"),
+        snapshot=snapshot,
+    )
+
+
+@dataclass
+class AsyncServices:
+    """Casos de uso asincronos sobre los mismos repositorios (adaptadores de entrada con asyncio)"""
+
+    executor: Any
+    # Servicios de Cliente
+    register_customer: Any
+    get_customer: Any
+    list_customers: Any
+    update_customer: Any
+    delete_customer: Any
+    # Servicios de Coche
+    register_car: Any
+    get_car: Any
+    list_cars: Any
+    list_cars_due_revision: Any
+    update_car: Any
+    delete_car: Any
+    # Servicios de Cita
+    schedule_appointment: Any
+    list_appointments: Any
+    list_appointments_by_customer: Any
+    list_appointments_by_car: Any
+    update_appointment: Any
+    reschedule_appointment: Any
+    delete_appointment: Any
+
+
+def build_async_services(services: Services, max_workers: int = 8) -> AsyncServices:
+    """
+    Envuelve los repositorios ya cableados para que la E/S bloqueante corra en un
+    pool acotado de max_workers hilos. Hay que cerrar services.executor al terminar.
+    """
+    #Import perezoso: la linea de comandos no necesita asyncio
+    from adapters.persistence.executor_repository import ExecutorRepository, make_io_executor
+    from core.application import async_appointment_services as appt
+    from core.application import async_car_services as car
+    from core.application import async_customer_services as cust
+
+    executor = make_io_executor(max_workers)
+    customer_repo = ExecutorRepository(services.customer_repo, executor)
+    car_repo = ExecutorRepository(services.car_repo, executor)
+    appointment_repo = ExecutorRepository(services.appointment_repo, executor)
+    return AsyncServices(
+        executor=executor,
+        register_customer=cust.AsyncRegisterCustomerService(customer_repo),
+        get_customer=cust.AsyncGetCustomerbyDniService(customer_repo),
+        list_customers=cust.AsyncListCustomerService(customer_repo),
+        update_customer=cust.AsyncUpdateCustomerService(customer_repo),
+        delete_customer=cust.AsyncDeleteCustomerService(customer_repo),
+        register_car=car.AsyncRegisterCarService(car_repo),
+        get_car=car.AsyncGetCarByPlateService(car_repo),
+        list_cars=car.AsyncListCarsService(car_repo),
+        list_cars_due_revision=car.AsyncListCarsDueForRevisionService(car_repo),
+        update_car=car.AsyncUpdateCarsService(car_repo),
+        delete_car=car.AsyncDeleteCarsService(car_repo),
+        schedule_appointment=appt.AsyncSheduleAppointmentService(appointment_repo, customer_repo, car_repo),
+        list_appointments=appt.AsyncListAppointmentsByDateService(appointment_repo),
+        list_appointments_by_customer=appt.AsyncListAppointmentsByCustomerService(appointment_repo),
+        list_appointments_by_car=appt.AsyncListAppointmentsByCarService(appointment_repo),
+        update_appointment=appt.AsyncUpdateAppointmentService(appointment_repo),
+        reschedule_appointment=appt.AsyncRescheduleAppointmentService(appointment_repo, customer_repo, car_repo),
+        delete_appointment=appt.AsyncDeleteAppointmentService(appointment_repo),
+    )
@@ -0,0 +1,2 @@
+#test_forms.py es un script manual de la antigua UI con flet (python test_forms.py), no un test de pytest
+collect_ignore = ["test_forms.py"]
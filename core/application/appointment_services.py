@@ -1,11 +1,18 @@
-from typing import List, Optional
-from datetime import date, time
+from typing import Iterator, List, Optional, Tuple
+from datetime import date, time, timedelta
 
 from core.domain.appointment import Appointment
 from core.ports.appointment_repository import AppointmetRepository
+from core.ports.appointment_archive_repository import AppointmentArchiveRepository
+from core.ports.appointment_stats_repository import AppointmentStatsRepository
 from core.ports.customer_repository import CustomerRepository
 from core.ports.car_repository import CarRepository
 
+# Peticion de cita para los lotes: (dni, matricula, fecha, hora, coste)
+AppointmentRequest = Tuple[str, str, date, time, float]
+# Antiguedad (dias) a partir de la cual una cita pasada se lleva al archivo
+DEFAULT_ARCHIVE_AGE_DAYS = 365
+
 class SheduleAppointmentService:
     """Caso de uso: programar una nueva cita"""
     
@@ -15,6 +22,12 @@ class SheduleAppointmentService:
         self._cars_repo = car_repo
     
     def execute(self, customer_dni: str, car_plate: str, date_: date, time_: time, cost:float) -> Appointment:
+        appointment = self.build(customer_dni, car_plate, date_, time_, cost)
+        self._appointments_repo.add(appointment)
+        return appointment
+    
+    def build(self, customer_dni: str, car_plate: str, date_: date, time_: time, cost:float) -> Appointment:
+        """Busca cliente y coche y aplica las reglas de negocio, sin guardar la cita"""
         dni = customer_dni.strip().upper()
         plate = car_plate.strip().upper()
         
@@ -38,7 +51,6 @@ class SheduleAppointmentService:
         if appointment.is_past():
             raise ValueError("No se puede crear una cita en el pasado")
         
-        self._appointments_repo.add(appointment)
         return appointment
 
 
@@ -76,6 +88,19 @@ class ListAppointmentsByCarService:
         return self._appointments.find_by_car(plate)
 
 
+class ExportAppointmentsService:
+    """Caso de uso: recorrer las citas a exportar sin cargarlas todas en memoria"""
+    def __init__(self, appointment_repo: AppointmetRepository) -> None:
+        self._appointments = appointment_repo
+    
+    def execute(self, start: Optional[date] = None, end: Optional[date] = None, raw_dni: Optional[str] = None) -> Iterator[Appointment]:
+        """Citas entre start y end (incluidos) en orden de fecha y hora, opcionalmente de un cliente"""
+        if start is not None and end is not None and start > end:
+            raise ValueError("La fecha inicial no puede ser posterior a la final")
+        dni = raw_dni.strip().upper() if raw_dni else None
+        return self._appointments.iter_range(start, end, dni)
+
+
 class UpdateAppointmentService:
     """Caso de uso: Actualizar la cita"""
     def __init__(self, appointment_repo: AppointmetRepository) -> None:
@@ -88,6 +113,33 @@ class UpdateAppointmentService:
         self._appointments.update(appointment)
 
 
+class RescheduleAppointmentService:
+    """Caso de uso: mover una cita a otra fecha, hora o coche sin borrarla y volver a crearla"""
+    
+    def __init__(self, appointmet_repo: AppointmetRepository, customer_repo: CustomerRepository, car_repo: CarRepository) -> None:
+        #La cita nueva se valida igual que una cita recien programada
+        self._single = SheduleAppointmentService(appointmet_repo, customer_repo, car_repo)
+        self._appointments_repo = appointmet_repo
+    
+    def execute(self, original: Appointment, customer_dni: str, car_plate: str, date_: date, time_: time, cost: float) -> Appointment:
+        moved = self._single.build(customer_dni, car_plate, date_, time_, cost)
+        
+        #Comprobacion y cambio van en la misma escritura: la cita no desaparece entre medias
+        if not self._appointments_repo.reschedule(original, moved):
+            raise ValueError(reschedule_error(self._appointments_repo.find_by_car(moved.car.plate), original, moved))
+        return moved
+
+
+def reschedule_error(car_appointments: List[Appointment], original: Appointment, moved: Appointment) -> str:
+    """Motivo por el que el repositorio no ha movido la cita"""
+    def same_slot(a: Appointment, b: Appointment) -> bool:
+        return a.car.plate == b.car.plate and a.date == b.date and a.time == b.time
+    
+    if not same_slot(original, moved) and any(same_slot(a, moved) for a in car_appointments):
+        return f"El coche {moved.car.plate} ya tiene una cita el {moved.date} a las {moved.time.strftime('%H:%M')}"
+    return "La cita original ya no existe"
+
+
 class DeleteAppointmentService:
     """Caso de uso: Eliminar una cita"""
     def __init__(self, appointment_repo: AppointmetRepository) -> None:
@@ -95,3 +147,74 @@ class DeleteAppointmentService:
     
     def execute(self, appointment: Appointment) -> None:
         self.appointment_repo.delete(appointment)
+
+
+class SheduleAppointmentsBatchService:
+    """Caso de uso: programar un lote de citas con una sola escritura"""
+    
+    def __init__(self, appointmet_repo: AppointmetRepository, customer_repo: CustomerRepository, car_repo: CarRepository) -> None:
+        #Las comprobaciones son las mismas que las de una cita suelta
+        self._single = SheduleAppointmentService(appointmet_repo, customer_repo, car_repo)
+        self._appointments_repo = appointmet_repo
+    
+    def execute(self, requests: List[AppointmentRequest]) -> List[Appointment]:
+        """Valida todo el lote antes de guardar: si una peticion falla no se guarda ninguna"""
+        appointments = []
+        for i, (dni, plate, date_, time_, cost) in enumerate(requests, start=1):
+            try:
+                appointments.append(self._single.build(dni, plate, date_, time_, cost))
+            except ValueError as ex:
+                raise ValueError(f"Cita {i} del lote: {ex}") from ex
+        
+        self._appointments_repo.add_many(appointments)
+        return appointments
+
+
+class UpsertAppointmentsBatchService:
+    """Caso de uso: actualizar o crear un lote de citas con una sola escritura"""
+    def __init__(self, appointment_repo: AppointmetRepository) -> None:
+        self._appointments = appointment_repo
+    
+    def execute(self, appointments: List[Appointment]) -> None:
+        past = [a for a in appointments if a.is_past()]
+        if past:
+            raise ValueError(f"No se pueden guardar citas en el pasado ({len(past)} en el lote)")
+        
+        self._appointments.upsert_many(appointments)
+
+
+class DeleteAppointmentsBatchService:
+    """Caso de uso: eliminar un lote de citas con una sola escritura"""
+    def __init__(self, appointment_repo: AppointmetRepository) -> None:
+        self._appointments = appointment_repo
+    
+    def execute(self, appointments: List[Appointment]) -> None:
+        self._appointments.delete_many(appointments)
+
+
+class ArchivePastAppointmentsService:
+    """Caso de uso: llevar al archivo historico las citas pasadas mas antiguas que older_than_days"""
+    def __init__(self, appointment_repo: AppointmetRepository, archive_repo: AppointmentArchiveRepository,
+                 stats_repo: Optional[AppointmentStatsRepository] = None) -> None:
+        #appointment_repo es el almacen vivo sin agregados: archivar no cambia la facturacion
+        self._appointments = appointment_repo
+        self._archive = archive_repo
+        self._stats = stats_repo
+    
+    def execute(self, older_than_days: int = DEFAULT_ARCHIVE_AGE_DAYS, today: Optional[date] = None) -> int:
+        """Copia las citas al archivo y despues las borra del almacen vivo; devuelve cuantas ha movido"""
+        if older_than_days < 0:
+            raise ValueError("La antiguedad minima no puede ser negativa")
+        cutoff = (today or date.today()) - timedelta(days=older_than_days)
+        old = [a for a in self._appointments.iter_range(None, cutoff - timedelta(days=1)) if a.is_past()]
+        if not old:
+            return 0
+        #Los agregados siguen valiendo tras mover las citas, pero solo si ya valian antes
+        in_sync = self._stats is not None and not self._stats.is_stale()
+        #Si una ejecucion anterior se corto entre las dos escrituras, lo ya copiado no se vuelve a copiar
+        newest = self._archive.newest_date()
+        self._archive.append([a for a in old if newest is None or a.date > newest or not self._archive.contains(a)])
+        self._appointments.delete_many(old)
+        if in_sync:
+            self._stats.mark_in_sync()
+        return len(old)
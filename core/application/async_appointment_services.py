@@ -0,0 +1,125 @@
+import asyncio
+from typing import List, Optional
+from datetime import date, time
+
+from core.application.appointment_services import reschedule_error
+from core.domain.appointment import Appointment
+from core.ports.async_appointment_repository import AsyncAppointmetRepository
+from core.ports.async_customer_repository import AsyncCustomerRepository
+from core.ports.async_car_repository import AsyncCarRepository
+
+#Mismos casos de uso que appointment_services.py para adaptadores de entrada asincronos
+
+
+class AsyncSheduleAppointmentService:
+    """Caso de uso asincrono: programar una nueva cita"""
+    
+    def __init__(self, appointmet_repo: AsyncAppointmetRepository, customer_repo: AsyncCustomerRepository, car_repo: AsyncCarRepository) -> None:
+        self._appointments_repo = appointmet_repo
+        self._customers_repo = customer_repo
+        self._cars_repo = car_repo
+    
+    async def execute(self, customer_dni: str, car_plate: str, date_: date, time_: time, cost:float) -> Appointment:
+        appointment = await self.build(customer_dni, car_plate, date_, time_, cost)
+        await self._appointments_repo.add(appointment)
+        return appointment
+    
+    async def build(self, customer_dni: str, car_plate: str, date_: date, time_: time, cost:float) -> Appointment:
+        """Busca cliente y coche y aplica las reglas de negocio, sin guardar la cita"""
+        dni = customer_dni.strip().upper()
+        plate = car_plate.strip().upper()
+        
+        #Las dos busquedas son independientes: se lanzan a la vez
+        customer, car = await asyncio.gather(
+            self._customers_repo.get_by_dni(dni),
+            self._cars_repo.get_by_plate(plate),
+        )
+        if customer is None:
+            raise ValueError(f"No existe ningún cliente con DNI {dni}")
+        
+        if car is None:
+            raise ValueError(f"No existe ningún coche con matrícula {plate}")
+        
+        appointment = Appointment(
+            customer = customer,
+            car = car,
+            date = date_,
+            time = time_,
+            cost = cost,
+        )
+        
+        #Regla de negocio no permitir citas en el pasado
+        if appointment.is_past():
+            raise ValueError("No se puede crear una cita en el pasado")
+        
+        return appointment
+
+
+class AsyncListAppointmentsByDateService:
+    """Caso de uso asincrono: listar citas por fecha concreta"""
+    def __init__(self, appointment_repo: AsyncAppointmetRepository) -> None:
+        self._appointments = appointment_repo
+    
+    async def execute(self, date_: Optional[date] = None) -> List[Appointment]:
+        """Devuelve todas las citas de un dia concreto, o todas las citas si no se especifica fecha"""
+        if date_ is None:
+            return await self._appointments.list_all()
+        return await self._appointments.find_by_date(date_)
+
+
+class AsyncListAppointmentsByCustomerService:
+    """Caso de uso asincrono: listar citas de un cliente"""
+    def __init__(self, appointment_repo: AsyncAppointmetRepository) -> None:
+        self._appointments = appointment_repo
+    
+    async def execute(self, raw_dni: str) -> List[Appointment]:
+        """Devuelve todas las citas asociadas a un cliente por su DNI"""
+        dni = raw_dni.strip().upper()
+        return await self._appointments.find_by_customer(dni)
+
+
+class AsyncListAppointmentsByCarService:
+    """Caso de uso asincrono: listar citas de un coche"""
+    def __init__(self, appointment_repo: AsyncAppointmetRepository) -> None:
+        self._appointments = appointment_repo
+    
+    async def execute(self, raw_plate: str) -> List[Appointment]:
+        """Devuelve todas las citas asociadas a una matricula"""
+        plate = raw_plate.strip().upper()
+        return await self._appointments.find_by_car(plate)
+
+
+class AsyncUpdateAppointmentService:
+    """Caso de uso asincrono: Actualizar la cita"""
+    def __init__(self, appointment_repo: AsyncAppointmetRepository) -> None:
+        self._appointments = appointment_repo
+    
+    async def execute(self, appointment: Appointment) -> None:
+        if appointment.is_past():
+            raise ValueError("No se puede actulizar la cita a una fecha/hora pasada")
+        
+        await self._appointments.update(appointment)
+
+
+class AsyncRescheduleAppointmentService:
+    """Caso de uso asincrono: mover una cita a otra fecha, hora o coche en una sola escritura"""
+    
+    def __init__(self, appointmet_repo: AsyncAppointmetRepository, customer_repo: AsyncCustomerRepository, car_repo: AsyncCarRepository) -> None:
+        self._single = AsyncSheduleAppointmentService(appointmet_repo, customer_repo, car_repo)
+        self._appointments_repo = appointmet_repo
+    
+    async def execute(self, original: Appointment, customer_dni: str, car_plate: str, date_: date, time_: time, cost: float) -> Appointment:
+        moved = await self._single.build(customer_dni, car_plate, date_, time_, cost)
+        if not await self._appointments_repo.reschedule(original, moved):
+            car_appointments = await self._appointments_repo.find_by_car(moved.car.plate)
+            raise ValueError(reschedule_error(car_appointments, original, moved))
+        return moved
+
+
+class AsyncDeleteAppointmentService:
+    """Caso de uso asincrono: Eliminar una cita"""
+    def __init__(self, appointment_repo: AsyncAppointmetRepository) -> None:
+        self.appointment_repo = appointment_repo
+    
+    async def execute(self, appointment: Appointment) -> None:
+        await self.appointment_repo.delete(appointment)
@@ -0,0 +1,78 @@
+from datetime import date, timedelta
+from typing import List, Optional
+
+from core.domain.car import Car, REVISION_INTERVAL_DAYS
+from core.ports.async_car_repository import AsyncCarRepository
+
+#Mismos casos de uso que car_services.py para adaptadores de entrada asincronos
+
+
+class AsyncRegisterCarService:
+    """Caso de uso asincrono: registrar un nuevo coche en el sistema"""
+    
+    def __init__(self, car_repo: AsyncCarRepository) -> None:
+        self._car_repo = car_repo
+    
+    async def execute(self, car: Car) -> None:
+        """Registrar un nuevo coche"""
+        #La comprobacion y el alta son una sola operacion del repositorio: sin carreras
+        if not await self._car_repo.add_if_absent(car):
+            raise ValueError(f"Ya existe un coche con matricula {car.plate}")
+
+
+class AsyncGetCarByPlateService:
+    """Obtener un coche por su matricula (asincrono)"""
+    def __init__(self, car_repo: AsyncCarRepository) -> None:
+        self._car_repo = car_repo
+    
+    async def execute(self, raw_plate: str) -> Optional[Car]:
+        plate = raw_plate.strip().upper()
+        return await self._car_repo.get_by_plate(plate)
+
+
+class AsyncListCarsService:
+    """Caso de uso asincrono: listar todos los coches"""
+    
+    def __init__(self, car_repo: AsyncCarRepository) -> None:
+        self._car_repo = car_repo
+    
+    async def execute(self) -> List[Car]:
+        """Devuelve la lista de coches"""
+        return await self._car_repo.list_all()
+
+
+class AsyncListCarsDueForRevisionService:
+    """Caso de uso asincrono: listar los coches que necesitan pasar revision"""
+    
+    def __init__(self, car_repo: AsyncCarRepository) -> None:
+        self._car_repo = car_repo
+    
+    async def execute(self) -> List[Car]:
+        """Devuelve los coches sin revision o con la revision caducada"""
+        return await self._car_repo.list_due_for_revision(date.today() - timedelta(days=REVISION_INTERVAL_DAYS))
+
+
+class AsyncUpdateCarsService:
+    """Caso de uso asincrono: actualizar los datos de los coches registrados"""
+    
+    def __init__(self, car_repo: AsyncCarRepository) -> None:
+        self._car_repo = car_repo
+    
+    async def execute(self, car: Car) -> None:
+        """Actualiza un coche"""
+        #Comprobamos que exista en la misma operacion que lo actualiza
+        if not await self._car_repo.update_if_present(car):
+            raise ValueError(f"No existe ningun coche con la matricula {car.plate}")
+
+
+class AsyncDeleteCarsService:
+    """Caso de uso asincrono: borrar el coche"""
+    
+    def __init__(self, car_repo: AsyncCarRepository) -> None:
+        self._car_repo = car_repo
+    
+    async def execute(self, raw_plate: str) -> None:
+        """Elimina un coche"""
+        plate = raw_plate.strip().upper()
+        
+        await self._car_repo.delete(plate)
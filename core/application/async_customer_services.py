@@ -0,0 +1,64 @@
+from typing import List, Optional
+
+from core.domain.customer import Customer
+from core.ports.async_customer_repository import AsyncCustomerRepository
+
+#Mismos casos de uso que customer_services.py para adaptadores de entrada asincronos
+
+
+class AsyncRegisterCustomerService:
+    """Caso de uso asincrono para registrar un nuevo cliente"""
+    def __init__(self, customer_repo: AsyncCustomerRepository) -> None:
+        self.customer_repo = customer_repo
+    
+    async def execute(self, customer: Customer) -> None:
+        """Comprobamos si existe ya un cliente con ese DNI"""
+        #La comprobacion y el alta son una sola operacion del repositorio: sin carreras
+        if not await self.customer_repo.add_if_absent(customer):
+            raise ValueError(f"Ya existe un cliente con DNI {customer.dni}")
+
+
+class AsyncGetCustomerbyDniService:
+    """Caso de uso asincrono: Obtener un cliente por el dni"""
+    def __init__(self, customer_repo: AsyncCustomerRepository) -> None:
+        self.customer_repo = customer_repo
+    
+    async def execute(self, raw_dni: str) -> Optional[Customer]:
+        """Devuelve el cliente con ese DNI o None si no existe"""
+        dni = raw_dni.strip().upper()
+        
+        return await self.customer_repo.get_by_dni(dni)
+
+
+class AsyncListCustomerService:
+    
+    def __init__(self, customer_repo: AsyncCustomerRepository) -> None:
+        self.customer_repo = customer_repo
+    
+    async def execute(self) -> List[Customer]:
+        """Devuelve la lista completa de clientes"""
+        return await self.customer_repo.list_all()
+
+
+class AsyncUpdateCustomerService:
+    
+    def __init__(self, customer_repo: AsyncCustomerRepository) -> None:
+        self._customer_repo = customer_repo
+    
+    async def execute(self, customer: Customer) -> None:
+        """Actualiza un cliente"""
+        #Comprobamos que exista en la misma operacion que lo actualiza
+        if not await self._customer_repo.update_if_present(customer):
+            raise ValueError(f"No existe ningún cliente con el DNI {customer.dni}")
+
+
+class AsyncDeleteCustomerService:
+    
+    def __init__(self, customer_repo: AsyncCustomerRepository) -> None:
+        self._customer_repo = customer_repo
+    
+    async def execute(self, raw_dni: str) -> None:
+        """Elimina el cliente con ese DNI"""
+        dni = raw_dni.strip().upper()
+        
+        await self._customer_repo.delete(dni)
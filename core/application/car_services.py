@@ -1,6 +1,8 @@
+from collections import Counter
+from datetime import date, timedelta
 from typing import List, Optional
 
-from core.domain.car import Car
+from core.domain.car import Car, REVISION_INTERVAL_DAYS
 from core.ports.car_repository import CarRepository
 
 class RegisterCarService:
@@ -12,13 +14,9 @@ class RegisterCarService:
     
     def execute(self, car: Car) -> None:
         """Registrar un nuevo coche"""
-        plate = car.plate
-        
-        existing = self._car_repo.get_by_plate(plate)
-        if existing is not None:
-            raise ValueError(f"Ya existe un coche con matricula {plate}")
-        
-        self._car_repo.add(car)
+        #La comprobacion y el alta son una sola operacion del repositorio: sin carreras
+        if not self._car_repo.add_if_absent(car):
+            raise ValueError(f"Ya existe un coche con matricula {car.plate}")
 
 class GetCarByPlateService:
     """Obtener un coche por su matricula"""
@@ -40,6 +38,18 @@ class ListCarsService:
         return self._car_repo.list_all()
 
 
+class ListCarsDueForRevisionService:
+    """Caso de uso: listar los coches que necesitan pasar revision"""
+    
+    def __init__(self, car_repo: CarRepository) -> None:
+        self._car_repo = car_repo
+    
+    def execute(self) -> List[Car]:
+        """Devuelve los coches sin revision o con la revision caducada"""
+        #Misma regla que Car.needs_revision, pero la filtra el repositorio sin recorrer todos los coches
+        return self._car_repo.list_due_for_revision(date.today() - timedelta(days=REVISION_INTERVAL_DAYS))
+
+
 class UpdateCarsService:
     """Caso de uso: actualizar los datos de los coches registrados"""
     
@@ -49,14 +59,9 @@ class UpdateCarsService:
     
     def execute(self, car: Car) -> None:
         """Actualiza un coche"""
-        plate = car.plate
-        
-        existing = self._car_repo.get_by_plate(plate)
-        
-        if existing is None:
-            raise ValueError(f"No existe ningun coche con la matricula {plate}")
-        
-        self._car_repo.update(car)
+        #Comprobamos que exista en la misma operacion que lo actualiza
+        if not self._car_repo.update_if_present(car):
+            raise ValueError(f"No existe ningun coche con la matricula {car.plate}")
 
 
 class DeleteCarsService:
@@ -70,3 +75,39 @@ class DeleteCarsService:
         plate = raw_plate.strip().upper()
         
         self._car_repo.delete(plate)
+
+
+class RegisterCarsBatchService:
+    """Caso de uso: registrar un lote de coches nuevos con una sola escritura"""
+    
+    def __init__(self, car_repo: CarRepository) -> None:
+        self._car_repo = car_repo
+    
+    def execute(self, cars: List[Car]) -> None:
+        """No guarda nada si alguna matricula ya existe o se repite dentro del lote"""
+        counts = Counter(car.plate for car in cars)
+        clashes = sorted(plate for plate, n in counts.items() if n > 1 or self._car_repo.get_by_plate(plate) is not None)
+        if clashes:
+            raise ValueError(f"Ya existen coches con matricula {', '.join(clashes)}")
+        
+        self._car_repo.add_many(cars)
+
+
+class UpsertCarsBatchService:
+    """Caso de uso: dar de alta o actualizar un lote de coches con una sola escritura"""
+    
+    def __init__(self, car_repo: CarRepository) -> None:
+        self._car_repo = car_repo
+    
+    def execute(self, cars: List[Car]) -> None:
+        self._car_repo.upsert_many(cars)
+
+
+class DeleteCarsBatchService:
+    """Caso de uso: borrar un lote de coches con una sola escritura"""
+    
+    def __init__(self, car_repo: CarRepository) -> None:
+        self._car_repo = car_repo
+    
+    def execute(self, raw_plates: List[str]) -> None:
+        self._car_repo.delete_many([plate.strip().upper() for plate in raw_plates])
@@ -1,3 +1,4 @@
+from collections import Counter
 from typing import List, Optional
 
 from core.domain.customer import Customer
@@ -13,13 +14,9 @@ class RegisterCustomerService:
     
     def execute(self, customer: Customer) -> None:
         """Comprobamos si existe ya un cliente con ese DNI"""
-        dni = customer.dni
-        
-        existing = self.customer_repo.get_by_dni(dni)
-        if existing is not None:
-            raise ValueError(f"Ya existe un cliente con DNI {dni}")
-        
-        self.customer_repo.add(customer)
+        #La comprobacion y el alta son una sola operacion del repositorio: sin carreras
+        if not self.customer_repo.add_if_absent(customer):
+            raise ValueError(f"Ya existe un cliente con DNI {customer.dni}")
 
 
 class GetCustomerbyDniService:
@@ -55,15 +52,9 @@ class UpdateCustomerService:
     
     def execute(self, customer: Customer) -> None:
         """Actualiza un cliente"""
-        dni = customer.dni
-        
-        #Comprobamos que exista
-        existing = self._customer_repo.get_by_dni(dni)
-        
-        if existing is None:
-            raise ValueError(f"No existe ningún cliente con el DNI {dni}")
-        
-        self._customer_repo.update(customer)
+        #Comprobamos que exista en la misma operacion que lo actualiza
+        if not self._customer_repo.update_if_present(customer):
+            raise ValueError(f"No existe ningún cliente con el DNI {customer.dni}")
 
 
 class DeleteCustomerService:
@@ -76,4 +67,40 @@ class DeleteCustomerService:
         
         dni = raw_dni.strip().upper()
         
-        self._customer_repo.delete(dni)
\ No newline at end of file
+        self._customer_repo.delete(dni)
+
+
+class RegisterCustomersBatchService:
+    """Caso de uso: registrar un lote de clientes nuevos con una sola escritura"""
+    
+    def __init__(self, customer_repo: CustomerRepository) -> None:
+        self._customer_repo = customer_repo
+    
+    def execute(self, customers: List[Customer]) -> None:
+        """No guarda nada si algun DNI ya existe o se repite dentro del lote"""
+        counts = Counter(c.dni for c in customers)
+        clashes = sorted(dni for dni, n in counts.items() if n > 1 or self._customer_repo.get_by_dni(dni) is not None)
+        if clashes:
+            raise ValueError(f"Ya existen clientes con DNI {', '.join(clashes)}")
+        
+        self._customer_repo.add_many(customers)
+
+
+class UpsertCustomersBatchService:
+    """Caso de uso: dar de alta o actualizar un lote de clientes con una sola escritura"""
+    
+    def __init__(self, customer_repo: CustomerRepository) -> None:
+        self._customer_repo = customer_repo
+    
+    def execute(self, customers: List[Customer]) -> None:
+        self._customer_repo.upsert_many(customers)
+
+
+class DeleteCustomersBatchService:
+    """Caso de uso: eliminar un lote de clientes con una sola escritura"""
+    
+    def __init__(self, customer_repo: CustomerRepository) -> None:
+        self._customer_repo = customer_repo
+    
+    def execute(self, raw_dnis: List[str]) -> None:
+        self._customer_repo.delete_many([dni.strip().upper() for dni in raw_dnis])
@@ -0,0 +1,147 @@
+from typing import List, Optional, Tuple
+from datetime import date, timedelta
+
+from core.domain.revenue import AgendaEntry, RevenueSummary
+from core.ports.appointment_analytics_repository import AppointmentAnalyticsRepository, AppointmentColumnsView
+from core.ports.appointment_repository import AppointmetRepository
+from core.ports.appointment_stats_repository import AppointmentStatsRepository
+
+
+class GetDailyRevenueService:
+    """Caso de uso: facturacion y numero de citas de un dia"""
+    def __init__(self, stats_repo: AppointmentStatsRepository) -> None:
+        self._stats = stats_repo
+
+    def execute(self, date_: date) -> RevenueSummary:
+        return self._stats.daily(date_)
+
+
+class GetMonthlyRevenueService:
+    """Caso de uso: facturacion y numero de citas de un mes"""
+    def __init__(self, stats_repo: AppointmentStatsRepository) -> None:
+        self._stats = stats_repo
+
+    def execute(self, year: int, month: int) -> RevenueSummary:
+        if not (1 <= month <= 12):
+            raise ValueError(f"Mes no valido: {month}")
+        return self._stats.monthly(year, month)
+
+
+class GetCustomerLifetimeValueService:
+    """Caso de uso: valor acumulado de un cliente"""
+    def __init__(self, stats_repo: AppointmentStatsRepository) -> None:
+        self._stats = stats_repo
+
+    def execute(self, raw_dni: str) -> RevenueSummary:
+        dni = raw_dni.strip().upper()
+        return self._stats.by_customer(dni)
+
+
+class GetCarSpendService:
+    """Caso de uso: gasto acumulado de un coche"""
+    def __init__(self, stats_repo: AppointmentStatsRepository) -> None:
+        self._stats = stats_repo
+
+    def execute(self, raw_plate: str) -> RevenueSummary:
+        plate = raw_plate.strip().upper()
+        return self._stats.by_car(plate)
+
+
+class GetTopCustomersService:
+    """Caso de uso: clientes que mas facturan"""
+    def __init__(self, stats_repo: AppointmentStatsRepository) -> None:
+        self._stats = stats_repo
+
+    def execute(self, limit: int = 5) -> List[Tuple[str, RevenueSummary]]:
+        if limit <= 0:
+            raise ValueError("El limite tiene que ser mayor que 0")
+        return self._stats.top_customers(limit)
+
+
+class GetAgendaService:
+    """Caso de uso: agenda de un dia (de hoy en adelante) sin recorrer el historico"""
+    def __init__(self, stats_repo: AppointmentStatsRepository) -> None:
+        self._stats = stats_repo
+
+    def execute(self, date_: date) -> List[AgendaEntry]:
+        return self._stats.agenda(date_)
+
+
+class GetWorkloadService:
+    """Caso de uso: carga de trabajo (citas y facturacion) de los proximos dias"""
+    def __init__(self, stats_repo: AppointmentStatsRepository) -> None:
+        self._stats = stats_repo
+
+    def execute(self, start: date, days: int = 7) -> List[Tuple[date, RevenueSummary]]:
+        if days <= 0:
+            raise ValueError("El numero de dias tiene que ser mayor que 0")
+        result = []
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            result.append((day, self._stats.daily(day)))
+        return result
+
+
+# Huecos de una jornada del taller (8 horas, una cita por hora)
+DEFAULT_SLOTS_PER_DAY = 8
+# Agrupaciones del informe de facturacion de un periodo
+REVENUE_GROUPS = ("day", "month", "customer", "car")
+
+
+def _period(analytics_repo: AppointmentAnalyticsRepository, start: Optional[date],
+            end: Optional[date]) -> AppointmentColumnsView:
+    """Citas de [start, end] (abierto si falta alguno) sobre la instantanea columnar"""
+    if start is not None and end is not None and start > end:
+        raise ValueError("La fecha de inicio no puede ser posterior a la de fin")
+    return analytics_repo.export_columns().filter(start, end)
+
+
+class GetRevenueBreakdownService:
+    """Caso de uso: facturacion de un periodo agrupada por dia, mes, cliente o coche"""
+    def __init__(self, analytics_repo: AppointmentAnalyticsRepository) -> None:
+        self._analytics = analytics_repo
+
+    def execute(self, start: Optional[date] = None, end: Optional[date] = None,
+                by: str = "day") -> List[Tuple[str, float]]:
+        if by not in REVENUE_GROUPS:
+            raise ValueError(f"Agrupacion no valida: {by}")
+        columns = _period(self._analytics, start, end)
+        if by == "day":
+            return sorted((d.isoformat(), round(v, 2)) for d, v in columns.revenue_by_day().items())
+        if by == "month":
+            return sorted((f"{y:04d}-{m:02d}", round(v, 2)) for (y, m), v in columns.revenue_by_month().items())
+        groups = columns.revenue_by_customer() if by == "customer" else columns.revenue_by_car()
+        #Clientes y coches, de mas a menos facturacion
+        return sorted(((k, round(v, 2)) for k, v in groups.items()), key=lambda kv: (-kv[1], kv[0]))
+
+
+class GetUtilisationService:
+    """Caso de uso: ocupacion de cada dia de un periodo sobre la capacidad diaria del taller"""
+    def __init__(self, analytics_repo: AppointmentAnalyticsRepository) -> None:
+        self._analytics = analytics_repo
+
+    def execute(self, start: Optional[date] = None, end: Optional[date] = None,
+                slots_per_day: int = DEFAULT_SLOTS_PER_DAY) -> List[Tuple[date, float]]:
+        if slots_per_day <= 0:
+            raise ValueError("La capacidad diaria tiene que ser mayor que 0")
+        columns = _period(self._analytics, start, end)
+        return sorted(columns.utilisation_by_day(slots_per_day).items())
+
+
+class GetBusyHoursService:
+    """Caso de uso: numero de citas por hora del dia en un periodo (franjas mas ocupadas)"""
+    def __init__(self, analytics_repo: AppointmentAnalyticsRepository) -> None:
+        self._analytics = analytics_repo
+
+    def execute(self, start: Optional[date] = None, end: Optional[date] = None) -> List[Tuple[int, int]]:
+        return sorted(_period(self._analytics, start, end).count_by_hour().items())
+
+
+class RebuildStatsService:
+    """Caso de uso: recalcular desde cero los agregados a partir de todas las citas"""
+    def __init__(self, appointment_repo: AppointmetRepository, stats_repo: AppointmentStatsRepository) -> None:
+        self._appointments = appointment_repo
+        self._stats = stats_repo
+
+    def execute(self) -> None:
+        self._stats.rebuild(self._appointments.list_all())
@@ -3,6 +3,9 @@ from dataclasses import dataclass
 from typing import Optional
 import re
 
+# Dias entre revisiones: pasado este plazo desde la ultima, el coche tiene que volver a pasarla
+REVISION_INTERVAL_DAYS = 365
+
 
 @dataclass
 class Car:
@@ -50,4 +53,4 @@ class Car:
             return True
         
         days_passed = (date.today() - self.last_revision).days
-        return days_passed >= 365
+        return days_passed >= REVISION_INTERVAL_DAYS
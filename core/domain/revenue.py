@@ -0,0 +1,33 @@
+from dataclasses import dataclass
+from datetime import time
+
+
+@dataclass(frozen=True)
+class RevenueSummary:
+    """Agregado de facturacion: numero de citas y total en centimos"""
+
+    count: int = 0
+    total_cents: int = 0
+
+    @property
+    def total(self) -> float:
+        """Total facturado en euros"""
+        return self.total_cents / 100
+
+    #Regla de negocio
+
+    def average(self) -> float:
+        """Coste medio por cita (0 si no hay citas)"""
+        if self.count == 0:
+            return 0.0
+        return self.total / self.count
+
+
+@dataclass(frozen=True)
+class AgendaEntry:
+    """Linea de agenda: una cita sin hidratar cliente ni coche"""
+
+    time: time
+    customer_dni: str
+    car_plate: str
+    cost: float
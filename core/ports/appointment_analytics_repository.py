@@ -0,0 +1,50 @@
+from typing import Dict, Optional, Protocol, Tuple
+from datetime import date
+
+
+class AppointmentColumnsView(Protocol):
+    """Contrato de la instantanea columnar (solo lectura) de las citas para analitica"""
+
+    def __len__(self) -> int:
+        ...
+
+    def filter(self, start: Optional[date] = None, end: Optional[date] = None,
+               dni: Optional[str] = None, plate: Optional[str] = None) -> "AppointmentColumnsView":
+        """Citas del rango de fechas [start, end] y/o de un cliente y/o de un coche"""
+        ...
+
+    def total_revenue(self) -> float:
+        """Facturacion total en euros"""
+        ...
+
+    def revenue_by_day(self) -> Dict[date, float]:
+        """Facturacion de cada dia con citas"""
+        ...
+
+    def revenue_by_month(self) -> Dict[Tuple[int, int], float]:
+        """Facturacion de cada (año, mes) con citas"""
+        ...
+
+    def revenue_by_customer(self) -> Dict[str, float]:
+        """Facturacion de cada cliente por DNI"""
+        ...
+
+    def revenue_by_car(self) -> Dict[str, float]:
+        """Facturacion de cada coche por matricula"""
+        ...
+
+    def count_by_hour(self) -> Dict[int, int]:
+        """Numero de citas por hora del dia"""
+        ...
+
+    def utilisation_by_day(self, slots_per_day: int) -> Dict[date, float]:
+        """Fraccion de huecos ocupados cada dia con citas"""
+        ...
+
+
+class AppointmentAnalyticsRepository(Protocol):
+    """Contrato de los almacenes de citas que exportan una instantanea columnar"""
+
+    def export_columns(self) -> AppointmentColumnsView:
+        """Todas las citas en columnas, sin hidratar clientes ni coches"""
+        ...
@@ -0,0 +1,39 @@
+from typing import Iterator, Optional, Protocol, List
+from core.domain.appointment import Appointment
+from datetime import date
+
+
+class AppointmentArchiveRepository(Protocol):
+    """Contrato del archivo historico de citas: segmentos de solo lectura"""
+
+    def append(self, appointments: List[Appointment]) -> int:
+        """Guarda las citas en segmentos nuevos del archivo y devuelve cuantas ha guardado"""
+        ...
+
+    def newest_date(self) -> Optional[date]:
+        """Dia de la cita archivada mas reciente, o None si el archivo esta vacio"""
+        ...
+
+    def contains(self, appointment: Appointment) -> bool:
+        """True si hay una cita archivada con el mismo coche, fecha y hora"""
+        ...
+
+    def list_all(self) -> List[Appointment]:
+        """Devuelve todas las citas archivadas"""
+        ...
+
+    def find_by_date(self, date_: date) -> List[Appointment]:
+        """Citas archivadas de un dia concreto"""
+        ...
+
+    def find_by_customer(self, dni: str) -> List[Appointment]:
+        """Citas archivadas de un cliente por su DNI"""
+        ...
+
+    def find_by_car(self, plate: str) -> List[Appointment]:
+        """Citas archivadas de una matricula"""
+        ...
+
+    def iter_range(self, start: Optional[date] = None, end: Optional[date] = None, dni: Optional[str] = None) -> Iterator[Appointment]:
+        """Recorre en orden de fecha y hora las citas archivadas entre start y end (incluidos)"""
+        ...
@@ -1,4 +1,4 @@
-from typing import Protocol, List
+from typing import Iterator, Optional, Protocol, List
 from core.domain.appointment import Appointment
 from datetime import date
 
@@ -9,6 +9,18 @@ class AppointmetRepository(Protocol):
         """Crea una nueva cita"""
         ...
     
+    def add_many(self, appointments: List[Appointment]) -> None:
+        """Crea varias citas de una sola vez"""
+        ...
+    
+    def upsert_many(self, appointments: List[Appointment]) -> List[Appointment]:
+        """Actualiza las citas que ya existen (coche + fecha + hora) y crea las demas, de una sola vez; devuelve las filas sustituidas"""
+        ...
+    
+    def delete_many(self, appointments: List[Appointment]) -> List[Appointment]:
+        """Elimina de una sola vez las citas exactas que se le pasan; devuelve las filas borradas"""
+        ...
+    
     def list_all(self) -> List[Appointment]:
         """Devuelve todas las citas"""
         ...
@@ -25,10 +37,18 @@ class AppointmetRepository(Protocol):
         """Devuelve todas las citas asociadas a una matricula concreta"""
         ...
     
-    def update(self, appointment: Appointment) -> None:
-        """Actualiza un cita existente"""
+    def iter_range(self, start: Optional[date] = None, end: Optional[date] = None, dni: Optional[str] = None) -> Iterator[Appointment]:
+        """Recorre en orden de fecha y hora las citas entre start y end (incluidos), opcionalmente de un solo cliente"""
+        ...
+    
+    def update(self, appointment: Appointment) -> List[Appointment]:
+        """Actualiza un cita existente; devuelve la fila sustituida (vacia si no existia)"""
+        ...
+    
+    def reschedule(self, original: Appointment, moved: Appointment) -> Optional[Appointment]:
+        """Mueve la cita original a moved en una sola escritura y devuelve la fila sustituida; None si la original no existe o el destino esta ocupado"""
         ...
     
-    def delete(self, appointment: Appointment) -> None:
-        """Elimina del sistema la cita exacta que se le pasa"""
+    def delete(self, appointment: Appointment) -> List[Appointment]:
+        """Elimina del sistema la cita exacta que se le pasa; devuelve las filas borradas"""
         ...
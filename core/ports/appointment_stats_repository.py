@@ -0,0 +1,61 @@
+from typing import Protocol, Iterable, List, Tuple
+from datetime import date
+
+from core.domain.appointment import Appointment
+from core.domain.revenue import AgendaEntry, RevenueSummary
+
+
+class AppointmentStatsRepository(Protocol):
+    """Contrato de los agregados materializados de citas (facturacion y carga)"""
+
+    def record_added(self, appointment: Appointment) -> None:
+        """Suma la cita a todos los agregados"""
+        ...
+
+    def record_removed(self, appointment: Appointment) -> None:
+        """Resta la cita de todos los agregados"""
+        ...
+
+    def record_changes(self, added: Iterable[Appointment], removed: Iterable[Appointment]) -> None:
+        """Aplica un lote de altas y bajas con una sola escritura"""
+        ...
+
+    def rebuild(self, appointments: Iterable[Appointment]) -> None:
+        """Descarta los agregados y los recalcula desde cero"""
+        ...
+
+    def is_empty(self) -> bool:
+        """True si todavia no hay ningun agregado guardado"""
+        ...
+
+    def is_stale(self) -> bool:
+        """True si los agregados no corresponden a la version actual de las citas"""
+        ...
+
+    def mark_in_sync(self) -> None:
+        """Registra que los agregados reflejan las citas actuales (tras un cambio que no altera la facturacion)"""
+        ...
+
+    def daily(self, date_: date) -> RevenueSummary:
+        """Agregado de un dia concreto"""
+        ...
+
+    def monthly(self, year: int, month: int) -> RevenueSummary:
+        """Agregado de un mes concreto"""
+        ...
+
+    def by_customer(self, dni: str) -> RevenueSummary:
+        """Valor acumulado de un cliente (lifetime value)"""
+        ...
+
+    def by_car(self, plate: str) -> RevenueSummary:
+        """Gasto acumulado de un coche"""
+        ...
+
+    def top_customers(self, limit: int) -> List[Tuple[str, RevenueSummary]]:
+        """Devuelve los clientes con mayor facturacion (dni, agregado)"""
+        ...
+
+    def agenda(self, date_: date) -> List[AgendaEntry]:
+        """Citas de un dia de hoy en adelante, ordenadas por hora"""
+        ...
@@ -0,0 +1,51 @@
+from typing import Optional, Protocol, List
+from core.domain.appointment import Appointment
+from datetime import date
+
+
+class AsyncAppointmetRepository(Protocol):
+    """Version asincrona de AppointmetRepository: mismos metodos, pero se esperan con await"""
+    
+    async def add(self, appointment: Appointment) -> None:
+        """Crea una nueva cita"""
+        ...
+    
+    async def add_many(self, appointments: List[Appointment]) -> None:
+        """Crea varias citas de una sola vez"""
+        ...
+    
+    async def upsert_many(self, appointments: List[Appointment]) -> List[Appointment]:
+        """Actualiza las citas que ya existen (coche + fecha + hora) y crea las demas, de una sola vez; devuelve las filas sustituidas"""
+        ...
+    
+    async def delete_many(self, appointments: List[Appointment]) -> List[Appointment]:
+        """Elimina de una sola vez las citas exactas que se le pasan; devuelve las filas borradas"""
+        ...
+    
+    async def list_all(self) -> List[Appointment]:
+        """Devuelve todas las citas"""
+        ...
+    
+    async def find_by_date(self, date_: date) -> List[Appointment]:
+        """Busca y devuelve todas las citas de un dia concreto"""
+        ...
+    
+    async def find_by_customer(self, dni: str) -> List[Appointment]:
+        """Devuelve todas las citas pertenecientes a un cliente por su DNI"""
+        ...
+    
+    async def find_by_car(self, plate: str) -> List[Appointment]:
+        """Devuelve todas las citas asociadas a una matricula concreta"""
+        ...
+    
+    async def update(self, appointment: Appointment) -> List[Appointment]:
+        """Actualiza un cita existente; devuelve la fila sustituida (vacia si no existia)"""
+        ...
+    
+    async def reschedule(self, original: Appointment, moved: Appointment) -> Optional[Appointment]:
+        """Mueve la cita original a moved en una sola escritura y devuelve la fila sustituida; None si la original no existe o el destino esta ocupado"""
+        ...
+    
+    async def delete(self, appointment: Appointment) -> List[Appointment]:
+        """Elimina del sistema la cita exacta que se le pasa; devuelve las filas borradas"""
+        ...
@@ -0,0 +1,50 @@
+from typing import Protocol, Optional, List
+from datetime import date
+from core.domain.car import Car
+
+class AsyncCarRepository(Protocol):
+    """Version asincrona de CarRepository: mismos metodos, pero se esperan con await"""
+    
+    async def add(self, car: Car) -> None:
+        """Guarda un nuevo coche"""
+        ...
+    
+    async def add_if_absent(self, car: Car) -> bool:
+        """Guarda el coche solo si no existe su matricula, comprobando y escribiendo de una vez. True si lo ha guardado"""
+        ...
+    
+    async def add_many(self, cars: List[Car]) -> None:
+        """Guarda varios coches nuevos de una sola vez (importaciones masivas)"""
+        ...
+    
+    async def upsert_many(self, cars: List[Car]) -> None:
+        """Inserta los coches nuevos y sustituye los que ya existen (por matricula) de una sola vez"""
+        ...
+    
+    async def delete_many(self, plates: List[str]) -> None:
+        """Elimina de una sola vez los coches con esas matriculas (las que no existan se ignoran)"""
+        ...
+    
+    async def get_by_plate(self, plate: str) -> Optional[Car]:
+        """Devuelve el coche con esa matricula o None si no existe"""
+        ...
+    
+    async def list_all(self) -> List[Car]:
+        """Devuelve todos los coches"""
+        ...
+    
+    async def list_due_for_revision(self, cutoff: date) -> List[Car]:
+        """Coches sin revision o con la ultima revision en cutoff o antes"""
+        ...
+    
+    async def update(self, car: Car) -> None:
+        """Actualiza el coche"""
+        ...
+    
+    async def update_if_present(self, car: Car) -> bool:
+        """Actualiza el coche solo si existe, comprobando y escribiendo de una vez. True si lo ha actualizado"""
+        ...
+    
+    async def delete(self, plate: str) -> None:
+        """Borra un coche"""
+        ...
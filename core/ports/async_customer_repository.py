@@ -0,0 +1,45 @@
+from typing import Protocol, Optional, List
+from core.domain.customer import Customer
+
+class AsyncCustomerRepository(Protocol):
+    """Version asincrona de CustomerRepository: mismos metodos, pero se esperan con await"""
+    
+    async def add(self, customer: Customer) -> None:
+        """Guarda un nuevo cliente. Lanza error si ya existe"""
+        ...
+    
+    async def add_if_absent(self, customer: Customer) -> bool:
+        """Guarda el cliente solo si no existe su DNI, comprobando y escribiendo de una vez. True si lo ha guardado"""
+        ...
+    
+    async def add_many(self, customers: List[Customer]) -> None:
+        """Guarda varios clientes nuevos de una sola vez (importaciones masivas)"""
+        ...
+    
+    async def upsert_many(self, customers: List[Customer]) -> None:
+        """Inserta los clientes nuevos y sustituye los que ya existen (por DNI) de una sola vez"""
+        ...
+    
+    async def delete_many(self, dnis: List[str]) -> None:
+        """Elimina de una sola vez los clientes con esos DNI (los que no existan se ignoran)"""
+        ...
+    
+    async def get_by_dni(self, dni: str) -> Optional[Customer]:
+        """Devuelve el cliente con ese DNI o None si no existe"""
+        ...
+    
+    async def list_all(self) -> List[Customer]:
+        """Devuelve la lista completa de clientes"""
+        ...
+    
+    async def update(self, customer: Customer) -> None:
+        """Actualiza un cliente existente"""
+        ...
+    
+    async def update_if_present(self, customer: Customer) -> bool:
+        """Actualiza el cliente solo si existe, comprobando y escribiendo de una vez. True si lo ha actualizado"""
+        ...
+    
+    async def delete(self, dni: str) -> None:
+        """Elimina el cliente con ese DNI (si existe)"""
+        ...
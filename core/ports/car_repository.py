@@ -1,4 +1,5 @@
 from typing import Protocol, Optional, List
+from datetime import date
 from core.domain.car import Car
 
 class CarRepository(Protocol):
@@ -7,6 +8,22 @@ class CarRepository(Protocol):
         """Guarda un nuevo coche"""
         ...
     
+    def add_if_absent(self, car: Car) -> bool:
+        """Guarda el coche solo si no existe su matricula, comprobando y escribiendo de una vez. True si lo ha guardado"""
+        ...
+    
+    def add_many(self, cars: List[Car]) -> None:
+        """Guarda varios coches nuevos de una sola vez (importaciones masivas)"""
+        ...
+    
+    def upsert_many(self, cars: List[Car]) -> None:
+        """Inserta los coches nuevos y sustituye los que ya existen (por matricula) de una sola vez"""
+        ...
+    
+    def delete_many(self, plates: List[str]) -> None:
+        """Elimina de una sola vez los coches con esas matriculas (las que no existan se ignoran)"""
+        ...
+    
     def get_by_plate(self, plate: str) -> Optional[Car]:
         """Devuelve la matricula o none si existe"""
         ...
@@ -15,10 +32,18 @@ class CarRepository(Protocol):
         """Devuelve todos los car"""
         ...
     
+    def list_due_for_revision(self, cutoff: date) -> List[Car]:
+        """Coches sin revision o con la ultima revision en cutoff o antes"""
+        ...
+    
     def update(self, car: Car) -> None:
         """Actualiza el coche"""
         ...
     
+    def update_if_present(self, car: Car) -> bool:
+        """Actualiza el coche solo si existe, comprobando y escribiendo de una vez. True si lo ha actualizado"""
+        ...
+    
     def delete(self, plate: str) -> None:
         """Borra un coche"""
         ...
\ No newline at end of file
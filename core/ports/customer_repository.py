@@ -8,6 +8,22 @@ class CustomerRepository(Protocol):
         """Guarda un nuevo cliente. Lanza error si ya existe"""
         ...
     
+    def add_if_absent(self, customer: Customer) -> bool:
+        """Guarda el cliente solo si no existe su DNI, comprobando y escribiendo de una vez. True si lo ha guardado"""
+        ...
+    
+    def add_many(self, customers: List[Customer]) -> None:
+        """Guarda varios clientes nuevos de una sola vez (importaciones masivas)"""
+        ...
+    
+    def upsert_many(self, customers: List[Customer]) -> None:
+        """Inserta los clientes nuevos y sustituye los que ya existen (por DNI) de una sola vez"""
+        ...
+    
+    def delete_many(self, dnis: List[str]) -> None:
+        """Elimina de una sola vez los clientes con esos DNI (los que no existan se ignoran)"""
+        ...
+    
     def get_by_dni(self, dni: str) -> Optional[Customer]:
         """Devuelve el cliente con ese DNI o None si no existe"""
         ...
@@ -20,6 +36,10 @@ class CustomerRepository(Protocol):
         """Actualiza un cliente existente"""
         ...
     
+    def update_if_present(self, customer: Customer) -> bool:
+        """Actualiza el cliente solo si existe, comprobando y escribiendo de una vez. True si lo ha actualizado"""
+        ...
+    
     def delete(self, dni: str) -> None:
         """Elimina el cliente con ese DNI (si existe)"""
         ...
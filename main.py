@@ -1,37 +1,14 @@
 import os
 import tkinter as tk
 
-# --- 1. IMPORTAMOS LOS ADAPTADORES (Repositorios) ---
-from adapters.persistence.car_json_repository import CarJsonRepository
-from adapters.persistence.customer_json_repository import CustomerJsonRepository
-from adapters.persistence.appointment_json_repository import AppointmentJsonRepository
+# --- 1. CABLEADO COMPARTIDO (Repositorios + Servicios) ---
+# El mismo cableado lo reutiliza la linea de comandos (python -m adapters.cli)
+from bootstrap import build_services
 
-# --- 2. IMPORTAMOS LOS SERVICIOS ---
-# Servicios de Cliente
-from core.application.customer_services import (
-    RegisterCustomerService,
-    ListCustomerService,
-    UpdateCustomerService,
-    DeleteCustomerService,
-)
+# Instrumentacion opcional (TALLER_METRICS=<prefijo de salida>)
+from adapters.instrumentation.metrics import MetricsRegistry
 
-# Servicios de Coche
-from core.application.car_services import (
-    RegisterCarService,
-    ListCarsService,
-    UpdateCarsService,
-    DeleteCarsService,
-)
-
-# Servicios de Cita
-from core.application.appointment_services import (
-    SheduleAppointmentService,
-    ListAppointmentsByDateService,
-    UpdateAppointmentService,
-    DeleteAppointmentService,
-)
-
-# --- 3. IMPORTAMOS LA INTERFAZ GRÁFICA ---
+# --- 2. IMPORTAMOS LA INTERFAZ GRÁFICA ---
 from adapters.ui.tkinter_main import MainWindow
 
 
@@ -39,69 +16,71 @@ def main():
     print("🚗 INICIANDO SISTEMA TALLER (Arquitectura Hexagonal + tkinter)...")
 
     # --- PASO A: CONFIGURACIÓN (INFRAESTRUCTURA) ---
-    # Creamos la carpeta de datos si no existe
-    if not os.path.exists("data"):
-        os.makedirs("data")
-
-    # Instanciamos los Repositorios
-    car_repo = CarJsonRepository("data/cars.json")
-    customer_repo = CustomerJsonRepository("data/customers.json")
-    appointment_repo = AppointmentJsonRepository(
-        "data/appointments.json", customer_repo, car_repo
-    )
+    # Con TALLER_METRICS se miden servicios y repositorios (latencia, E/S, ficheros abiertos)
+    # y al cerrar se exportan <prefijo>.json y <prefijo>.prom
+    metrics_prefix = os.environ.get("TALLER_METRICS")
+    metrics = MetricsRegistry() if metrics_prefix else None
+    if metrics:
+        metrics.attach_io()
+
+    # --- PASO B: VENTANA ---
+    # La ventana se crea antes de cargar ningun dato: el primer frame no espera al disco
+    root = tk.Tk()
 
-    # --- PASO B: INYECCIÓN (CABLEADO) ---
+    # --- PASO C: INYECCIÓN (CABLEADO) ---
     # Le damos los repositorios a los Servicios.
     # Los servicios NO saben que es JSON, solo ven el "Protocolo".
+    # warm_start: todo se carga al arrancar, desde la instantanea binaria si sigue valida.
+    # Con defer_warm_up esa carga la hace la ventana en segundo plano (startup)
+    services = build_services("data", metrics, warm_start=True, defer_warm_up=True)
 
-    # Servicios de Cliente
-    register_customer = RegisterCustomerService(customer_repo)
-    list_customers = ListCustomerService(customer_repo)
-    update_customer = UpdateCustomerService(customer_repo)
-    delete_customer = DeleteCustomerService(customer_repo)
-
-    # Servicios de Coche
-    register_car = RegisterCarService(car_repo)
-    list_cars = ListCarsService(car_repo)
-    update_car = UpdateCarsService(car_repo)
-    delete_car = DeleteCarsService(car_repo)
+    # --- PASO D: CREACIÓN DE LA INTERFAZ (UI) ---
 
-    # Servicios de Cita
-    schedule_appointment = SheduleAppointmentService(
-        appointment_repo, customer_repo, car_repo
-    )
-    list_appointments = ListAppointmentsByDateService(appointment_repo)
-    update_appointment = UpdateAppointmentService(appointment_repo)
-    delete_appointment = DeleteAppointmentService(appointment_repo)
-
-    # --- PASO C: CREACIÓN DE LA INTERFAZ (UI) ---
-    # Creamos la ventana tkinter
-    root = tk.Tk()
-    
     # Instanciamos la ventana principal y le pasamos TODOS los servicios
     app = MainWindow(
         root,
         # Customer Services
-        register_customer=register_customer,
-        list_customers=list_customers,
-        update_customer=update_customer,
-        delete_customer=delete_customer,
+        register_customer=services.register_customer,
+        list_customers=services.list_customers,
+        update_customer=services.update_customer,
+        delete_customer=services.delete_customer,
         # Car Services
-        register_car=register_car,
-        list_cars=list_cars,
-        update_car=update_car,
-        delete_car=delete_car,
+        register_car=services.register_car,
+        list_cars=services.list_cars,
+        update_car=services.update_car,
+        delete_car=services.delete_car,
         # Appointment Services
-        schedule_appointment=schedule_appointment,
-        list_appointments=list_appointments,
-        update_appointment=update_appointment,
-        delete_appointment=delete_appointment,
+        schedule_appointment=services.schedule_appointment,
+        list_appointments=services.list_appointments,
+        update_appointment=services.update_appointment,
+        delete_appointment=services.delete_appointment,
+        reschedule_appointment=services.reschedule_appointment,
+        export_appointments=services.export_appointments,
+        # Dashboard Services
+        get_agenda=services.get_agenda,
+        get_workload=services.get_workload,
+        get_monthly_revenue=services.get_monthly_revenue,
+        get_top_customers=services.get_top_customers,
+        list_cars_due_revision=services.list_cars_due_revision,
+        # Modo desarrollador: TALLER_DEV=1 (umbral de accion lenta con TALLER_SLOW_MS)
+        dev_mode=os.environ.get("TALLER_DEV") == "1",
+        slow_action_ms=float(os.environ.get("TALLER_SLOW_MS", "200")),
+        # Carga inicial (instantanea de arranque) en un hilo, antes de leer las pestañas
+        startup=services.snapshot.warm_up if services.snapshot else None,
     )
 
-    # --- PASO D: LANZAR LA APLICACIÓN TKINTER ---
+    # --- PASO E: LANZAR LA APLICACIÓN TKINTER ---
     print("✅ Lanzando interfaz gráfica tkinter...")
     root.mainloop()
 
+    # Dejamos la instantanea al dia para que el siguiente arranque no tenga que parsear
+    if services.snapshot:
+        services.snapshot.save()
+
+    if metrics:
+        metrics.export(metrics_prefix)
+        print(f"📈 Métricas exportadas en {metrics_prefix}.json y {metrics_prefix}.prom")
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,117 @@
+"""
+Archivo de citas pasadas y agregados incrementales: archivar mueve filas del
+almacen vivo al archivo sin cambiar el historico, y los agregados que se
+mantienen escritura a escritura coinciden con recalcularlos desde cero.
+"""
+import os
+import random
+from dataclasses import replace
+from datetime import date, time, timedelta
+
+import pytest
+
+from adapters.persistence.appointment_archive_repository import AppointmentArchiveJsonRepository
+from adapters.persistence.appointment_binary_repository import AppointmentBinaryRepository
+from adapters.persistence.appointment_json_repository import AppointmentJsonRepository
+from adapters.persistence.file_compression import data_file
+from bootstrap import build_services
+from tools.generate_dataset import generate
+
+
+def key(a):
+    return (a.car.plate, a.date, a.time, a.customer.dni, a.cost)
+
+
+def stored(services):
+    return sorted(map(key, services.appointment_repo.list_all()))
+
+
+def hot_store(data_dir, services):
+    """El almacen vivo sin el archivo ni los agregados"""
+    if os.path.exists(os.path.join(data_dir, "appointments.bin")):
+        return AppointmentBinaryRepository(os.path.join(data_dir, "appointments.bin"), services.customer_repo, services.car_repo)
+    return AppointmentJsonRepository(data_file(data_dir, "appointments.json"), services.customer_repo, services.car_repo)
+
+
+def archive(data_dir, services):
+    return AppointmentArchiveJsonRepository(os.path.join(data_dir, "archive"), services.customer_repo, services.car_repo)
+
+
+def summary(services):
+    """Todos los agregados que se pueden consultar (por dia, mes, cliente y coche)"""
+    rows = services.appointment_repo.list_all()
+    return {
+        "days": {d: services.get_daily_revenue.execute(d) for d in {a.date for a in rows}},
+        "months": {m: services.get_monthly_revenue.execute(*m) for m in {(a.date.year, a.date.month) for a in rows}},
+        "customers": {c.dni: services.get_customer_value.execute(c.dni) for c in services.list_customers.execute()},
+        "cars": {c.plate: services.get_car_spend.execute(c.plate) for c in services.list_cars.execute()},
+    }
+
+
+@pytest.fixture(params=["json", "bin"])
+def data_dir(request, tmp_path):
+    path = str(tmp_path / "data")
+    generate(path, 20, 25, 400, seed=5, fmt=request.param)
+    return path
+
+
+def test_archive_moves_rows_and_keeps_history(data_dir):
+    services = build_services(data_dir)
+    before = stored(services)
+    totals = summary(services)
+
+    moved = services.archive_appointments.execute(30)
+    assert moved > 0
+    assert len(archive(data_dir, services).list_all()) == moved
+    assert len(hot_store(data_dir, services).list_all()) == len(before) - moved
+
+    reopened = build_services(data_dir)
+    assert stored(reopened) == before
+    assert summary(reopened) == totals
+    #Una segunda pasada no encuentra nada nuevo que mover
+    assert reopened.archive_appointments.execute(30) == 0
+    assert len(archive(data_dir, reopened).list_all()) == moved
+
+
+def test_archived_rows_are_read_only(data_dir):
+    services = build_services(data_dir)
+    services.archive_appointments.execute(30)
+    old = archive(data_dir, services).list_all()[0]
+    with pytest.raises(ValueError):
+        services.appointment_repo.update(replace(old, cost=old.cost + 1))
+    with pytest.raises(ValueError):
+        services.appointment_repo.delete(old)
+
+
+def test_incremental_stats_match_a_full_rebuild(data_dir):
+    services = build_services(data_dir)
+    other = build_services(data_dir)
+    services.archive_appointments.execute(30)
+    archived = set(map(key, archive(data_dir, services).list_all()))
+    rnd = random.Random(11)
+    future = date.today() + timedelta(days=1)
+
+    for step in range(60):
+        repo = rnd.choice((services, other)).appointment_repo
+        rows = [a for a in repo.list_all() if key(a) not in archived]
+        a = rnd.choice(rows)
+        op = step % 6
+        if op == 0:
+            repo.update(replace(a, cost=round(rnd.uniform(10, 500), 2)))
+        elif op == 1:
+            repo.delete(a)
+        elif op == 2:
+            repo.reschedule(a, replace(a, date=future + timedelta(days=400 + step), time=time(9)))
+        elif op == 3:
+            repo.upsert_many([replace(a, cost=1.0), replace(a, date=future + timedelta(days=800 + step))])
+        elif op == 4:
+            repo.delete_many(rnd.sample(rows, 2))
+        else:
+            #El otro "puesto" cambia la misma cita justo antes
+            (other if repo is services.appointment_repo else services).appointment_repo.update(replace(a, cost=999.0))
+            repo.update(replace(a, cost=5.0))
+
+    incremental = summary(services)
+    assert summary(other) == incremental
+    services.rebuild_stats.execute()
+    assert summary(services) == incremental
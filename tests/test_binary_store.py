@@ -0,0 +1,112 @@
+"""
+Almacen binario de citas (appointments.bin): lo que se escribe se vuelve a leer
+igual, tambien desde otro proceso que abre la carpeta de cero.
+"""
+import os
+from dataclasses import replace
+from datetime import date, time, timedelta
+
+import pytest
+
+from adapters.persistence.appointment_binary_repository import HEADER, RECORD, AppointmentBinaryRepository
+from bootstrap import build_services
+from tools.generate_dataset import generate
+
+
+def key(a):
+    return (a.car.plate, a.date, a.time, a.customer.dni, a.cost)
+
+
+def stored(services):
+    return sorted(map(key, services.appointment_repo.list_all()))
+
+
+def records_in_file(data_dir):
+    return (os.path.getsize(os.path.join(data_dir, "appointments.bin")) - HEADER.size) // RECORD.size
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    path = str(tmp_path / "data")
+    generate(path, 20, 25, 300, seed=3, fmt="bin")
+    return path
+
+
+def test_generated_store_is_binary(data_dir):
+    services = build_services(data_dir)
+    assert not os.path.exists(os.path.join(data_dir, "appointments.json"))
+    assert len(services.appointment_repo.list_all()) == records_in_file(data_dir) == 300
+
+
+def test_added_appointments_survive_reopen(data_dir):
+    services = build_services(data_dir)
+    customer = services.list_customers.execute()[0]
+    car = services.list_cars.execute()[0]
+    day = date.today() + timedelta(days=30)
+    added = services.schedule_appointment.execute(customer.dni, car.plate, day, time(7, 15), 42.5)
+
+    reopened = build_services(data_dir)
+    assert stored(reopened) == stored(services)
+    assert key(added) in stored(reopened)
+    assert [key(a) for a in reopened.appointment_repo.find_by_date(day) if a.time == time(7, 15)] == [key(added)]
+    assert key(added) in map(key, reopened.appointment_repo.find_by_customer(customer.dni))
+    assert key(added) in map(key, reopened.appointment_repo.find_by_car(car.plate))
+
+
+def test_update_rewrites_the_record_in_place(data_dir):
+    services = build_services(data_dir)
+    target = services.appointment_repo.list_all()[0]
+    changed = replace(target, cost=target.cost + 100)
+
+    assert [key(a) for a in services.appointment_repo.update(changed)] == [key(target)]
+    assert records_in_file(data_dir) == 300
+
+    expected = sorted(key(changed) if key(a) == key(target) else key(a) for a in services.appointment_repo.list_all())
+    assert stored(build_services(data_dir)) == expected
+
+
+def test_deleted_rows_stay_deleted_after_reopen(data_dir):
+    services = build_services(data_dir)
+    target = services.appointment_repo.list_all()[5]
+
+    assert [key(a) for a in services.appointment_repo.delete(target)] == [key(target)]
+    reopened = build_services(data_dir)
+    assert len(reopened.appointment_repo.list_all()) == 299
+    assert key(target) not in stored(reopened)
+    assert key(target) not in map(key, reopened.appointment_repo.find_by_car(target.car.plate))
+
+
+def test_new_rows_reuse_deleted_slots(data_dir):
+    services = build_services(data_dir)
+    target = services.appointment_repo.list_all()[0]
+    services.appointment_repo.delete(target)
+    moved = replace(target, date=date.today() + timedelta(days=60))
+    services.appointment_repo.add(moved)
+
+    assert records_in_file(data_dir) == 300
+    assert key(moved) in stored(build_services(data_dir))
+
+
+def test_deleting_a_quarter_compacts_the_file(data_dir):
+    services = build_services(data_dir)
+    rows = services.appointment_repo.list_all()
+    removed = rows[::3]
+
+    assert len(services.appointment_repo.delete_many(removed)) == len(removed)
+    #100 huecos de 300 pasan del umbral (un cuarto y al menos COMPACT_MIN_FREE)
+    assert records_in_file(data_dir) == 300 - len(removed)
+
+    reopened = build_services(data_dir)
+    assert stored(reopened) == sorted(map(key, rows[1::3] + rows[2::3]))
+    for a in removed[:10]:
+        assert key(a) not in map(key, reopened.appointment_repo.find_by_date(a.date))
+
+
+def test_few_deletions_do_not_compact(data_dir):
+    services = build_services(data_dir)
+    services.appointment_repo.delete_many(services.appointment_repo.list_all()[:10])
+    assert records_in_file(data_dir) == 300
+    store = AppointmentBinaryRepository(os.path.join(data_dir, "appointments.bin"), services.customer_repo, services.car_repo)
+    assert store.compact() == 10
+    assert records_in_file(data_dir) == 290
+    assert len(build_services(data_dir).appointment_repo.list_all()) == 290
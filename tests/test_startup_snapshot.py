@@ -0,0 +1,63 @@
+"""
+Instantanea de arranque: se restaura mientras los ficheros no cambian y deja
+de valer en cuanto otra escritura los toca.
+"""
+from datetime import date, time, timedelta
+
+import pytest
+
+from bootstrap import build_services
+from core.domain.customer import Customer
+from tools.generate_dataset import generate
+
+
+def warm(data_dir):
+    """Arranca con instantanea y devuelve (servicios, True si se restauro)"""
+    services = build_services(data_dir, warm_start=True, defer_warm_up=True)
+    return services, services.snapshot.warm_up()
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    path = str(tmp_path / "data")
+    generate(path, 20, 25, 200, seed=9)
+    warm(path)
+    return path
+
+
+def test_unchanged_files_restore_the_snapshot(data_dir):
+    services, restored = warm(data_dir)
+    assert restored
+    assert len(services.list_customers.execute()) == 20
+    assert len(services.appointment_repo.list_all()) == 200
+
+
+def test_a_write_invalidates_the_snapshot(data_dir):
+    services, _ = warm(data_dir)
+    customer = Customer(dni="00000000T", name="Nueva", surname="Clienta", birth_date=date(1990, 1, 1),
+                        email="nueva@example.com", phone="600000000")
+    services.register_customer.execute(customer)
+    car = services.list_cars.execute()[0]
+    day = date.today() + timedelta(days=10)
+    services.schedule_appointment.execute(customer.dni, car.plate, day, time(7, 45), 30.0)
+
+    reopened, restored = warm(data_dir)
+    assert not restored
+    assert reopened.get_customer.execute(customer.dni) is not None
+    assert any(a.customer.dni == customer.dni for a in reopened.appointment_repo.find_by_date(day))
+
+    #La carga completa ha guardado una instantanea nueva con la escritura
+    again, restored = warm(data_dir)
+    assert restored
+    assert again.get_customer.execute(customer.dni) is not None
+    assert len(again.appointment_repo.list_all()) == 201
+
+
+def test_a_write_from_another_process_invalidates_the_snapshot(data_dir):
+    other = build_services(data_dir)
+    target = other.appointment_repo.list_all()[0]
+    other.delete_appointment.execute(target)
+
+    reopened, restored = warm(data_dir)
+    assert not restored
+    assert len(reopened.appointment_repo.list_all()) == 199
@@ -0,0 +1,272 @@
+"""
+Generador de datos sinteticos para pruebas de carga.
+
+Produce N clientes (DNI con letra de control valida), N coches (matriculas
+^[0-9]{4}[A-Z]{3}$) y M citas con distribuciones realistas de fecha y coste.
+Es determinista a partir de la semilla y escribe en streaming: nunca guarda
+las filas en memoria, asi que puede generar decenas de millones de citas.
+
+Uso:
+    python -m tools.generate_dataset --customers 10000 --cars 12000 \\
+        --appointments 1000000 --seed 42 --out data_bench
+
+Con --compress gzip|lzma|zstd los ficheros JSON se escriben comprimidos
+(customers.json.gz, ...), tambien en streaming.
+"""
+import argparse
+import io
+import json
+import math
+import os
+import random
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterator, Optional, TextIO
+
+from adapters.persistence.file_compression import compression_for, data_file_variants, make_compression
+
+DNI_LETTERS = "TRWAGMYFPDXBNJZSQVHLCKE"
+# Las matriculas actuales no usan vocales ni Ñ/Q
+PLATE_LETTERS = "BCDFGHJKLMNPRSTVWXYZ"
+# Multiplicador coprimo con 10^8: reparte los DNI sin repetir
+DNI_STRIDE = 48271
+
+HOURS = list(range(8, 19))  # Mismas franjas que el formulario de citas (08:00 - 18:00)
+
+NAMES = ["Ana", "Luis", "Maria", "Jose", "Carmen", "Antonio", "Lucia", "Manuel", "Elena",
+         "Francisco", "Laura", "David", "Sara", "Javier", "Paula", "Carlos", "Marta", "Daniel"]
+SURNAMES = ["Garcia", "Martinez", "Lopez", "Sanchez", "Perez", "Gomez", "Martin", "Jimenez",
+            "Ruiz", "Hernandez", "Diaz", "Moreno", "Alvarez", "Romero", "Alonso", "Navarro"]
+MODELS = {
+    "Seat": ["Ibiza", "Leon", "Arona", "Ateca"],
+    "Renault": ["Clio", "Megane", "Captur"],
+    "Volkswagen": ["Golf", "Polo", "Passat", "Tiguan"],
+    "Toyota": ["Corolla", "Yaris", "RAV4"],
+    "Peugeot": ["208", "308", "3008"],
+    "Ford": ["Fiesta", "Focus", "Kuga"],
+}
+BRANDS = list(MODELS)
+
+
+# ==========================
+# CLAVES DETERMINISTAS
+# ==========================
+def dni_for(index: int) -> str:
+    """DNI valido (con letra de control) del cliente numero index"""
+    number = (index * DNI_STRIDE + 10_000_000) % 100_000_000
+    return f"{number:08d}{DNI_LETTERS[number % 23]}"
+
+
+def plate_for(index: int) -> str:
+    """Matricula unica del coche numero index (hasta 80 millones)"""
+    digits = index % 10_000
+    rest = index // 10_000
+    letters = ""
+    for _ in range(3):
+        letters = PLATE_LETTERS[rest % len(PLATE_LETTERS)] + letters
+        rest //= len(PLATE_LETTERS)
+    return f"{digits:04d}{letters}"
+
+
+# ==========================
+# GENERADORES DE FILAS
+# ==========================
+def iter_customers(count: int, seed: int, today: date) -> Iterator[dict]:
+    rng = random.Random(f"{seed}-customers")
+    for i in range(count):
+        name = rng.choice(NAMES)
+        surname = f"{rng.choice(SURNAMES)} {rng.choice(SURNAMES)}"
+        birth = today - timedelta(days=rng.randint(18 * 365, 85 * 365))
+        yield {
+            "dni": dni_for(i),
+            "name": name,
+            "surname": surname,
+            "birth_date": birth.isoformat(),
+            "email": f"{name.lower()}.{surname.split()[0].lower()}{i}@example.com",
+            "phone": f"6{rng.randrange(10 ** 8):08d}",
+        }
+
+
+def iter_cars(count: int, seed: int, today: date) -> Iterator[dict]:
+    rng = random.Random(f"{seed}-cars")
+    for i in range(count):
+        brand = rng.choice(BRANDS)
+        revision = None
+        #Uno de cada cinco coches nunca ha pasado revision
+        if rng.random() >= 0.2:
+            revision = (today - timedelta(days=rng.randint(0, 3 * 365))).isoformat()
+        yield {
+            "plate": plate_for(i),
+            "brand": brand,
+            "model": rng.choice(MODELS[brand]),
+            "year": rng.randint(1995, today.year),
+            "last_revision": revision,
+        }
+
+
+def _day_weight(day: date) -> float:
+    """Carga relativa de un dia: los domingos cierra el taller y el sabado es media jornada"""
+    weekday = day.weekday()
+    if weekday == 6:
+        return 0.0
+    if weekday == 5:
+        return 0.5
+    return 1.0
+
+
+def iter_appointments(
+    count: int,
+    customers: int,
+    cars: int,
+    seed: int,
+    today: date,
+    history_days: int = 3 * 365,
+    future_days: int = 90,
+) -> Iterator[dict]:
+    """
+    Reparte las citas entre [today - history_days, today + future_days] ponderando
+    por dia de la semana. Dentro de cada dia las parejas (coche, hora) son distintas,
+    asi que la clave (matricula + fecha + hora) nunca se repite.
+    """
+    rng = random.Random(f"{seed}-appointments")
+    start = today - timedelta(days=history_days)
+    days = [start + timedelta(days=d) for d in range(history_days + future_days + 1)]
+    weights = [_day_weight(d) for d in days]
+    total_weight = sum(weights)
+    slots_per_day = cars * len(HOURS)
+
+    emitted = 0
+    cumulative = 0.0
+    for day, weight in zip(days, weights):
+        cumulative += weight
+        target = round(count * cumulative / total_weight)
+        per_day = target - emitted
+        if per_day <= 0:
+            continue
+        if per_day > slots_per_day:
+            raise ValueError(
+                f"No caben {per_day} citas el {day}: hay {cars} coches x {len(HOURS)} franjas"
+            )
+        for slot in rng.sample(range(slots_per_day), per_day):
+            car_index, hour = divmod(slot, len(HOURS))
+            #Normalmente trae el coche su dueño habitual; a veces otro cliente (sesgado a los frecuentes)
+            if rng.random() < 0.8:
+                customer_index = car_index % customers
+            else:
+                customer_index = int(customers * rng.random() ** 2)
+            #Coste log-normal: mediana ~120 €, cola larga de reparaciones caras
+            cost = min(round(math.exp(rng.gauss(4.8, 0.7)), 2), 5000.0)
+            yield {
+                "date": day.isoformat(),
+                "time": f"{HOURS[hour]:02d}:00:00",
+                "cost": cost,
+                "customer_dni": dni_for(customer_index),
+                "car_plate": plate_for(car_index),
+            }
+        emitted = target
+
+
+# ==========================
+# FORMATOS DE SALIDA
+# ==========================
+def write_json_array(rows: Iterator[dict], out: TextIO) -> int:
+    """Escribe un array JSON fila a fila con el mismo formato que JsonRepositoryBase"""
+    written = 0
+    out.write("[")
+    for row in rows:
+        body = json.dumps(row, indent=4, ensure_ascii=False).replace("\n", "\n    ")
+        out.write(("," if written else "") + "\n    " + body)
+        written += 1
+    out.write("\n]" if written else "]")
+    return written
+
+
+def write_json_file(rows: Iterator[dict], path: str) -> int:
+    """Array JSON en path, comprimido si la extension lo pide (.gz, .xz, .zst)"""
+    with open(path, "wb", buffering=1024 * 1024) as raw, compression_for(path).writer(raw) as stream:
+        out = io.TextIOWrapper(stream, encoding="utf-8")
+        written = write_json_array(rows, out)
+        #Suelta el flujo sin cerrarlo: lo cierra el with (y con el, el final del comprimido)
+        out.detach()
+        return written
+
+
+def write_binary_appointments(rows: Iterator[dict], path: str) -> int:
+    """Citas en el almacen binario de ancho fijo (adapters/persistence/appointment_binary_repository.py)"""
+    from adapters.persistence.appointment_binary_repository import write_store
+    return write_store(rows, path)
+
+
+JSON_WRITER = (".json", write_json_file)
+# Formato -> {entidad: (extension, escritor)}. Cada formato de almacenamiento soportado se
+# registra aqui; las entidades que no tienen escritor propio se guardan en JSON
+WRITERS: Dict[str, Dict[str, tuple]] = {
+    "json": {},
+    "bin": {"appointments": (".bin", write_binary_appointments)},
+}
+
+
+def generate(
+    out_dir: str,
+    customers: int,
+    cars: int,
+    appointments: int,
+    seed: int = 42,
+    fmt: str = "json",
+    today: Optional[date] = None,
+    compress: str = "none",
+) -> Dict[str, int]:
+    """Genera los tres ficheros de datos en out_dir y devuelve las filas escritas por fichero"""
+    if customers <= 0 or cars <= 0:
+        raise ValueError("Hace falta al menos un cliente y un coche")
+    if fmt not in WRITERS:
+        raise ValueError(f"Formato no soportado: {fmt}")
+    json_writer = (JSON_WRITER[0] + make_compression(compress).extension, JSON_WRITER[1])
+    today = today or date.today()
+    os.makedirs(out_dir, exist_ok=True)
+
+    sources: Dict[str, Callable[[], Iterator[dict]]] = {
+        "customers": lambda: iter_customers(customers, seed, today),
+        "cars": lambda: iter_cars(cars, seed, today),
+        "appointments": lambda: iter_appointments(appointments, customers, cars, seed, today),
+    }
+    written = {}
+    for name, rows in sources.items():
+        extension, writer = WRITERS[fmt].get(name, json_writer)
+        target = os.path.join(out_dir, name + extension)
+        #Un fichero de la misma entidad en otro formato haria dudar a bootstrap de cual usar
+        others = data_file_variants(out_dir, name + JSON_WRITER[0])
+        others += [os.path.join(out_dir, name + w[name][0]) for w in WRITERS.values() if name in w]
+        for other in others:
+            if other != target and os.path.exists(other):
+                os.remove(other)
+        written[name] = writer(rows(), target)
+
+    #Los agregados ya no corresponden a los datos nuevos: se reconstruyen al arrancar
+    for stats_path in data_file_variants(out_dir, "stats.json"):
+        if os.path.exists(stats_path):
+            os.remove(stats_path)
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Genera un dataset sintetico para pruebas de carga")
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--cars", type=int, default=1200)
+    parser.add_argument("--appointments", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--format", choices=sorted(WRITERS), default="json")
+    parser.add_argument("--compress", choices=["none", "gzip", "lzma", "zstd"], default="none",
+                        help="Compresion de los ficheros JSON")
+    parser.add_argument("--today", type=date.fromisoformat, default=None,
+                        help="Fecha de referencia (YYYY-MM-DD) para que la salida sea reproducible")
+    parser.add_argument("--out", default="data_bench")
+    args = parser.parse_args()
+
+    written = generate(args.out, args.customers, args.cars, args.appointments,
+                       seed=args.seed, fmt=args.format, today=args.today, compress=args.compress)
+    for name, rows in written.items():
+        print(f"✅ {name}: {rows} filas")
+
+
+if __name__ == "__main__":
+    main()